@@ -0,0 +1,51 @@
+"""Per-call overhead of NatureRemoAPI without the network.
+
+Serves get_user and get_appliances from FakeTransport, so the timings cover
+only the client: building the request, rate limit bookkeeping, error
+checking and decoding the response into models.
+
+Usage:
+    python -m benchmarks.bench_client [--calls N]
+"""
+import argparse
+import statistics
+import time
+
+from remo import FakeTransport
+from remo import NatureRemoAPI
+
+
+def measure(call, calls: int) -> list:
+    call()  # warm up
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name: str, latencies: list):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{name:<16} mean {statistics.mean(latencies) * 1e6:8.1f} us  "
+        f"median {statistics.median(latencies) * 1e6:8.1f} us  "
+        f"p99 {p99 * 1e6:8.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=10000)
+    args = parser.parse_args()
+
+    with NatureRemoAPI(
+        "token", transport=FakeTransport.from_fixtures("testdata")
+    ) as api:
+        report("get_user", measure(api.get_user, args.calls))
+        report("get_appliances", measure(api.get_appliances, args.calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Size and speed of IR signal archives versus JSON.
+
+Builds an archive of captures, clean and with random jitter on every
+timing, and compares it with the same captures stored as JSON lines of
+IRSignal.as_json_string(): the size of both, the time to write them and
+the time to read them back into IRSignal objects.
+
+Usage:
+    python -m benchmarks.bench_ircodec [--signals N] [--jitter US]
+"""
+import argparse
+import io
+import json
+import random
+import time
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Tuple
+
+from remo import IRSignal
+from remo.decoders import load_ir_signal
+from remo.emulator import _nec_frame
+from remo.ircodec import dump
+from remo.ircodec import load
+
+
+def captures(count: int, jitter: int, seed: int = 0) -> List[IRSignal]:
+    """Return count captures of NEC and air conditioner frames."""
+    rng = random.Random(seed)
+    signals = []
+    for i in range(count):
+        if i % 2:
+            bits = [rng.getrandbits(1) for _ in range(144)]
+            frame = [3400, 1700]
+            for bit in bits:
+                frame += [430, 1300 if bit else 430]
+            data = (frame + [430, 30000]) * 2
+        else:
+            data = _nec_frame(rng.randrange(256), rng.randrange(256))
+        data = [t + rng.randint(-jitter, jitter) for t in data]
+        signals.append(IRSignal(38, data, "us"))
+    return signals
+
+
+def timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--signals", type=int, default=10000)
+    parser.add_argument("--jitter", type=int, default=30)
+    args = parser.parse_args()
+
+    print(
+        f"{'case':<16} {'bytes':>12} {'write s':>8} {'read s':>8}"
+        f" {'smaller':>8} {'faster':>8}"
+    )
+    for name, jitter in [("clean", 0), (f"jitter {args.jitter}", args.jitter)]:
+        signals = captures(args.signals, jitter)
+
+        def write_json():
+            return "\n".join(s.as_json_string() for s in signals).encode()
+
+        def read_json(text: bytes):
+            lines = text.splitlines()
+            return [load_ir_signal(json.loads(line)) for line in lines]
+
+        def write_archive():
+            fp = io.BytesIO()
+            dump(signals, fp)
+            return fp.getvalue()
+
+        def read_archive(data: bytes):
+            return list(load(io.BytesIO(data)))
+
+        text, json_write = timed(write_json)
+        _, json_read = timed(lambda: read_json(text))
+        data, archive_write = timed(write_archive)
+        _, archive_read = timed(lambda: read_archive(data))
+        for case, size, write, read in [
+            (f"{name} json", len(text), json_write, json_read),
+            (f"{name} archive", len(data), archive_write, archive_read),
+        ]:
+            print(
+                f"{case:<16} {size:12d} {write:8.3f} {read:8.3f}"
+                f" {len(text) / size:7.1f}x {json_read / read:7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
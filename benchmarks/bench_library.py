@@ -0,0 +1,107 @@
+"""Matching captures against a signal library versus a linear scan.
+
+Fills a SignalLibrary with NEC, AEHA and Sony signals, then looks up
+captures of some of them, each timing off by up to the given jitter, with
+SignalLibrary.match() and by comparing the capture with every stored
+signal in turn. Reports the time per lookup and how many captures each
+found the right signal for.
+
+Usage:
+    python -m benchmarks.bench_library [--signals N] [--queries N]
+        [--jitter FRACTION]
+"""
+import argparse
+import random
+import time
+from typing import List
+from typing import Set
+from typing import Tuple
+
+from remo import IRSignal
+from remo.library import _compare
+from remo.library import QUANTUM
+from remo.library import SignalLibrary
+from remo.library import TOLERANCE
+from remo.protocols import aeha_frame
+from remo.protocols import encode
+from remo.protocols import IRFrame
+from remo.protocols import nec_frame
+from remo.protocols import sony_frame
+
+
+def library(count: int, seed: int = 0) -> List[IRSignal]:
+    """Return count distinct signals, a third of each protocol."""
+    rng = random.Random(seed)
+    frames: Set[IRFrame] = set()
+    while len(frames) < count:
+        kind = len(frames) % 3
+        if kind == 0:
+            frame = nec_frame(rng.randrange(64), rng.randrange(256))
+        elif kind == 1:
+            # Air conditioners of a few models, differing in their state.
+            data = bytes([0x23, 0xCB, 0x26, 0x01, rng.randrange(4)])
+            data += bytes(rng.randrange(256) for _ in range(4))
+            frame = aeha_frame(data)
+        else:
+            frame = sony_frame(rng.randrange(128), rng.randrange(256), 20)
+        frames.add(frame)
+    return [encode(frame) for frame in sorted(frames, key=repr)]
+
+
+def capture(signal: IRSignal, jitter: float, rng: random.Random) -> IRSignal:
+    data = [
+        round(t * rng.uniform(1 - jitter, 1 + jitter)) for t in signal.data
+    ]
+    return IRSignal(signal.freq, data, signal.format)
+
+
+def linear_match(signals: List[IRSignal], capture: IRSignal) -> int:
+    best: Tuple[Tuple[float, float], int] = ((2.0, 0.0), -1)
+    for i, signal in enumerate(signals):
+        score = _compare(capture.data, signal.data, TOLERANCE, QUANTUM)
+        best = min(best, (score, i))
+    return best[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--signals", type=int, default=30000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    args = parser.parse_args()
+
+    signals = library(args.signals)
+    start = time.perf_counter()
+    index = SignalLibrary()
+    for i, signal in enumerate(signals):
+        index.add(i, signal)
+    print(
+        f"{len(signals)} signals indexed in"
+        f" {time.perf_counter() - start:.2f} s"
+    )
+
+    rng = random.Random(1)
+    expected = rng.sample(range(len(signals)), args.queries)
+    captures = [capture(signals[i], args.jitter, rng) for i in expected]
+
+    def index_match(capture: IRSignal) -> int:
+        match = index.match(capture, max_distance=1.0)
+        return -1 if match is None else match.key
+
+    print(f"{'method':<8} {'ms/query':>9} {'correct':>8}")
+    for name, find in [
+        ("index", index_match),
+        ("linear", lambda c: linear_match(signals, c)),
+    ]:
+        start = time.perf_counter()
+        found = [find(c) for c in captures]
+        elapsed = time.perf_counter() - start
+        correct = sum(f == e for f, e in zip(found, expected))
+        print(
+            f"{name:<8} {elapsed / len(captures) * 1e3:9.3f}"
+            f" {correct:>4d}/{len(captures)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Sending one IR signal from many Remos, sequentially and concurrently.
+
+Starts a fleet of RemoEmulators and times emitting the default NEC signal
+from every one of them with NatureRemoLocalAPI in a loop and with
+AsyncNatureRemoLocalAPI.send_ir_signals.
+
+Usage:
+    python -m benchmarks.bench_local [--remos N] [--latency S]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from remo import NatureRemoLocalAPI
+from remo.aio import AsyncNatureRemoLocalAPI
+from remo.emulator import DEFAULT_SIGNAL
+from remo.emulator import RemoEmulatorFleet
+
+MESSAGE = json.dumps(DEFAULT_SIGNAL)
+
+
+def send_sequentially(addrs):
+    for addr in addrs:
+        with NatureRemoLocalAPI(addr) as local_api:
+            local_api.send_ir_signal(MESSAGE)
+
+
+async def send_concurrently(addrs):
+    async with AsyncNatureRemoLocalAPI(addrs) as local_api:
+        await local_api.send_ir_signals(MESSAGE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--remos", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    with RemoEmulatorFleet(args.remos, latency=args.latency) as fleet:
+        addrs = fleet.addrs
+        for name, run in (
+            ("sequential", lambda: send_sequentially(addrs)),
+            ("concurrent", lambda: asyncio.run(send_concurrently(addrs))),
+        ):
+            start = time.perf_counter()
+            run()
+            print(f"{name:<12} {time.perf_counter() - start:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Memory retained by the models.
+
+Decodes JSON text of every fixture in testdata with its schema and uses
+tracemalloc to measure the bytes still allocated afterwards, i.e. what a
+long-lived model object costs including its nested objects and strings.
+The same is measured for whole account snapshots (devices and appliances)
+of synthetic accounts, next to the size of the JSON text and of the
+decoded dicts.
+
+Results are compared with the baseline stored in
+benchmarks/baselines/bench_memory.json. Sizes depend on the Python version
+but not on the machine.
+
+Usage:
+    python -m benchmarks.bench_memory [--count N] [--save-baseline]
+"""
+import argparse
+import gc
+import json
+import os
+import tracemalloc
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+from remo import models
+from remo.server import Account
+
+TESTDATA = os.path.join(os.path.dirname(__file__), os.pardir, "testdata")
+BASELINE = os.path.join(
+    os.path.dirname(__file__), "baselines", "bench_memory.json"
+)
+FIXTURES = {
+    "User": ("user", models.UserSchema),
+    "SensorValue": ("sensor_value", models.SensorValueSchema),
+    "DeviceCore": ("device_core", models.DeviceCoreSchema),
+    "Device": ("device", models.DeviceSchema),
+    "ApplianceModel": ("appliance_model", models.ApplianceModelSchema),
+    "AirConParams": ("aircon_params", models.AirConParamsSchema),
+    "ApplianceModelAndParams": (
+        "appliance_model_and_params",
+        models.ApplianceModelAndParamsSchema,
+    ),
+    "AirConRangeMode": ("aircon_range_mode", models.AirConRangeModeSchema),
+    "AirConRange": ("aircon_range", models.AirConRangeSchema),
+    "AirCon": ("aircon", models.AirConSchema),
+    "Signal": ("signal", models.SignalSchema),
+    "Button": ("button", models.ButtonSchema),
+    "TVState": ("tv_state", models.TVStateSchema),
+    "TV": ("tv", models.TVSchema),
+    "LightState": ("light_state", models.LightStateSchema),
+    "Light": ("light", models.LightSchema),
+    "Appliance": ("appliance", models.ApplianceSchema),
+    "Appliance (minimal)": ("appliance_minimal", models.ApplianceSchema),
+    "IRSignal": ("ir_signal", models.IRSignalSchema),
+}
+IR_LENGTHS = [100, 1000, 10000]
+ACCOUNT_SIZES = [10, 100, 1000]
+
+
+def load_fixture(name: str) -> Any:
+    with open(os.path.join(TESTDATA, f"{name}.json")) as f:
+        return json.load(f)
+
+
+def retained(fn: Callable[[], Any]) -> int:
+    """Return the bytes still allocated by the objects fn returns."""
+    fn()  # warm up caches that would otherwise be counted
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def per_object(schema, text: str, count: int) -> float:
+    # The list holding the objects is not part of their footprint.
+    overhead = retained(lambda: [None] * count)
+    return (
+        retained(lambda: schema(many=True).load(json.loads(text))) - overhead
+    ) / count
+
+
+def model_sizes(count: int) -> Dict[str, float]:
+    sizes = {}
+    for name, (fixture, schema) in FIXTURES.items():
+        text = json.dumps([load_fixture(fixture)] * count)
+        sizes[name] = per_object(schema, text, count)
+    ir_signal = load_fixture("ir_signal")
+    for length in IR_LENGTHS:
+        ir_signal["data"] = [(560, 1690)[i % 3 == 0] for i in range(length)]
+        text = json.dumps([ir_signal] * max(count // length, 1))
+        sizes[f"IRSignal[{length}]"] = per_object(
+            models.IRSignalSchema, text, max(count // length, 1)
+        )
+    return sizes
+
+
+def account_sizes() -> Dict[str, Dict[str, int]]:
+    sizes = {}
+    for size in ACCOUNT_SIZES:
+        account = Account.synthetic(appliances=size, seed=0)
+        devices = json.dumps(account.devices)
+        appliances = json.dumps(account.appliances)
+
+        def load():
+            return (
+                models.DeviceSchema(many=True).load(json.loads(devices)),
+                models.ApplianceSchema(many=True).load(json.loads(appliances)),
+            )
+
+        sizes[f"account[{size}]"] = {
+            "appliances": size,
+            "json": len(devices) + len(appliances),
+            "dicts": retained(
+                lambda: (json.loads(devices), json.loads(appliances))
+            ),
+            "models": retained(load),
+        }
+    return sizes
+
+
+def compare(result: float, baseline: Any) -> str:
+    if not baseline:
+        return ""
+    return f"{result / baseline:5.2f}x"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baselines: Dict[str, Any] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    models_ = model_sizes(args.count)
+    print(f"{'model':<26} {'bytes/object':>12} {'vs base':>8}")
+    for name, size in models_.items():
+        base = baselines.get("models", {}).get(name)
+        print(f"{name:<26} {size:12.0f} {compare(size, base):>8}")
+
+    accounts = account_sizes()
+    print()
+    print(
+        f"{'snapshot':<26} {'json':>10} {'dicts':>10} {'models':>10}"
+        f" {'per appl.':>10} {'vs base':>8}"
+    )
+    for name, size in accounts.items():
+        base = baselines.get("accounts", {}).get(name, {}).get("models")
+        per_appliance = size["models"] / size["appliances"]
+        print(
+            f"{name:<26} {size['json']:10d} {size['dicts']:10d}"
+            f" {size['models']:10d} {per_appliance:10.0f}"
+            f" {compare(size['models'], base):>8}"
+        )
+
+    if args.save_baseline:
+        baselines = {
+            "models": {k: round(v) for k, v in models_.items()},
+            "accounts": accounts,
+        }
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
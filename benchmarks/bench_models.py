@@ -0,0 +1,270 @@
+"""Decoding and encoding throughput of the models.
+
+Builds payloads from the fixtures in testdata, from a single appliance up
+to 10,000 appliances, plus devices, signals and long IR captures, and
+times loading them with the schemas in remo.models, the fast decoders
+and lazy appliances of remo.decoders, and dumping the loaded objects with
+as_json_string(). Every case reports objects per second and
+microseconds per object for both directions.
+
+Results are compared with the baseline stored in
+benchmarks/baselines/bench_models.json. Baselines only mean something on
+the machine they were recorded on, so record a new one before comparing
+changes on another machine.
+
+Usage:
+    python -m benchmarks.bench_models [--sizes 1,10,100,1000,10000]
+        [--save-baseline] [--max-regression 0.2]
+"""
+import argparse
+import copy
+import functools
+import json
+import os
+import sys
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+
+from remo import ApplianceSchema
+from remo import DeviceSchema
+from remo import IRSignalSchema
+from remo import SignalSchema
+from remo.decoders import load_appliances
+from remo.decoders import load_devices
+from remo.decoders import load_ir_signal
+
+TESTDATA = os.path.join(os.path.dirname(__file__), os.pardir, "testdata")
+BASELINE = os.path.join(
+    os.path.dirname(__file__), "baselines", "bench_models.json"
+)
+SIZES = [1, 10, 100, 1000, 10000]
+IR_LENGTHS = [100, 1000, 10000, 100000]
+
+
+def load_fixture(name: str) -> Any:
+    with open(os.path.join(TESTDATA, f"{name}.json")) as f:
+        return json.load(f)
+
+
+def appliance_payload(count: int) -> List[dict]:
+    """Return count appliances cycling through AC, TV, LIGHT and IR."""
+    ac = load_fixture("appliance")
+    ac.pop("tv")
+    tv = copy.deepcopy(ac)
+    tv.update(type="TV", settings=None, aircon=None, tv=load_fixture("tv"))
+    light = load_fixture("appliance_minimal")
+    light.update(type="LIGHT", light=load_fixture("light"))
+    ir = load_fixture("appliance_minimal")
+    templates = [ac, tv, light, ir]
+
+    payload = []
+    for i in range(count):
+        appliance = copy.deepcopy(templates[i % len(templates)])
+        appliance["id"] = f"appliance-{i}"
+        payload.append(appliance)
+    return payload
+
+
+def device_payload(count: int) -> List[dict]:
+    device = load_fixture("device")
+    return [dict(device, id=f"device-{i}") for i in range(count)]
+
+
+def signal_payload(count: int) -> List[dict]:
+    signal = load_fixture("signal")
+    return [dict(signal, id=f"signal-{i}") for i in range(count)]
+
+
+def ir_signal_payload(length: int) -> dict:
+    """Return a capture of length pulse and space durations."""
+    ir_signal = load_fixture("ir_signal")
+    ir_signal["data"] = [(560, 1690)[i % 3 == 0] for i in range(length)]
+    return ir_signal
+
+
+class Case(NamedTuple):
+    name: str
+    objects: int
+    load: Callable[[], Any]
+    dump: Callable[[Any], Any]
+
+
+def cases(sizes: List[int]) -> List[Case]:
+    def one(schema, payload):
+        return lambda: schema().load(payload)
+
+    def many(schema, payload):
+        return lambda: schema(many=True).load(payload)
+
+    def dump_many(objs):
+        return [obj.as_json_string() for obj in objs]
+
+    result = []
+    for size in sizes:
+        payload = appliance_payload(size)
+        result.append(
+            Case(
+                f"appliances[{size}]",
+                size,
+                many(ApplianceSchema, payload),
+                dump_many,
+            )
+        )
+        result.append(
+            Case(
+                f"appliances[{size}] fast",
+                size,
+                functools.partial(load_appliances, payload),
+                dump_many,
+            )
+        )
+        result.append(
+            Case(
+                f"appliances[{size}] lazy",
+                size,
+                functools.partial(load_appliances, payload, lazy=True),
+                dump_many,
+            )
+        )
+    for size in sizes:
+        payload = device_payload(size)
+        result.append(
+            Case(
+                f"devices[{size}]",
+                size,
+                many(DeviceSchema, payload),
+                dump_many,
+            )
+        )
+        result.append(
+            Case(
+                f"devices[{size}] fast",
+                size,
+                functools.partial(load_devices, payload),
+                dump_many,
+            )
+        )
+    size = max(sizes)
+    result.append(
+        Case(
+            f"signals[{size}]",
+            size,
+            many(SignalSchema, signal_payload(size)),
+            dump_many,
+        )
+    )
+    for length in IR_LENGTHS:
+        ir_payload = ir_signal_payload(length)
+        result.append(
+            Case(
+                f"ir_signal[{length}]",
+                1,
+                one(IRSignalSchema, ir_payload),
+                lambda obj: obj.as_json_string(),
+            )
+        )
+        result.append(
+            Case(
+                f"ir_signal[{length}] fast",
+                1,
+                functools.partial(load_ir_signal, ir_payload),
+                lambda obj: obj.as_message(),
+            )
+        )
+    return result
+
+
+def best_time(fn: Callable[[], Any], min_time: float, repeat: int) -> float:
+    """Return the fastest of repeat runs, each calling fn for min_time."""
+    best = float("inf")
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+
+def run(case: Case, min_time: float, repeat: int) -> Dict[str, float]:
+    objs = case.load()
+    load = best_time(case.load, min_time, repeat)
+    dump = best_time(lambda: case.dump(objs), min_time, repeat)
+    return {
+        "load_us": round(load / case.objects * 1e6, 3),
+        "dump_us": round(dump / case.objects * 1e6, 3),
+    }
+
+
+def compare(result: float, baseline: Dict[str, float], key: str) -> str:
+    if key not in baseline:
+        return ""
+    return f"{result / baseline[key]:5.2f}x"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", default=",".join(str(s) for s in SIZES), type=str
+    )
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=None,
+        help="Fail if a case is slower than its baseline by this fraction.",
+    )
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    baselines: Dict[str, Dict[str, float]] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    print(
+        f"{'case':<24} {'load obj/s':>12} {'load us/obj':>12} {'vs base':>8}"
+        f" {'dump obj/s':>12} {'dump us/obj':>12} {'vs base':>8}"
+    )
+    results = {}
+    regressions = []
+    for case in cases(sizes):
+        result = results[case.name] = run(case, args.min_time, args.repeat)
+        baseline = baselines.get(case.name, {})
+        print(
+            f"{case.name:<24}"
+            f" {1e6 / result['load_us']:12.0f} {result['load_us']:12.2f}"
+            f" {compare(result['load_us'], baseline, 'load_us'):>8}"
+            f" {1e6 / result['dump_us']:12.0f} {result['dump_us']:12.2f}"
+            f" {compare(result['dump_us'], baseline, 'dump_us'):>8}"
+        )
+        if args.max_regression is not None:
+            for key in ("load_us", "dump_us"):
+                limit = baseline.get(key, float("inf"))
+                if result[key] > limit * (1 + args.max_regression):
+                    regressions.append(f"{case.name} {key}")
+
+    if args.save_baseline:
+        baselines.update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+    if regressions:
+        print("Regressions: " + ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
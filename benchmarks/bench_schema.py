@@ -0,0 +1,72 @@
+"""Cost of building a schema per call versus reusing a shared one.
+
+Times loading small payloads, the size of a get_user or single appliance
+response, with a schema built for the call and with the shared instance
+returned by get_schema, and the same for dumping with as_json_string.
+
+Usage:
+    python -m benchmarks.bench_schema [--calls N]
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any
+from typing import Callable
+
+from remo import ApplianceSchema
+from remo import DeviceSchema
+from remo import get_schema
+from remo import UserSchema
+
+TESTDATA = os.path.join(os.path.dirname(__file__), os.pardir, "testdata")
+
+
+def load_fixture(name: str) -> Any:
+    with open(os.path.join(TESTDATA, f"{name}.json")) as f:
+        return json.load(f)
+
+
+def per_call(fn: Callable[[], Any], calls: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'case':<24} {'fresh us':>10} {'shared us':>10} {'speedup':>8}")
+    for name, schema, many, payload in [
+        ("user", UserSchema, False, load_fixture("user")),
+        ("devices[1]", DeviceSchema, True, [load_fixture("device")]),
+        ("appliance", ApplianceSchema, False, load_fixture("appliance")),
+    ]:
+        obj = schema(many=many).load(payload)
+        for action, fresh, shared in [
+            (
+                "load",
+                lambda: schema(many=many).load(payload),
+                lambda: get_schema(schema, many=many).load(payload),
+            ),
+            (
+                "dump",
+                lambda: schema(many=many).dumps(obj),
+                lambda: get_schema(schema, many=many).dumps(obj),
+            ),
+        ]:
+            fresh_time = per_call(fresh, args.calls)
+            shared_time = per_call(shared, args.calls)
+            print(
+                f"{name + ' ' + action:<24} {fresh_time * 1e6:10.1f}"
+                f" {shared_time * 1e6:10.1f}"
+                f" {fresh_time / shared_time:7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
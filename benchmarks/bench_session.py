@@ -0,0 +1,87 @@
+"""Per-call latency of NatureRemoAPI with and without connection reuse.
+
+Runs a keep-alive HTTP stub on localhost and times ``get_user`` calls made
+with a fresh connection per call (the behaviour before pooled sessions) and
+with a pooled keep-alive session.
+
+Usage:
+    python -m benchmarks.bench_session [--calls N]
+
+The stub speaks plain HTTP, so the numbers only include the TCP handshake;
+against api.nature.global the pooled session also skips the TLS handshake.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+from remo import create_session
+from remo import NatureRemoAPI
+
+USER = json.dumps({"id": "user-id", "nickname": "bench"}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(USER)))
+        if self.headers.get("Connection", "").lower() == "close":
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(USER)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def measure(api: NatureRemoAPI, calls: int) -> list:
+    api.get_user()  # warm up
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        api.get_user()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name: str, latencies: list):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{name:<12} mean {statistics.mean(latencies) * 1e6:8.1f} us  "
+        f"median {statistics.median(latencies) * 1e6:8.1f} us  "
+        f"p99 {p99 * 1e6:8.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        for name, session in (
+            ("no reuse", create_session(keep_alive=False)),
+            ("pooled", create_session()),
+        ):
+            with NatureRemoAPI("token", session=session) as api:
+                api.base_url = base_url
+                report(name, measure(api, args.calls))
+            session.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Throughput of NatureRemoAPIPool against the stand-in cloud server.
+
+Starts a FakeCloudServer with injected latency and errors, then calls
+get_devices for many access tokens from a thread pool and reports requests
+per second and how many calls failed after retries.
+
+Usage:
+    python -m benchmarks.bench_throughput [--tokens N] [--calls N]
+        [--threads N] [--latency S] [--error-rate P]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from remo import NatureRemoAPIPool
+from remo import NatureRemoError
+from remo import RetryPolicy
+from remo.server import Account
+from remo.server import FakeCloudServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=25)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeCloudServer(
+        Account.synthetic(appliances=20),
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit=args.calls * 2,
+        seed=0,
+    )
+    retry = RetryPolicy(max_retries=3, backoff_factor=0.01)
+    tokens = {f"home{i}": f"token{i}" for i in range(args.tokens)}
+
+    def call(key):
+        try:
+            pool.call(key, "get_devices")
+            return True
+        except NatureRemoError:
+            return False
+
+    with server, NatureRemoAPIPool(tokens, retry=retry) as pool:
+        for key in pool:
+            pool[key].base_url = server.base_url
+        keys = [key for key in pool for _ in range(args.calls)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as executor:
+            ok = sum(executor.map(call, keys))
+        elapsed = time.perf_counter() - start
+        stats = pool.stats()
+
+    print(
+        f"{len(keys)} calls in {elapsed:.2f}s: "
+        f"{len(keys) / elapsed:.1f} calls/s, "
+        f"{stats.requests_per_second:.1f} requests/s, "
+        f"{stats.errors} error responses, {len(keys) - ok} failed calls"
+    )
+
+
+if __name__ == "__main__":
+    main()
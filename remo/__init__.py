@@ -8,6 +8,9 @@ from .__version__ import __url__
 from .__version__ import __version__
 from .api import NatureRemoAPI
 from .api import NatureRemoLocalAPI
+from .cache import DetectionCache
+from .cache import ResponseCache
+from .coalesce import AirConSettingsQueue
 from .errors import NatureRemoError
 from .models import AirCon
 from .models import AirConParams
@@ -29,6 +32,8 @@ from .models import Device
 from .models import DeviceCore
 from .models import DeviceCoreSchema
 from .models import DeviceSchema
+from .models import get_schema
+from .models import IRData
 from .models import IRSignal
 from .models import IRSignalSchema
 from .models import Light
@@ -45,6 +50,16 @@ from .models import TVState
 from .models import TVStateSchema
 from .models import User
 from .models import UserSchema
+from .pool import NatureRemoAPIPool
+from .pool import PoolStats
+from .ratelimit import RateLimit
+from .ratelimit import RateLimitScheduler
+from .retry import RetryPolicy
+from .singleflight import SingleFlight
+from .transport import create_session
+from .transport import FakeTransport
+from .transport import HTTPTransport
+from .transport import Transport
 
 __all__ = [
     "NatureRemoAPI",
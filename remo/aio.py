@@ -0,0 +1,703 @@
+"""Asyncio clients for the Nature Remo API.
+
+This module requires httpx, which is installed with the ``async`` extra::
+
+    pip install nature-remo[async]
+"""
+import asyncio
+import functools
+from dataclasses import dataclass
+from typing import Any
+from typing import AsyncIterator
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Union
+
+import httpx
+from marshmallow import ValidationError
+
+from .__version__ import __url__
+from .__version__ import __version__
+from .api import BASE_URL
+from .api import HTTPMethod
+from .decoders import load_appliance
+from .decoders import load_appliances
+from .decoders import load_devices
+from .decoders import load_ir_signal
+from .errors import format_error_message
+from .errors import NatureRemoError
+from .models import Appliance
+from .models import ApplianceModelAndParams
+from .models import ApplianceModelAndParamsSchema
+from .models import ApplianceSchema
+from .models import Device
+from .models import DeviceSchema
+from .models import get_schema
+from .models import IRSignal
+from .models import Signal
+from .models import SignalSchema
+from .models import User
+from .models import UserSchema
+from .ratelimit import RateLimit
+from .ratelimit import update_rate_limit
+from .stream import JSONArrayDecoder
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_MAX_CONCURRENCY_PER_DEVICE = 1
+
+
+def create_async_client(
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = 5.0,
+    timeout: Optional[float] = None,
+) -> httpx.AsyncClient:
+    """Create an HTTP client backed by a keep-alive connection pool.
+
+    The returned client can be passed to several async API clients so that
+    they share the same pooled connections. Requests beyond max_connections
+    wait for a free connection instead of failing.
+
+    Args:
+        max_connections: Maximum number of concurrent connections.
+        max_keepalive_connections: Maximum number of idle connections kept
+          open.
+        keepalive_expiry: Seconds an idle connection is kept open.
+        timeout: Timeout in seconds for each request, or None to wait
+          indefinitely.
+
+    Returns:
+        An httpx.AsyncClient object.
+    """
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+class _AsyncClientMixin:
+    """Lifecycle of the HTTP client owned (or borrowed) by a client."""
+
+    client: httpx.AsyncClient
+    _owns_client: bool
+
+    def _init_client(self, client: Optional[httpx.AsyncClient]):
+        self._owns_client = client is None
+        self.client = create_async_client() if client is None else client
+
+    async def aclose(self):
+        """Close the underlying HTTP client if it was created by this client.
+
+        An HTTP client passed in by the caller is left open, since it may be
+        shared with other clients.
+        """
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+
+def _error_message(resp: httpx.Response) -> str:
+    return format_error_message(
+        resp.status_code, resp.reason_phrase, resp.json
+    )
+
+
+class AsyncNatureRemoAPI(_AsyncClientMixin):
+    """Asyncio client for the Nature Remo API.
+
+    Provides the same methods as NatureRemoAPI as coroutines.
+
+    Args:
+        access_token: Access token issued at https://home.nature.global.
+        client: HTTP client to send requests through. If omitted, the client
+          creates its own pooled HTTP client, which is closed by aclose().
+        fast_decode: Decode devices and appliances with the fast decoders in
+          remo.decoders, which give the same result as the schemas.
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        client: Optional[httpx.AsyncClient] = None,
+        fast_decode: bool = True,
+    ):
+        self.access_token = access_token
+        self.base_url = BASE_URL
+        self.rate_limit = RateLimit()
+        self.fast_decode = fast_decode
+        self._init_client(client)
+
+    async def __request(
+        self, endpoint: str, method: HTTPMethod, data: dict = None
+    ) -> httpx.Response:
+        headers = self.__headers()
+        url = f"{self.base_url}{endpoint}"
+
+        try:
+            if method == HTTPMethod.GET:
+                resp = await self.client.get(url, headers=headers)
+            else:
+                resp = await self.client.post(url, headers=headers, data=data)
+        except httpx.HTTPError as e:
+            raise NatureRemoError(e)
+        update_rate_limit(self.rate_limit, resp.headers)
+        return resp
+
+    def __headers(self) -> dict:
+        return {
+            "Accept": "application/json",
+            "Authorization": f"Bearer {self.access_token}",
+            "User-Agent": f"nature-remo/{__version__} ({__url__})",
+        }
+
+    def __get_json(self, resp: httpx.Response):
+        if resp.is_success:
+            return resp.json()
+        raise NatureRemoError(_error_message(resp))
+
+    def __check(self, resp: httpx.Response):
+        if not resp.is_success:
+            raise NatureRemoError(_error_message(resp))
+
+    async def get_user(self) -> User:
+        """Fetch the authenticated user's information.
+
+        Returns:
+            A User object.
+        """
+        endpoint = "/1/users/me"
+        resp = await self.__request(endpoint, HTTPMethod.GET)
+        json = self.__get_json(resp)
+        return get_schema(UserSchema).load(json)
+
+    async def update_user(self, nickname: str) -> User:
+        """Update authenticated user's information.
+
+        Args:
+            nickname: User's nickname.
+
+        Returns:
+            A User object.
+        """
+        endpoint = "/1/users/me"
+        resp = await self.__request(
+            endpoint, HTTPMethod.POST, {"nickname": nickname}
+        )
+        json = self.__get_json(resp)
+        return get_schema(UserSchema).load(json)
+
+    async def get_devices(self) -> List[Device]:
+        """Fetch the list of Remo devices the user has access to.
+
+        Returns:
+            A List of Device objects.
+        """
+        endpoint = "/1/devices"
+        resp = await self.__request(endpoint, HTTPMethod.GET)
+        json = self.__get_json(resp)
+        if self.fast_decode:
+            return load_devices(json)
+        return get_schema(DeviceSchema, many=True).load(json)
+
+    async def update_device(self, device: str, name: str):
+        """Update Remo.
+
+        Args:
+            device: Device ID.
+            name: Device name.
+        """
+        endpoint = f"/1/devices/{device}"
+        resp = await self.__request(endpoint, HTTPMethod.POST, {"name": name})
+        self.__check(resp)
+
+    async def delete_device(self, device: str):
+        """Delete Remo.
+
+        Args:
+            device: Device ID.
+        """
+        endpoint = f"/1/devices/{device}/delete"
+        resp = await self.__request(endpoint, HTTPMethod.POST)
+        self.__check(resp)
+
+    async def update_temperature_offset(self, device: str, offset: int):
+        """Update temperature offset.
+
+        Args:
+            device: Device ID.
+            offset: Temperature offset value added to the measured temperature.
+        """
+        endpoint = f"/1/devices/{device}/temperature_offset"
+        resp = await self.__request(
+            endpoint, HTTPMethod.POST, {"offset": offset}
+        )
+        self.__check(resp)
+
+    async def update_humidity_offset(self, device: str, offset: int):
+        """Update humidity offset.
+
+        Args:
+            device: Device ID.
+            offset: Humidity offset value added to the measured humidity.
+        """
+        endpoint = f"/1/devices/{device}/humidity_offset"
+        resp = await self.__request(
+            endpoint, HTTPMethod.POST, {"offset": offset}
+        )
+        self.__check(resp)
+
+    async def detect_appliance(
+        self, message: str
+    ) -> List[ApplianceModelAndParams]:
+        """Find the air conditioner best matching the provided infrared signal.
+
+        Args:
+            message: JSON serialized object describing infrared signals.
+              Includes "data", "freq" and "format" keys.
+        """
+        endpoint = "/1/detectappliance"
+        resp = await self.__request(
+            endpoint, HTTPMethod.POST, {"message": message}
+        )
+        json = self.__get_json(resp)
+        schema = get_schema(ApplianceModelAndParamsSchema, many=True)
+        return schema.load(json)
+
+    async def get_appliances(self, lazy: bool = False) -> List[Appliance]:
+        """Fetch the list of appliances.
+
+        Args:
+            lazy: Decode only the top-level fields of each appliance up
+              front, e.g. to list them by nickname. The nested fields are
+              decoded on first access, see remo.decoders.LazyAppliance.
+
+        Returns:
+            A list of Appliance objects.
+        """
+        endpoint = "/1/appliances"
+        resp = await self.__request(endpoint, HTTPMethod.GET)
+        json = self.__get_json(resp)
+        if self.fast_decode or lazy:
+            return load_appliances(json, lazy=lazy)
+        return get_schema(ApplianceSchema, many=True).load(json)
+
+    async def iter_appliances(
+        self, chunk_size: int = 65536, lazy: bool = False
+    ) -> AsyncIterator[Appliance]:
+        """Fetch the list of appliances, decoding them as they arrive.
+
+        Only one appliance is held in memory at a time, which keeps memory
+        use low for accounts with many appliances and signals.
+
+        Args:
+            chunk_size: Number of bytes read from the response at a time.
+            lazy: Decode the nested fields of each appliance on first
+              access, as with get_appliances.
+
+        Returns:
+            An async iterator of Appliance objects.
+        """
+        url = f"{self.base_url}/1/appliances"
+        if self.fast_decode or lazy:
+            load: Callable[[Any], Appliance] = functools.partial(
+                load_appliance, lazy=lazy
+            )
+        else:
+            load = get_schema(ApplianceSchema).load
+        decoder = JSONArrayDecoder()
+        try:
+            async with self.client.stream(
+                "GET", url, headers=self.__headers()
+            ) as resp:
+                update_rate_limit(self.rate_limit, resp.headers)
+                if not resp.is_success:
+                    await resp.aread()
+                    raise NatureRemoError(_error_message(resp))
+                async for chunk in resp.aiter_bytes(chunk_size):
+                    for json in decoder.feed(chunk):
+                        yield load(json)
+        except httpx.HTTPError as e:
+            raise NatureRemoError(e)
+        decoder.close()
+
+    async def create_appliance(
+        self,
+        device: str,
+        nickname: str,
+        image: str,
+        model: str = None,
+        model_type: str = None,
+    ) -> Appliance:
+        """Create a new appliance.
+
+        Args:
+            device: Device ID.
+            nickname: Appliance name.
+            image: Basename of the image file included in the app.
+            model: ApplianceModel ID if the appliance we're trying to create
+              is included in IRDB.
+            model_type: Type of model.
+        """
+        endpoint = "/1/appliances"
+        data = {"device": device, "nickname": nickname, "image": image}
+        if model:
+            data["model"] = model
+        if model_type:
+            data["model_type"] = model_type
+        resp = await self.__request(endpoint, HTTPMethod.POST, data)
+        json = self.__get_json(resp)
+        return get_schema(ApplianceSchema).load(json)
+
+    async def update_appliance_orders(self, appliances: str):
+        """Reorder appliances.
+
+        Args:
+            appliances: List of all appliances' IDs comma separated.
+        """
+        endpoint = "/1/appliance_orders"
+        resp = await self.__request(
+            endpoint, HTTPMethod.POST, {"appliances": appliances}
+        )
+        self.__check(resp)
+
+    async def delete_appliance(self, appliance: str):
+        """Delete appliance.
+
+        Args:
+            appliance: Appliance ID.
+        """
+        endpoint = f"/1/appliances/{appliance}/delete"
+        resp = await self.__request(endpoint, HTTPMethod.POST)
+        self.__check(resp)
+
+    async def update_appliance(
+        self, appliance: str, nickname: str, image: str
+    ) -> Appliance:
+        """Update appliance.
+
+        Args:
+            appliance: Appliance ID.
+            nickname: Appliance name.
+            image: Basename of the image file included in the app.
+        """
+        endpoint = f"/1/appliances/{appliance}"
+        resp = await self.__request(
+            endpoint, HTTPMethod.POST, {"nickname": nickname, "image": image}
+        )
+        json = self.__get_json(resp)
+        return get_schema(ApplianceSchema).load(json)
+
+    async def update_aircon_settings(
+        self,
+        appliance: str,
+        operation_mode: str = None,
+        temperature: str = None,
+        air_volume: str = None,
+        air_direction: str = None,
+        button: str = None,
+    ):
+        """Update air conditioner settings.
+
+        Args:
+            appliance: Appliance ID.
+            operation_mode: AC operation mode.
+            temperature: Temperature.
+            air_volume: AC air volume.
+            air_direction: AC air direction.
+            button: Button.
+        """
+        endpoint = f"/1/appliances/{appliance}/aircon_settings"
+        data = {}
+        if operation_mode:
+            data["operation_mode"] = operation_mode
+        if temperature:
+            data["temperature"] = temperature
+        if air_volume:
+            data["air_volume"] = air_volume
+        if air_direction:
+            data["air_direction"] = air_direction
+        if button:
+            data["button"] = button
+        resp = await self.__request(endpoint, HTTPMethod.POST, data)
+        self.__check(resp)
+
+    async def send_tv_infrared_signal(self, appliance: str, button: str):
+        """Send tv infrared signal.
+
+        Args:
+            appliance: Appliance ID.
+            button: Button name.
+        """
+        endpoint = f"/1/appliances/{appliance}/tv"
+        resp = await self.__request(
+            endpoint, HTTPMethod.POST, {"button": button}
+        )
+        self.__check(resp)
+
+    async def send_light_infrared_signal(self, appliance: str, button: str):
+        """Send light infrared signal.
+
+        Args:
+            appliance: Appliance ID.
+            button: Button name.
+        """
+        endpoint = f"/1/appliances/{appliance}/light"
+        resp = await self.__request(
+            endpoint, HTTPMethod.POST, {"button": button}
+        )
+        self.__check(resp)
+
+    async def get_signals(self, appliance: str) -> List[Signal]:
+        """Fetch signals registered under this appliance.
+
+        Args:
+            appliance: Appliance ID.
+        """
+        endpoint = f"/1/appliances/{appliance}/signals"
+        resp = await self.__request(endpoint, HTTPMethod.GET)
+        json = self.__get_json(resp)
+        return get_schema(SignalSchema, many=True).load(json)
+
+    async def create_signal(
+        self, appliance: str, name: str, message: str, image: str
+    ) -> Signal:
+        """Create a signal under this appliance.
+
+        Args:
+            appliance: Appliance ID.
+            name: Signal name.
+            message: JSON serialized object describing infrared signals.
+              Includes "data", "freq" and "format" keys.
+            image: Basename of the image file included in the app.
+        """
+        endpoint = f"/1/appliances/{appliance}/signals"
+        resp = await self.__request(
+            endpoint,
+            HTTPMethod.POST,
+            {"name": name, "message": message, "image": image},
+        )
+        json = self.__get_json(resp)
+        return get_schema(SignalSchema).load(json)
+
+    async def update_signal_orders(self, appliance: str, signals: str):
+        """Reorder signals under this appliance.
+
+        Args:
+            appliance: Appliance ID.
+            signals: List of all signals' IDs comma separated.
+        """
+        endpoint = f"/1/appliances/{appliance}/signal_orders"
+        resp = await self.__request(
+            endpoint, HTTPMethod.POST, {"signals": signals}
+        )
+        self.__check(resp)
+
+    async def update_signal(self, signal: str, name: str, image: str):
+        """Update infrared signal.
+
+        Args:
+            signal: Signal ID.
+            name: Signal name.
+            image: Basename of the image file included in the app.
+        """
+        endpoint = f"/1/signals/{signal}"
+        resp = await self.__request(
+            endpoint, HTTPMethod.POST, {"name": name, "image": image}
+        )
+        self.__check(resp)
+
+    async def delete_signal(self, signal: str):
+        """Delete infrared signal.
+
+        Args:
+            signal: Signal ID.
+        """
+        endpoint = f"/1/signals/{signal}/delete"
+        resp = await self.__request(endpoint, HTTPMethod.POST)
+        self.__check(resp)
+
+    async def send_signal(self, signal: str):
+        """Send infrared signal.
+
+        Args:
+            signal: Signal ID.
+        """
+        endpoint = f"/1/signals/{signal}/send"
+        resp = await self.__request(endpoint, HTTPMethod.POST)
+        self.__check(resp)
+
+
+@dataclass
+class LocalResult:
+    """Outcome of a Local API call made against one Remo."""
+
+    addr: str
+    value: Any = None
+    error: Optional[NatureRemoError] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class AsyncNatureRemoLocalAPI(_AsyncClientMixin):
+    """Asyncio client for the Nature Remo Local API of several Remos.
+
+    Calls made against the same Remo are limited to
+    max_concurrency_per_device at a time, while calls to different Remos run
+    concurrently.
+
+    Args:
+        addrs: IP addresses or host names of the Remos.
+        client: HTTP client to send requests through. If omitted, the client
+          creates its own pooled HTTP client, which is closed by aclose().
+        max_concurrency_per_device: Maximum number of in-flight requests per
+          Remo.
+    """
+
+    def __init__(
+        self,
+        addrs: Iterable[str],
+        client: Optional[httpx.AsyncClient] = None,
+        max_concurrency_per_device: int = DEFAULT_MAX_CONCURRENCY_PER_DEVICE,
+    ):
+        self.addrs = list(dict.fromkeys(addrs))
+        self.max_concurrency_per_device = max_concurrency_per_device
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._init_client(client)
+
+    def __semaphore(self, addr: str) -> asyncio.Semaphore:
+        if addr not in self._semaphores:
+            self._semaphores[addr] = asyncio.Semaphore(
+                self.max_concurrency_per_device
+            )
+        return self._semaphores[addr]
+
+    async def __request(
+        self, addr: str, endpoint: str, method: HTTPMethod, data: str = None
+    ) -> httpx.Response:
+        headers = {
+            "Accept": "application/json",
+            "X-Requested-With": f"nature-remo/{__version__} ({__url__})",
+        }
+        url = f"http://{addr}{endpoint}"
+
+        try:
+            async with self.__semaphore(addr):
+                if method == HTTPMethod.GET:
+                    return await self.client.get(url, headers=headers)
+                else:
+                    return await self.client.post(
+                        url, headers=headers, content=data
+                    )
+        except httpx.HTTPError as e:
+            raise NatureRemoError(e)
+
+    def __check(self, resp: httpx.Response):
+        if not resp.is_success:
+            raise NatureRemoError(f"{resp.status_code} {resp.reason_phrase}")
+
+    async def get_ir_signal(self, addr: str) -> IRSignal:
+        """Fetch the newest IR signal received by a Remo.
+
+        Args:
+            addr: IP address or host name of the Remo.
+
+        Returns:
+            An IRSignal object.
+        """
+        endpoint = "/messages"
+        resp = await self.__request(addr, endpoint, HTTPMethod.GET)
+        self.__check(resp)
+        try:
+            return load_ir_signal(resp.json())
+        except (ValueError, TypeError, ValidationError) as e:
+            # A malformed body is the failure of this Remo alone.
+            raise NatureRemoError(f"Invalid IR signal from {addr}: {e}")
+
+    async def send_ir_signal(self, addr: str, message: Union[str, IRSignal]):
+        """Emit IR signals provided by request body from a Remo.
+
+        Args:
+            addr: IP address or host name of the Remo.
+            message: JSON serialized object describing infrared signals.
+              Includes "data", "freq" and "format" keys. An IRSignal is
+              serialized with its as_message().
+        """
+        if isinstance(message, IRSignal):
+            message = message.as_message()
+        endpoint = "/messages"
+        resp = await self.__request(addr, endpoint, HTTPMethod.POST, message)
+        self.__check(resp)
+
+    async def __gather(self, calls: Dict[str, Any]) -> Dict[str, LocalResult]:
+        async def run(addr, call):
+            try:
+                return LocalResult(addr, value=await call)
+            except NatureRemoError as e:
+                return LocalResult(addr, error=e)
+
+        results = await asyncio.gather(
+            *(run(addr, call) for addr, call in calls.items())
+        )
+        return {result.addr: result for result in results}
+
+    async def get_ir_signals(
+        self, addrs: Iterable[str] = None
+    ) -> Dict[str, LocalResult]:
+        """Fetch the newest received IR signal from every Remo concurrently.
+
+        Args:
+            addrs: Remos to query. Defaults to all of the client's Remos.
+
+        Returns:
+            A dict mapping each address to a LocalResult whose value is an
+            IRSignal object.
+        """
+        addrs = self.addrs if addrs is None else addrs
+        return await self.__gather(
+            {addr: self.get_ir_signal(addr) for addr in addrs}
+        )
+
+    async def send_ir_signals(
+        self,
+        message: Union[str, IRSignal, Mapping[str, Union[str, IRSignal]]],
+        addrs: Iterable[str] = None,
+    ) -> Dict[str, LocalResult]:
+        """Emit IR signals from every Remo concurrently.
+
+        A failure on one Remo does not prevent the others from emitting.
+
+        Args:
+            message: JSON serialized object describing infrared signals or
+              an IRSignal, or a dict mapping addresses to either.
+            addrs: Remos to emit from. Defaults to the keys of message if it
+              is a dict, otherwise to all of the client's Remos.
+
+        Returns:
+            A dict mapping each address to a LocalResult.
+        """
+        if isinstance(message, Mapping):
+            messages = message
+            addrs = messages.keys() if addrs is None else addrs
+        else:
+            if isinstance(message, IRSignal):
+                # Serialize once for all Remos.
+                message = message.as_message()
+            addrs = self.addrs if addrs is None else addrs
+            messages = dict.fromkeys(addrs, message)
+        return await self.__gather(
+            {addr: self.send_ir_signal(addr, messages[addr]) for addr in addrs}
+        )
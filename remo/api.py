@@ -1,14 +1,28 @@
-from dataclasses import dataclass
-from datetime import datetime
+import functools
 from enum import auto
 from enum import Enum
+from typing import Any
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Union
 
 import requests
 
 from .__version__ import __url__
 from .__version__ import __version__
+from .cache import APPLIANCES
+from .cache import DetectionCache
+from .cache import DEVICES
+from .cache import ResponseCache
+from .cache import SIGNALS
+from .cache import USER
+from .decoders import load_appliance
+from .decoders import load_appliances
+from .decoders import load_devices
+from .decoders import load_ir_signal
 from .errors import build_error_message
 from .errors import NatureRemoError
 from .models import Appliance
@@ -17,12 +31,20 @@ from .models import ApplianceModelAndParamsSchema
 from .models import ApplianceSchema
 from .models import Device
 from .models import DeviceSchema
+from .models import get_schema
 from .models import IRSignal
-from .models import IRSignalSchema
 from .models import Signal
 from .models import SignalSchema
 from .models import User
 from .models import UserSchema
+from .ratelimit import RateLimit
+from .ratelimit import RateLimitScheduler
+from .ratelimit import update_rate_limit
+from .retry import RetryPolicy
+from .singleflight import SingleFlight
+from .stream import iter_json_array
+from .transport import HTTPTransport
+from .transport import Transport
 
 BASE_URL = "https://api.nature.global"
 
@@ -41,26 +63,116 @@ def enable_debug_mode():
     logging.getLogger().setLevel(logging.DEBUG)
 
 
-@dataclass
-class RateLimit:
-    checked_at: Optional[datetime] = None
-    limit: Optional[int] = None
-    remaining: Optional[int] = None
-    reset: Optional[datetime] = None
+class _TransportMixin:
+    """Lifecycle of the transport owned (or borrowed) by a client."""
 
+    transport: Transport
+    _owns_transport: bool
 
-class NatureRemoAPI:
-    """Client for the Nature Remo API."""
+    def _init_transport(
+        self,
+        session: Optional[requests.Session],
+        transport: Optional[Transport],
+    ):
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = HTTPTransport(session)
+        self.transport = transport
+
+    @property
+    def session(self) -> Optional[requests.Session]:
+        """Session requests are sent through, if sent with requests."""
+        return getattr(self.transport, "session", None)
 
-    def __init__(self, access_token: str, debug: bool = False):
+    def close(self):
+        """Close the underlying session if it was created by this client.
+
+        A session or transport passed in by the caller is left open, since it
+        may be shared with other clients.
+        """
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class NatureRemoAPI(_TransportMixin):
+    """Client for the Nature Remo API.
+
+    Args:
+        access_token: Access token issued at https://home.nature.global.
+        debug: Print the underlying HTTP debug information.
+        session: Session to send requests through. If omitted, the client
+          creates its own pooled session, which is closed by close().
+        transport: Transport to send requests through instead of a session.
+        scheduler: Paces requests according to the rate limit reported by
+          the server. Requests are sent as soon as possible if omitted.
+        retry: Policy for retrying failed requests. Requests are not retried
+          if omitted.
+        cache: Cache for the responses of get_user, get_devices,
+          get_appliances and get_signals. Every call hits the network if
+          omitted.
+        single_flight: Shares one request among concurrent identical calls
+          of get_user, get_devices, get_appliances and get_signals made from
+          other threads. Each call sends its own request if omitted.
+        fast_decode: Decode devices and appliances with the fast decoders in
+          remo.decoders, which give the same result as the schemas.
+        detection_cache: Cache for the results of detect_appliance, which
+          also answers for other captures of a cached signal. Every call
+          hits the network if omitted.
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        debug: bool = False,
+        session: Optional[requests.Session] = None,
+        transport: Optional[Transport] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+        retry: Optional[RetryPolicy] = None,
+        cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        fast_decode: bool = True,
+        detection_cache: Optional[DetectionCache] = None,
+    ):
         if debug:
             enable_debug_mode()
         self.access_token = access_token
         self.base_url = BASE_URL
         self.rate_limit = RateLimit()
+        self.scheduler = scheduler
+        self.retry = retry if retry else RetryPolicy(max_retries=0)
+        self.cache = cache
+        self.single_flight = single_flight
+        self.fast_decode = fast_decode
+        self.detection_cache = detection_cache
+        self._init_transport(session, transport)
 
     def __request(
-        self, endpoint: str, method: HTTPMethod, data: dict = None
+        self,
+        endpoint: str,
+        method: HTTPMethod,
+        data: dict = None,
+        invalidates: Iterable[str] = (),
+        stream: bool = False,
+    ) -> requests.models.Response:
+        try:
+            return self.__send(endpoint, method, data, stream)
+        finally:
+            # Even a failed write may have been applied.
+            if self.cache and invalidates:
+                self.cache.invalidate(*invalidates)
+
+    def __send(
+        self,
+        endpoint: str,
+        method: HTTPMethod,
+        data: dict = None,
+        stream: bool = False,
     ) -> requests.models.Response:
         headers = {
             "Accept": "application/json",
@@ -69,35 +181,66 @@ class NatureRemoAPI:
         }
         url = f"{self.base_url}{endpoint}"
 
-        try:
-            if method == HTTPMethod.GET:
-                return requests.get(url, headers=headers)
-            else:
-                return requests.post(url, headers=headers, data=data)
-        except requests.RequestException as e:
-            raise NatureRemoError(e)
+        attempt = 0
+        while True:
+            resp = None
+            if self.scheduler:
+                self.scheduler.acquire()
+            try:
+                resp = self.transport.send(
+                    method.name, url, headers, data, stream
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except requests.RequestException as e:
+                raise NatureRemoError(e)
+            if resp is not None:
+                self.__set_rate_limit(resp)
+                if resp.ok:
+                    return resp
+
+            delay = self.retry.get_delay(
+                attempt, method == HTTPMethod.GET, resp
+            )
+            if delay is None:
+                if resp is None:
+                    raise NatureRemoError(error)
+                return resp
+            if resp is not None:
+                resp.close()
+            self.retry.sleep(delay)
+            attempt += 1
 
     def __get_json(self, resp: requests.models.Response):
-        self.__set_rate_limit(resp)
         if resp.ok:
             return resp.json()
         raise NatureRemoError(build_error_message(resp))
 
-    def __set_rate_limit(self, resp: requests.models.Response):
-        if "Date" in resp.headers:
-            self.rate_limit.checked_at = datetime.strptime(
-                resp.headers["Date"], "%a, %d %b %Y %H:%M:%S GMT"
-            )
-        if "X-Rate-Limit-Limit" in resp.headers:
-            self.rate_limit.limit = int(resp.headers["X-Rate-Limit-Limit"])
-        if "X-Rate-Limit-Remaining" in resp.headers:
-            self.rate_limit.remaining = int(
-                resp.headers["X-Rate-Limit-Remaining"]
-            )
-        if "X-Rate-Limit-Reset" in resp.headers:
-            self.rate_limit.reset = datetime.utcfromtimestamp(
-                int(resp.headers["X-Rate-Limit-Reset"])
+    def __get(self, endpoint: str, kind: str):
+        if self.cache:
+            json = self.cache.get(kind, (self.access_token, endpoint))
+            if json is not None:
+                return json
+        if self.single_flight:
+            # The decoded JSON is shared, but each caller loads its own models.
+            return self.single_flight.do(
+                (self.access_token, endpoint),
+                lambda: self.__fetch(endpoint, kind),
             )
+        return self.__fetch(endpoint, kind)
+
+    def __fetch(self, endpoint: str, kind: str):
+        if self.cache is None:
+            return self.__get_json(self.__request(endpoint, HTTPMethod.GET))
+        generation = self.cache.generation(kind)
+        json = self.__get_json(self.__request(endpoint, HTTPMethod.GET))
+        self.cache.set(kind, (self.access_token, endpoint), json, generation)
+        return json
+
+    def __set_rate_limit(self, resp: requests.models.Response):
+        update_rate_limit(self.rate_limit, resp.headers)
+        if self.scheduler:
+            self.scheduler.update(self.rate_limit)
 
     def get_user(self) -> User:
         """Fetch the authenticated user's information.
@@ -106,9 +249,8 @@ class NatureRemoAPI:
             A User object.
         """
         endpoint = "/1/users/me"
-        resp = self.__request(endpoint, HTTPMethod.GET)
-        json = self.__get_json(resp)
-        return UserSchema().load(json)
+        json = self.__get(endpoint, USER)
+        return get_schema(UserSchema).load(json)
 
     def update_user(self, nickname: str) -> User:
         """Update authenticated user's information.
@@ -121,10 +263,10 @@ class NatureRemoAPI:
         """
         endpoint = "/1/users/me"
         resp = self.__request(
-            endpoint, HTTPMethod.POST, {"nickname": nickname}
+            endpoint, HTTPMethod.POST, {"nickname": nickname}, (USER,)
         )
         json = self.__get_json(resp)
-        return UserSchema().load(json)
+        return get_schema(UserSchema).load(json)
 
     def get_devices(self) -> List[Device]:
         """Fetch the list of Remo devices the user has access to.
@@ -133,9 +275,10 @@ class NatureRemoAPI:
             A List of Device objects.
         """
         endpoint = "/1/devices"
-        resp = self.__request(endpoint, HTTPMethod.GET)
-        json = self.__get_json(resp)
-        return DeviceSchema(many=True).load(json)
+        json = self.__get(endpoint, DEVICES)
+        if self.fast_decode:
+            return load_devices(json)
+        return get_schema(DeviceSchema, many=True).load(json)
 
     def update_device(self, device: str, name: str):
         """Update Remo.
@@ -145,7 +288,9 @@ class NatureRemoAPI:
             name: Device name.
         """
         endpoint = f"/1/devices/{device}"
-        resp = self.__request(endpoint, HTTPMethod.POST, {"name": name})
+        resp = self.__request(
+            endpoint, HTTPMethod.POST, {"name": name}, (DEVICES, APPLIANCES)
+        )
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
 
@@ -156,7 +301,9 @@ class NatureRemoAPI:
             device: Device ID.
         """
         endpoint = f"/1/devices/{device}/delete"
-        resp = self.__request(endpoint, HTTPMethod.POST)
+        resp = self.__request(
+            endpoint, HTTPMethod.POST, invalidates=(DEVICES, APPLIANCES)
+        )
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
 
@@ -168,7 +315,12 @@ class NatureRemoAPI:
             offset: Temperature offset value added to the measured temperature.
         """
         endpoint = f"/1/devices/{device}/temperature_offset"
-        resp = self.__request(endpoint, HTTPMethod.POST, {"offset": offset})
+        resp = self.__request(
+            endpoint,
+            HTTPMethod.POST,
+            {"offset": offset},
+            (DEVICES, APPLIANCES),
+        )
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
 
@@ -180,32 +332,92 @@ class NatureRemoAPI:
             offset: Humidity offset value added to the measured humidity.
         """
         endpoint = f"/1/devices/{device}/humidity_offset"
-        resp = self.__request(endpoint, HTTPMethod.POST, {"offset": offset})
+        resp = self.__request(
+            endpoint,
+            HTTPMethod.POST,
+            {"offset": offset},
+            (DEVICES, APPLIANCES),
+        )
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
 
-    def detect_appliance(self, message: str) -> List[ApplianceModelAndParams]:
+    def detect_appliance(
+        self, message: Union[str, IRSignal]
+    ) -> List[ApplianceModelAndParams]:
         """Find the air conditioner best matching the provided infrared signal.
 
         Args:
             message: JSON serialized object describing infrared signals.
-              Includes "data", "freq" and "format" keys.
+              Includes "data", "freq" and "format" keys. An IRSignal is
+              serialized with its as_message().
         """
-        endpoint = "/1/detectappliance"
-        resp = self.__request(endpoint, HTTPMethod.POST, {"message": message})
-        json = self.__get_json(resp)
-        return ApplianceModelAndParamsSchema(many=True).load(json)
-
-    def get_appliances(self) -> List[Appliance]:
+        cache = self.detection_cache
+        json = cache.get(message) if cache is not None else None
+        if json is None:
+            if isinstance(message, IRSignal):
+                data = {"message": message.as_message()}
+            else:
+                data = {"message": message}
+            endpoint = "/1/detectappliance"
+            resp = self.__request(endpoint, HTTPMethod.POST, data)
+            json = self.__get_json(resp)
+            if cache is not None:
+                cache.set(message, json)
+        schema = get_schema(ApplianceModelAndParamsSchema, many=True)
+        return schema.load(json)
+
+    def get_appliances(self, lazy: bool = False) -> List[Appliance]:
         """Fetch the list of appliances.
 
+        Args:
+            lazy: Decode only the top-level fields of each appliance up
+              front, e.g. to list them by nickname. The nested fields are
+              decoded on first access, see remo.decoders.LazyAppliance.
+
         Returns:
             A list of Appliance objects.
         """
         endpoint = "/1/appliances"
-        resp = self.__request(endpoint, HTTPMethod.GET)
-        json = self.__get_json(resp)
-        return ApplianceSchema(many=True).load(json)
+        json = self.__get(endpoint, APPLIANCES)
+        if self.fast_decode or lazy:
+            return load_appliances(json, lazy=lazy)
+        return get_schema(ApplianceSchema, many=True).load(json)
+
+    def iter_appliances(
+        self, chunk_size: int = 65536, lazy: bool = False
+    ) -> Iterator[Appliance]:
+        """Fetch the list of appliances, decoding them as they arrive.
+
+        Only one appliance is held in memory at a time, which keeps memory
+        use low for accounts with many appliances and signals. The response
+        cache and single flight are bypassed.
+
+        Args:
+            chunk_size: Number of bytes read from the response at a time.
+            lazy: Decode the nested fields of each appliance on first
+              access, as with get_appliances.
+
+        Returns:
+            An iterator of Appliance objects.
+        """
+        endpoint = "/1/appliances"
+        resp = self.__request(endpoint, HTTPMethod.GET, stream=True)
+        if not resp.ok:
+            raise NatureRemoError(build_error_message(resp))
+        return self.__iter_appliances(resp, chunk_size, lazy)
+
+    def __iter_appliances(
+        self, resp: requests.models.Response, chunk_size: int, lazy: bool
+    ) -> Iterator[Appliance]:
+        if self.fast_decode or lazy:
+            load: Callable[[Any], Appliance] = functools.partial(
+                load_appliance, lazy=lazy
+            )
+        else:
+            load = get_schema(ApplianceSchema).load
+        with resp:
+            for json in iter_json_array(resp.iter_content(chunk_size)):
+                yield load(json)
 
     def create_appliance(
         self,
@@ -231,9 +443,9 @@ class NatureRemoAPI:
             data["model"] = model
         if model_type:
             data["model_type"] = model_type
-        resp = self.__request(endpoint, HTTPMethod.POST, data)
+        resp = self.__request(endpoint, HTTPMethod.POST, data, (APPLIANCES,))
         json = self.__get_json(resp)
-        return ApplianceSchema().load(json)
+        return get_schema(ApplianceSchema).load(json)
 
     def update_appliance_orders(self, appliances: str):
         """Reorder appliances.
@@ -243,7 +455,10 @@ class NatureRemoAPI:
         """
         endpoint = "/1/appliance_orders"
         resp = self.__request(
-            endpoint, HTTPMethod.POST, {"appliances": appliances}
+            endpoint,
+            HTTPMethod.POST,
+            {"appliances": appliances},
+            (APPLIANCES,),
         )
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
@@ -255,7 +470,9 @@ class NatureRemoAPI:
             appliance: Appliance ID.
         """
         endpoint = f"/1/appliances/{appliance}/delete"
-        resp = self.__request(endpoint, HTTPMethod.POST)
+        resp = self.__request(
+            endpoint, HTTPMethod.POST, invalidates=(APPLIANCES, SIGNALS)
+        )
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
 
@@ -271,10 +488,13 @@ class NatureRemoAPI:
         """
         endpoint = f"/1/appliances/{appliance}"
         resp = self.__request(
-            endpoint, HTTPMethod.POST, {"nickname": nickname, "image": image}
+            endpoint,
+            HTTPMethod.POST,
+            {"nickname": nickname, "image": image},
+            (APPLIANCES,),
         )
         json = self.__get_json(resp)
-        return ApplianceSchema().load(json)
+        return get_schema(ApplianceSchema).load(json)
 
     def update_aircon_settings(
         self,
@@ -307,7 +527,7 @@ class NatureRemoAPI:
             data["air_direction"] = air_direction
         if button:
             data["button"] = button
-        resp = self.__request(endpoint, HTTPMethod.POST, data)
+        resp = self.__request(endpoint, HTTPMethod.POST, data, (APPLIANCES,))
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
 
@@ -319,7 +539,9 @@ class NatureRemoAPI:
             button: Button name.
         """
         endpoint = f"/1/appliances/{appliance}/tv"
-        resp = self.__request(endpoint, HTTPMethod.POST, {"button": button})
+        resp = self.__request(
+            endpoint, HTTPMethod.POST, {"button": button}, (APPLIANCES,)
+        )
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
 
@@ -331,7 +553,9 @@ class NatureRemoAPI:
             button: Button name.
         """
         endpoint = f"/1/appliances/{appliance}/light"
-        resp = self.__request(endpoint, HTTPMethod.POST, {"button": button})
+        resp = self.__request(
+            endpoint, HTTPMethod.POST, {"button": button}, (APPLIANCES,)
+        )
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
 
@@ -342,9 +566,8 @@ class NatureRemoAPI:
             appliance: Appliance ID.
         """
         endpoint = f"/1/appliances/{appliance}/signals"
-        resp = self.__request(endpoint, HTTPMethod.GET)
-        json = self.__get_json(resp)
-        return SignalSchema(many=True).load(json)
+        json = self.__get(endpoint, SIGNALS)
+        return get_schema(SignalSchema, many=True).load(json)
 
     def create_signal(
         self, appliance: str, name: str, message: str, image: str
@@ -363,9 +586,10 @@ class NatureRemoAPI:
             endpoint,
             HTTPMethod.POST,
             {"name": name, "message": message, "image": image},
+            (SIGNALS, APPLIANCES),
         )
         json = self.__get_json(resp)
-        return SignalSchema().load(json)
+        return get_schema(SignalSchema).load(json)
 
     def update_signal_orders(self, appliance: str, signals: str):
         """Reorder signals under this appliance.
@@ -375,7 +599,12 @@ class NatureRemoAPI:
             signals: List of all signals' IDs comma separated.
         """
         endpoint = f"/1/appliances/{appliance}/signal_orders"
-        resp = self.__request(endpoint, HTTPMethod.POST, {"signals": signals})
+        resp = self.__request(
+            endpoint,
+            HTTPMethod.POST,
+            {"signals": signals},
+            (SIGNALS, APPLIANCES),
+        )
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
 
@@ -389,7 +618,10 @@ class NatureRemoAPI:
         """
         endpoint = f"/1/signals/{signal}"
         resp = self.__request(
-            endpoint, HTTPMethod.POST, {"name": name, "image": image}
+            endpoint,
+            HTTPMethod.POST,
+            {"name": name, "image": image},
+            (SIGNALS, APPLIANCES),
         )
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
@@ -401,7 +633,9 @@ class NatureRemoAPI:
             signal: Signal ID.
         """
         endpoint = f"/1/signals/{signal}/delete"
-        resp = self.__request(endpoint, HTTPMethod.POST)
+        resp = self.__request(
+            endpoint, HTTPMethod.POST, invalidates=(SIGNALS, APPLIANCES)
+        )
         if not resp.ok:
             raise NatureRemoError(build_error_message(resp))
 
@@ -417,13 +651,28 @@ class NatureRemoAPI:
             raise NatureRemoError(build_error_message(resp))
 
 
-class NatureRemoLocalAPI:
-    """Client for the Nature Remo Local API."""
+class NatureRemoLocalAPI(_TransportMixin):
+    """Client for the Nature Remo Local API.
 
-    def __init__(self, addr: str, debug: bool = False):
+    Args:
+        addr: IP address or host name of the Remo.
+        debug: Print the underlying HTTP debug information.
+        session: Session to send requests through. If omitted, the client
+          creates its own pooled session, which is closed by close().
+        transport: Transport to send requests through instead of a session.
+    """
+
+    def __init__(
+        self,
+        addr: str,
+        debug: bool = False,
+        session: Optional[requests.Session] = None,
+        transport: Optional[Transport] = None,
+    ):
         if debug:
             enable_debug_mode()
         self.addr = addr
+        self._init_transport(session, transport)
 
     def __request(
         self, endpoint: str, method: HTTPMethod, data: str = None
@@ -435,10 +684,7 @@ class NatureRemoLocalAPI:
         url = f"http://{self.addr}{endpoint}"
 
         try:
-            if method == HTTPMethod.GET:
-                return requests.get(url, headers=headers)
-            else:
-                return requests.post(url, headers=headers, data=data)
+            return self.transport.send(method.name, url, headers, data)
         except requests.RequestException as e:
             raise NatureRemoError(e)
 
@@ -456,15 +702,18 @@ class NatureRemoLocalAPI:
         endpoint = "/messages"
         resp = self.__request(endpoint, HTTPMethod.GET)
         json = self.__get_json(resp)
-        return IRSignalSchema().load(json)
+        return load_ir_signal(json)
 
-    def send_ir_signal(self, message: str):
+    def send_ir_signal(self, message: Union[str, IRSignal]):
         """Emit IR signals provided by request body.
 
         Args:
             message: JSON serialized object describing infrared signals.
-              Includes "data", "freq" and "format" keys.
+              Includes "data", "freq" and "format" keys. An IRSignal is
+              serialized with its as_message().
         """
+        if isinstance(message, IRSignal):
+            message = message.as_message()
         endpoint = "/messages"
         resp = self.__request(endpoint, HTTPMethod.POST, message)
         if not resp.ok:
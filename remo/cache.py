@@ -0,0 +1,282 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from marshmallow import ValidationError
+
+from .decoders import load_ir_signal
+from .ircodec import dumps
+from .ircodec import loads
+from .library import compare
+from .library import fingerprint
+from .library import QUANTUM
+from .library import TOLERANCE
+from .models import IRSignal
+
+USER = "user"
+DEVICES = "devices"
+APPLIANCES = "appliances"
+SIGNALS = "signals"
+
+DEFAULT_TTL = {USER: 300.0, DEVICES: 30.0, APPLIANCES: 60.0, SIGNALS: 60.0}
+DEFAULT_MAXSIZE = 256
+DEFAULT_DETECTION_MAXSIZE = 1024
+
+# The expiry time and the value of an entry of ResponseCache.
+_Entry = Tuple[float, Any]
+
+
+class ResponseCache:
+    """In-process cache of decoded JSON responses of read endpoints.
+
+    Entries belong to a kind ("user", "devices", "appliances" or "signals")
+    which sets their time to live, and the least recently used entry is
+    evicted once maxsize entries are stored. Writes invalidate whole kinds.
+
+    A response is only stored if no invalidation of its kind happened while
+    it was being fetched, so a read racing with a write never leaves a
+    pre-write response in the cache.
+
+    Args:
+        ttl: Seconds each kind of entry stays fresh, overriding DEFAULT_TTL.
+        maxsize: Maximum number of entries.
+        clock: Function returning a monotonic time in seconds.
+    """
+
+    def __init__(
+        self,
+        ttl: Mapping[str, float] = None,
+        maxsize: int = DEFAULT_MAXSIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.maxsize = maxsize
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Hashable], _Entry]" = (
+            OrderedDict()
+        )
+        self._generations: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def generation(self, kind: str) -> int:
+        """Return a counter that changes whenever kind is invalidated."""
+        with self._lock:
+            return self._generations.get(kind, 0)
+
+    def get(self, kind: str, key: Hashable) -> Optional[Any]:
+        """Return the fresh entry stored under key, or None."""
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if self.clock() >= expires_at:
+                del self._entries[(kind, key)]
+                return None
+            self._entries.move_to_end((kind, key))
+            return value
+
+    def set(self, kind: str, key: Hashable, value: Any, generation: int):
+        """Store value under key if kind is still at the given generation.
+
+        Args:
+            kind: Kind of the entry.
+            key: What the value was fetched with, the access token and the
+              endpoint for NatureRemoAPI, so that clients of different
+              accounts can share the cache.
+            value: Decoded JSON response.
+            generation: Value of generation(kind) before the fetch started.
+        """
+        with self._lock:
+            if self._generations.get(kind, 0) != generation:
+                return
+            self._entries[(kind, key)] = (self.clock() + self.ttl[kind], value)
+            self._entries.move_to_end((kind, key))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *kinds: str):
+        """Drop every entry of the given kinds."""
+        with self._lock:
+            for kind in kinds:
+                self._generations[kind] = self._generations.get(kind, 0) + 1
+            for key in [k for k in self._entries if k[0] in kinds]:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop every entry."""
+        self.invalidate(USER, DEVICES, APPLIANCES, SIGNALS)
+
+
+def _signal(message: Union[str, IRSignal]) -> Optional[IRSignal]:
+    if isinstance(message, IRSignal):
+        return message
+    try:
+        return load_ir_signal(json.loads(message))
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+class DetectionCache:
+    """Persistent cache of detect_appliance results, keyed by IR signal.
+
+    Two captures of the same button differ by some microseconds, so the
+    messages sent to detect_appliance never repeat. Entries are instead
+    looked up by the fingerprint of the signal, see remo.library, and only
+    returned if every timing of the stored signal is within tolerance of
+    the signal looked up. The least recently used entry is evicted once
+    maxsize entries are stored.
+
+    Entries are kept in an SQLite database, so that they outlive the
+    process and can be shared by the processes using the same file.
+
+    Args:
+        path: Database file, created if missing. ":memory:" keeps the
+          entries in memory.
+        maxsize: Maximum number of entries.
+        tolerance: Relative jitter of timings of the same signal.
+        quantum: Absolute jitter in us, e.g. from rounding.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        maxsize: int = DEFAULT_DETECTION_MAXSIZE,
+        tolerance: float = TOLERANCE,
+        quantum: int = QUANTUM,
+    ):
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.quantum = quantum
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.fspath(path), check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS detections ("
+                "id INTEGER PRIMARY KEY, fingerprint TEXT NOT NULL, "
+                "signal BLOB NOT NULL, value TEXT NOT NULL, "
+                "used INTEGER NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS detections_fingerprint "
+                "ON detections (fingerprint)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS detections_used "
+                "ON detections (used)"
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute(
+                "SELECT COUNT(*) FROM detections"
+            ).fetchone()
+            return count
+
+    def _fingerprint(self, signal: IRSignal) -> str:
+        return fingerprint(signal, self.tolerance, self.quantum)
+
+    def _tick(self) -> int:
+        # Entries are ordered by a counter rather than the time, so that a
+        # clock going back cannot reorder them.
+        (used,) = self._db.execute(
+            "SELECT COALESCE(MAX(used), 0) + 1 FROM detections"
+        ).fetchone()
+        return used
+
+    def _find(self, signal: IRSignal, key: str) -> Optional[Tuple[int, str]]:
+        rows = self._db.execute(
+            "SELECT id, signal, value FROM detections WHERE fingerprint = ?",
+            (key,),
+        )
+        for row_id, stored, value in rows.fetchall():
+            distance, _ = compare(
+                signal, loads(stored), self.tolerance, self.quantum
+            )
+            if distance == 0:
+                return row_id, value
+        return None
+
+    def get(self, message: Union[str, IRSignal]) -> Optional[Any]:
+        """Return the entry stored for a capture of a signal, or None.
+
+        Args:
+            message: Signal, or the JSON message of a signal as passed to
+              detect_appliance. Nothing is found for a message that is not
+              one.
+        """
+        signal = _signal(message)
+        if signal is None:
+            return None
+        key = self._fingerprint(signal)
+        with self._lock, self._db:
+            found = self._find(signal, key)
+            if found is None:
+                return None
+            row_id, value = found
+            self._db.execute(
+                "UPDATE detections SET used = ? WHERE id = ?",
+                (self._tick(), row_id),
+            )
+            return json.loads(value)
+
+    def set(self, message: Union[str, IRSignal], value: Any):
+        """Store value for a signal, replacing the entry of an earlier
+        capture of it.
+
+        Args:
+            message: Signal, or the JSON message of a signal, sent to
+              detect_appliance. Nothing is stored for a message that is not
+              one.
+            value: Decoded JSON response.
+        """
+        signal = _signal(message)
+        if signal is None:
+            return
+        key = self._fingerprint(signal)
+        with self._lock, self._db:
+            found = self._find(signal, key)
+            if found is not None:
+                self._db.execute(
+                    "DELETE FROM detections WHERE id = ?", (found[0],)
+                )
+            self._db.execute(
+                "INSERT INTO detections (fingerprint, signal, value, used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, dumps(signal), json.dumps(value), self._tick()),
+            )
+            self._db.execute(
+                "DELETE FROM detections WHERE id IN ("
+                "SELECT id FROM detections ORDER BY used DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM detections")
+
+    def close(self):
+        """Close the database."""
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
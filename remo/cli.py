@@ -1,11 +1,13 @@
 import os
 from functools import wraps
 from typing import Callable
+from typing import Optional
 
 import click
 
 from .api import NatureRemoAPI
 from .api import NatureRemoLocalAPI
+from .cache import DetectionCache
 from .errors import NatureRemoError
 
 
@@ -163,19 +165,31 @@ def appliance():
 @appliance.command("detect")
 @click.option("--token", default="")
 @click.option("--debug", default=False, is_flag=True)
+@click.option(
+    "--cache",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Database of earlier results to answer from.",
+)
 @click.argument("message")
 @handle_error
 @check_token
-def detect_appliance(token: str, debug: bool, message: str):
+def detect_appliance(
+    token: str, debug: bool, cache: Optional[str], message: str
+):
     """Find the air conditioner best matching the provided infrared signal.
 
     MESSAGE: JSON serialized object describing infrared signals. Includes
     "data", "freq" and "format" keys.
     """
-    api = NatureRemoAPI(token, debug)
-    joined = ", ".join(
-        a.as_json_string() for a in api.detect_appliance(message)
-    )
+    detection_cache = DetectionCache(cache) if cache else None
+    try:
+        api = NatureRemoAPI(token, debug, detection_cache=detection_cache)
+        results = api.detect_appliance(message)
+    finally:
+        if detection_cache is not None:
+            detection_cache.close()
+    joined = ", ".join(a.as_json_string() for a in results)
     output = f"[{joined}]"
     click.echo(output)
 
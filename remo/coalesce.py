@@ -0,0 +1,144 @@
+import threading
+from concurrent.futures import Future
+from concurrent.futures import wait
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from .api import NatureRemoAPI
+
+DEFAULT_WINDOW = 0.5
+
+
+class _Batch:
+    def __init__(self):
+        self.settings: Dict[str, str] = {}
+        self.futures: List[Future] = []
+        self.in_flight: List[Future] = []
+        self.timer: Optional[threading.Timer] = None
+        self.sending = False
+
+
+class AirConSettingsQueue:
+    """Merges bursts of air conditioner setting updates into one request.
+
+    Updates submitted for the same appliance within window seconds are sent
+    as a single update_aircon_settings call holding the last value given for
+    each setting. Only one request per appliance is in flight at a time, and
+    updates submitted meanwhile are merged and sent after it, so an
+    appliance always ends up in the most recently requested state.
+
+    Args:
+        api: Client whose update_aircon_settings sends the requests.
+        window: Seconds to wait for further updates before sending.
+    """
+
+    def __init__(self, api: NatureRemoAPI, window: float = DEFAULT_WINDOW):
+        self.api = api
+        self.window = window
+        self._lock = threading.Lock()
+        self._batches: Dict[str, _Batch] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def submit(
+        self,
+        appliance: str,
+        operation_mode: str = None,
+        temperature: str = None,
+        air_volume: str = None,
+        air_direction: str = None,
+        button: str = None,
+    ) -> Future:
+        """Queue an update of air conditioner settings.
+
+        Args:
+            appliance: Appliance ID.
+            operation_mode: AC operation mode.
+            temperature: Temperature.
+            air_volume: AC air volume.
+            air_direction: AC air direction.
+            button: Button.
+
+        Returns:
+            A Future resolved once the request including this update has been
+            sent. It holds the NatureRemoError raised if the request failed.
+        """
+        settings = {
+            "operation_mode": operation_mode,
+            "temperature": temperature,
+            "air_volume": air_volume,
+            "air_direction": air_direction,
+            "button": button,
+        }
+        future: Future = Future()
+        with self._lock:
+            batch = self._batches.setdefault(appliance, _Batch())
+            batch.settings.update(
+                (k, v) for k, v in settings.items() if v is not None
+            )
+            batch.futures.append(future)
+            if batch.timer is None and not batch.sending:
+                self.__schedule(appliance, batch)
+        return future
+
+    def __schedule(self, appliance: str, batch: _Batch):
+        batch.timer = threading.Timer(
+            self.window, self.__send, args=(appliance,)
+        )
+        batch.timer.daemon = True
+        batch.timer.start()
+
+    def __send(self, appliance: str):
+        with self._lock:
+            batch = self._batches.get(appliance)
+            if batch is None or batch.sending or not batch.futures:
+                return
+            if batch.timer is not None:
+                batch.timer.cancel()
+                batch.timer = None
+            settings, futures = batch.settings, batch.futures
+            batch.settings, batch.futures = {}, []
+            batch.in_flight = futures
+            batch.sending = True
+
+        try:
+            self.api.update_aircon_settings(appliance, **settings)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for future in futures:
+                future.set_result(None)
+        finally:
+            with self._lock:
+                batch.sending = False
+                batch.in_flight = []
+                if batch.futures:
+                    self.__schedule(appliance, batch)
+                else:
+                    del self._batches[appliance]
+
+    def flush(self):
+        """Send every queued update now, waiting until all are sent."""
+        while True:
+            with self._lock:
+                appliances = list(self._batches)
+                futures = [
+                    f
+                    for b in self._batches.values()
+                    for f in b.futures + b.in_flight
+                ]
+            if not futures:
+                return
+            for appliance in appliances:
+                self.__send(appliance)
+            wait(futures)
+
+    def close(self):
+        """Send every queued update and wait for the requests to finish."""
+        self.flush()
@@ -0,0 +1,427 @@
+"""Fast decoders for the models of the hottest responses.
+
+The functions here build Device and Appliance objects straight from
+decoded JSON, checking the types the schemas expect instead of running
+marshmallow's field-by-field machinery. Whenever a payload is anything
+but well-formed (a missing key, a null where none is allowed, a value of
+an unexpected type, ...) decoding is handed over to the schema, so the
+result, and any error raised, is the same as with the schema alone.
+
+load_ir_signal() does the same for IR signals, whose timings are copied
+into an IRData array in one go.
+
+LazyAppliance goes one step further and decodes only the top-level fields
+of an appliance up front, leaving the nested ones as JSON until they are
+first read.
+"""
+import math
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from marshmallow import fields
+from marshmallow import ValidationError
+
+from .models import _ir_data
+from .models import AirCon
+from .models import AirConParams
+from .models import AirConRange
+from .models import AirConRangeMode
+from .models import Appliance
+from .models import ApplianceModel
+from .models import ApplianceSchema
+from .models import Button
+from .models import Device
+from .models import DeviceCore
+from .models import DeviceSchema
+from .models import get_schema
+from .models import IRSignal
+from .models import IRSignalSchema
+from .models import Light
+from .models import LightState
+from .models import SensorValue
+from .models import Signal
+from .models import TV
+from .models import TVState
+
+# The function fields.DateTime deserializes ISO 8601 strings with, so that
+# both paths parse timestamps the same way.
+_from_iso_datetime = fields.DateTime.DESERIALIZATION_FUNCS["iso"]
+
+
+class _Invalid(Exception):
+    """The payload has to go through the schema."""
+
+
+def _mapping(obj: Any) -> Dict[str, Any]:
+    if type(obj) is not dict:
+        raise _Invalid
+    return obj
+
+
+def _get(obj: Dict[str, Any], key: str) -> Any:
+    try:
+        return obj[key]
+    except KeyError:
+        raise _Invalid
+
+
+def _str(obj: Dict[str, Any], key: str) -> str:
+    value = _get(obj, key)
+    if type(value) is not str:
+        raise _Invalid
+    return value
+
+
+def _int(obj: Dict[str, Any], key: str) -> int:
+    value = _get(obj, key)
+    if type(value) is not int:
+        raise _Invalid
+    return value
+
+
+def _float(obj: Dict[str, Any], key: str) -> float:
+    value = _get(obj, key)
+    if type(value) is not float and type(value) is not int:
+        raise _Invalid
+    if not math.isfinite(value):
+        raise _Invalid
+    return float(value)
+
+
+@lru_cache(maxsize=1024)
+def _parse_datetime(value: str) -> datetime:
+    # Timestamps repeat a lot, e.g. the device embedded in every appliance.
+    try:
+        return _from_iso_datetime(value)
+    except (TypeError, AttributeError, ValueError):
+        raise _Invalid
+
+
+def _datetime(obj: Dict[str, Any], key: str) -> datetime:
+    return _parse_datetime(_str(obj, key))
+
+
+def _list(obj: Dict[str, Any], key: str) -> List[Any]:
+    value = _get(obj, key)
+    if type(value) is not list:
+        raise _Invalid
+    return value
+
+
+def _str_list(obj: Dict[str, Any], key: str) -> List[str]:
+    value = _list(obj, key)
+    for item in value:
+        if type(item) is not str:
+            raise _Invalid
+    return list(value)
+
+
+def _sensor_value(obj: Any) -> SensorValue:
+    obj = _mapping(obj)
+    return SensorValue(
+        val=_float(obj, "val"), created_at=_datetime(obj, "created_at")
+    )
+
+
+def _device_core(obj: Any) -> DeviceCore:
+    obj = _mapping(obj)
+    return DeviceCore(
+        id=_str(obj, "id"),
+        name=_str(obj, "name"),
+        temperature_offset=_int(obj, "temperature_offset"),
+        humidity_offset=_int(obj, "humidity_offset"),
+        created_at=_datetime(obj, "created_at"),
+        updated_at=_datetime(obj, "updated_at"),
+        firmware_version=_str(obj, "firmware_version"),
+        mac_address=_str(obj, "mac_address"),
+        serial_number=_str(obj, "serial_number"),
+    )
+
+
+def _device(obj: Any) -> Device:
+    obj = _mapping(obj)
+    newest_events = {}
+    for key, value in _mapping(_get(obj, "newest_events")).items():
+        if type(key) is not str:
+            raise _Invalid
+        newest_events[key] = _sensor_value(value)
+    return Device(
+        id=_str(obj, "id"),
+        name=_str(obj, "name"),
+        temperature_offset=_int(obj, "temperature_offset"),
+        humidity_offset=_int(obj, "humidity_offset"),
+        created_at=_datetime(obj, "created_at"),
+        updated_at=_datetime(obj, "updated_at"),
+        firmware_version=_str(obj, "firmware_version"),
+        mac_address=_str(obj, "mac_address"),
+        serial_number=_str(obj, "serial_number"),
+        newest_events=newest_events,
+    )
+
+
+def _appliance_model(obj: Any) -> ApplianceModel:
+    obj = _mapping(obj)
+    return ApplianceModel(
+        id=_str(obj, "id"),
+        manufacturer=_str(obj, "manufacturer"),
+        remote_name=_str(obj, "remote_name"),
+        name=_str(obj, "name"),
+        image=_str(obj, "image"),
+    )
+
+
+def _aircon_params(obj: Any) -> AirConParams:
+    obj = _mapping(obj)
+    return AirConParams(
+        temp=_str(obj, "temp"),
+        mode=_str(obj, "mode"),
+        vol=_str(obj, "vol"),
+        dir=_str(obj, "dir"),
+        button=_str(obj, "button"),
+    )
+
+
+def _aircon_range_mode(obj: Any) -> AirConRangeMode:
+    obj = _mapping(obj)
+    return AirConRangeMode(
+        temp=_str_list(obj, "temp"),
+        vol=_str_list(obj, "vol"),
+        dir=_str_list(obj, "dir"),
+    )
+
+
+def _aircon(obj: Any) -> AirCon:
+    obj = _mapping(obj)
+    range_ = _mapping(_get(obj, "range"))
+    modes = {}
+    for key, value in _mapping(_get(range_, "modes")).items():
+        if type(key) is not str:
+            raise _Invalid
+        modes[key] = _aircon_range_mode(value)
+    return AirCon(
+        range=AirConRange(
+            modes=modes, fixedButtons=_str_list(range_, "fixedButtons")
+        ),
+        tempUnit=_str(obj, "tempUnit"),
+    )
+
+
+def _signal(obj: Any) -> Signal:
+    obj = _mapping(obj)
+    return Signal(
+        id=_str(obj, "id"), name=_str(obj, "name"), image=_str(obj, "image")
+    )
+
+
+def _buttons(obj: Dict[str, Any]) -> List[Button]:
+    buttons = []
+    for button in _list(obj, "buttons"):
+        button = _mapping(button)
+        buttons.append(
+            Button(
+                name=_str(button, "name"),
+                image=_str(button, "image"),
+                label=_str(button, "label"),
+            )
+        )
+    return buttons
+
+
+def _tv(obj: Any) -> TV:
+    obj = _mapping(obj)
+    state = _mapping(_get(obj, "state"))
+    return TV(state=TVState(input=_str(state, "input")), buttons=_buttons(obj))
+
+
+def _light(obj: Any) -> Light:
+    obj = _mapping(obj)
+    state = _mapping(_get(obj, "state"))
+    return Light(
+        state=LightState(
+            brightness=_str(state, "brightness"),
+            power=_str(state, "power"),
+            last_button=_str(state, "last_button"),
+        ),
+        buttons=_buttons(obj),
+    )
+
+
+def _appliance(obj: Any) -> Appliance:
+    obj = _mapping(obj)
+    model = _get(obj, "model")
+    settings = _get(obj, "settings")
+    aircon = _get(obj, "aircon")
+    # tv and light may be missing, but not null.
+    tv: Optional[TV] = _tv(obj["tv"]) if "tv" in obj else None
+    light: Optional[Light] = _light(obj["light"]) if "light" in obj else None
+    return Appliance(
+        id=_str(obj, "id"),
+        device=_device_core(_get(obj, "device")),
+        model=None if model is None else _appliance_model(model),
+        nickname=_str(obj, "nickname"),
+        image=_str(obj, "image"),
+        type=_str(obj, "type"),
+        settings=None if settings is None else _aircon_params(settings),
+        aircon=None if aircon is None else _aircon(aircon),
+        signals=[_signal(s) for s in _list(obj, "signals")],
+        tv=tv,
+        light=light,
+    )
+
+
+def _signals(obj: Any) -> List[Signal]:
+    if type(obj) is not list:
+        raise _Invalid
+    return [_signal(s) for s in obj]
+
+
+def _nullable(decode: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    return lambda obj: None if obj is None else decode(obj)
+
+
+# Decoders of the nested fields of an appliance.
+_NESTED = {
+    "device": _device_core,
+    "model": _nullable(_appliance_model),
+    "settings": _nullable(_aircon_params),
+    "aircon": _nullable(_aircon),
+    "signals": _signals,
+    "tv": _tv,
+    "light": _light,
+}
+
+
+def _nested_property(name: str) -> property:
+    slot = Appliance.__dict__[name]
+    decode = _NESTED[name]
+
+    def get(self):
+        try:
+            return slot.__get__(self, Appliance)
+        except AttributeError:
+            pass
+        raw = self._raw
+        if name not in raw:
+            # Only tv and light may be missing.
+            value = None
+        else:
+            try:
+                value = decode(raw[name])
+            except _Invalid:
+                field = get_schema(ApplianceSchema).fields[name]
+                try:
+                    value = field.deserialize(raw[name])
+                except ValidationError as e:
+                    raise ValidationError({name: e.messages})
+        slot.__set__(self, value)
+        return value
+
+    def set(self, value):
+        slot.__set__(self, value)
+
+    return property(get, set, doc=f"{name}, decoded on first access.")
+
+
+class LazyAppliance(Appliance):
+    """Appliance decoding its nested fields on first access.
+
+    Only id, nickname, image and type are decoded up front. device, model,
+    settings, aircon, signals, tv and light are kept as the JSON they came
+    in until they are first read, then decoded like load_appliance() would
+    and memoized, so listing appliances by name does not pay for their
+    signals and buttons.
+
+    As the nested fields are only validated when read, a malformed one
+    raises marshmallow.ValidationError at that point rather than when the
+    appliance is loaded.
+    """
+
+    __slots__ = ("_raw",)
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.id = raw["id"]
+        self.nickname = raw["nickname"]
+        self.image = raw["image"]
+        self.type = raw["type"]
+        self._raw = raw
+
+
+for _name in _NESTED:
+    setattr(LazyAppliance, _name, _nested_property(_name))
+del _name
+
+
+def _lazy_appliance(obj: Any) -> LazyAppliance:
+    obj = _mapping(obj)
+    for key in ("id", "nickname", "image", "type"):
+        _str(obj, key)
+    for key in ("device", "model", "settings", "aircon", "signals"):
+        _get(obj, key)
+    return LazyAppliance(obj)
+
+
+def load_devices(json: Any) -> List[Device]:
+    """Decode the response of GET /1/devices.
+
+    Equivalent to DeviceSchema(many=True).load(json).
+    """
+    try:
+        if type(json) is not list:
+            raise _Invalid
+        return [_device(obj) for obj in json]
+    except _Invalid:
+        return get_schema(DeviceSchema, many=True).load(json)
+
+
+def load_appliance(json: Any, lazy: bool = False) -> Appliance:
+    """Decode one appliance. Equivalent to ApplianceSchema().load(json).
+
+    If lazy is True, a LazyAppliance is returned instead.
+    """
+    try:
+        if lazy:
+            return _lazy_appliance(json)
+        return _appliance(json)
+    except _Invalid:
+        return get_schema(ApplianceSchema).load(json)
+
+
+def load_appliances(json: Any, lazy: bool = False) -> List[Appliance]:
+    """Decode the response of GET /1/appliances.
+
+    Equivalent to ApplianceSchema(many=True).load(json). If lazy is True,
+    LazyAppliance objects are returned instead.
+    """
+    decode = _lazy_appliance if lazy else _appliance
+    try:
+        if type(json) is not list:
+            raise _Invalid
+        return [decode(obj) for obj in json]
+    except _Invalid:
+        return get_schema(ApplianceSchema, many=True).load(json)
+
+
+def load_ir_signal(json: Any) -> IRSignal:
+    """Decode the response of GET /messages.
+
+    Equivalent to IRSignalSchema().load(json).
+    """
+    try:
+        obj = _mapping(json)
+        # IRSignalSchema rejects unknown keys, so leave any to it.
+        if len(obj) != 3:
+            raise _Invalid
+        try:
+            timings = _ir_data(_list(obj, "data"))
+        except (TypeError, OverflowError):
+            raise _Invalid
+        return IRSignal(
+            freq=_int(obj, "freq"), data=timings, format=_str(obj, "format")
+        )
+    except _Invalid:
+        return get_schema(IRSignalSchema).load(json)
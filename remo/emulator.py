@@ -0,0 +1,251 @@
+"""Local stand-in for the Local API of Remo devices.
+
+RemoEmulator serves GET and POST /messages on a local port the way a Remo
+does. Emitting a signal takes as long as its IR burst, one signal at a
+time per device, and connections can be dropped at random, so concurrent
+sends and capture pipelines can be benchmarked without hardware.
+
+To run ten emulators on ports 9000 to 9009 from the command line:
+
+    python -m remo.emulator --count 10 --port 9000
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import Optional
+
+import click
+
+from .server import LocalServer
+
+
+def _nec_frame(address: int, command: int) -> List[int]:
+    # Leader, address, inverted address, command, inverted command (LSB
+    # first) and a stop bit, in microseconds.
+    data = [9000, 4500]
+    for byte in (address, address ^ 0xFF, command, command ^ 0xFF):
+        for bit in range(8):
+            data += [560, 1690 if byte >> bit & 1 else 560]
+    data.append(560)
+    return data
+
+
+DEFAULT_SIGNAL = {"format": "us", "freq": 38, "data": _nec_frame(0x00, 0x12)}
+
+
+def burst_duration(signal: Mapping[str, Any]) -> float:
+    """Return the seconds a Remo takes to emit an IR signal."""
+    return sum(signal["data"]) / 1e6
+
+
+class RemoEmulator(LocalServer):
+    """Serves the Local API of one Remo on a local port.
+
+    GET /messages returns the newest received signal, which receive()
+    replaces. POST /messages emits the signal in the request body, taking
+    as long as its IR burst, and only one signal is emitted at a time, so
+    concurrent requests queue up like on a real Remo. As on a Remo, POST
+    requests without an X-Requested-With header are rejected.
+
+    Point a client at the emulator with its addr:
+
+        with RemoEmulator() as remo:
+            local_api = NatureRemoLocalAPI(remo.addr)
+
+    Args:
+        signal: Signal returned by GET /messages until receive() is called.
+        host: Address to listen on.
+        port: Port to listen on. 0 picks a free port.
+        latency: Seconds each request takes before any emission.
+        jitter: Maximum number of seconds added at random to latency.
+        drop_rate: Probability of closing the connection without a response.
+        time_scale: Factor applied to the duration of IR bursts. 0 emits
+          signals instantly.
+        seed: Seed of the generator drawing latencies and dropped requests.
+        sleep: Function waiting for the given number of seconds, called for
+          the latency and for emitting each signal.
+    """
+
+    def __init__(
+        self,
+        signal: Optional[Mapping[str, Any]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        drop_rate: float = 0.0,
+        time_scale: float = 1.0,
+        seed: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.signal = dict(signal if signal else DEFAULT_SIGNAL)
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.time_scale = time_scale
+        self.sleep = sleep
+        self.requests = 0
+        self.sent: List[Dict[str, Any]] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._emitting = threading.Lock()
+        super().__init__(host, port)
+
+    @property
+    def addr(self) -> str:
+        """Address to pass to NatureRemoLocalAPI."""
+        host, port = self._server.socket.getsockname()[:2]
+        return f"{host}:{port}"
+
+    def receive(self, signal: Mapping[str, Any]):
+        """Record signal as the newest one received by the Remo."""
+        with self._lock:
+            self.signal = dict(signal)
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str):
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length)
+
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            dropped = self._rng.random() < self.drop_rate
+        if delay > 0:
+            self.sleep(delay)
+        if dropped:
+            handler.close_connection = True
+            return
+        if handler.path.split("?")[0] != "/messages":
+            self._respond(handler, 404, b"", {})
+        elif method == "GET":
+            with self._lock:
+                message = json.dumps(self.signal).encode()
+            self._respond(handler, 200, message, {})
+        elif "X-Requested-With" not in handler.headers:
+            self._respond(handler, 400, b"", {})
+        else:
+            try:
+                signal = json.loads(body)
+                duration = burst_duration(signal) * self.time_scale
+            except (ValueError, KeyError, TypeError):
+                self._respond(handler, 400, b"", {})
+                return
+            with self._emitting:
+                if duration > 0:
+                    self.sleep(duration)
+                self.sent.append(signal)
+            self._respond(handler, 200, b"", {})
+
+
+class RemoEmulatorFleet:
+    """Several RemoEmulators, each serving on its own port.
+
+    Args:
+        count: Number of emulators.
+        host: Address to listen on.
+        port: Port of the first emulator, the others listening on the
+          following ports. 0 picks a free port for each emulator.
+        seed: Seed of the first emulator, the others using the following
+          seeds.
+        **kwargs: Arguments passed to every RemoEmulator.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+        **kwargs,
+    ):
+        self.emulators = [
+            RemoEmulator(
+                host=host,
+                port=port + i if port else 0,
+                seed=None if seed is None else seed + i,
+                **kwargs,
+            )
+            for i in range(count)
+        ]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def __getitem__(self, index: int) -> RemoEmulator:
+        return self.emulators[index]
+
+    def __iter__(self) -> Iterator[RemoEmulator]:
+        return iter(self.emulators)
+
+    def __len__(self) -> int:
+        return len(self.emulators)
+
+    @property
+    def addrs(self) -> List[str]:
+        """Addresses of the emulators."""
+        return [emulator.addr for emulator in self.emulators]
+
+    def start(self):
+        """Serve requests of every emulator from background threads."""
+        for emulator in self.emulators:
+            emulator.start()
+
+    def stop(self):
+        """Stop every emulator and release the ports."""
+        for emulator in self.emulators:
+            emulator.stop()
+
+
+@click.command()
+@click.option("--count", default=1, help="Number of emulated Remos.")
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", default=8081, help="Port of the first Remo.")
+@click.option("--latency", default=0.0, help="Seconds added per request.")
+@click.option("--jitter", default=0.0, help="Maximum random extra latency.")
+@click.option("--drop-rate", default=0.0, help="Share of dropped requests.")
+@click.option("--time-scale", default=1.0, help="Factor on IR burst time.")
+@click.option("--seed", default=None, type=int)
+def main(
+    count: int,
+    host: str,
+    port: int,
+    latency: float,
+    jitter: float,
+    drop_rate: float,
+    time_scale: float,
+    seed: Optional[int],
+):
+    """Serve stand-in Remos for the Local API."""
+    fleet = RemoEmulatorFleet(
+        count,
+        host=host,
+        port=port,
+        latency=latency,
+        jitter=jitter,
+        drop_rate=drop_rate,
+        time_scale=time_scale,
+        seed=seed,
+    )
+    with fleet:
+        for addr in fleet.addrs:
+            click.echo(f"Serving on {addr}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from typing import Any
+from typing import Callable
+
 import requests
 
 
@@ -7,9 +10,27 @@ class NatureRemoError(Exception):
     pass
 
 
-def build_error_message(resp: requests.models.Response) -> str:
-    error = resp.json()
+def format_error_message(
+    status_code: int, reason: str, load_json: Callable[[], Any]
+) -> str:
+    """Describe an error response of the API.
+
+    Args:
+        status_code: HTTP status of the response.
+        reason: HTTP reason phrase of the response.
+        load_json: Function decoding the body of the response.
+    """
+    try:
+        error = load_json()
+        code, message = error["code"], error["message"]
+    except (ValueError, TypeError, KeyError):
+        # Not an API error, e.g. an HTML page returned by a gateway.
+        return f"HTTP Status Code: {status_code}, Message: {reason}"
     return (
-        f"HTTP Status Code: {resp.status_code}, "
-        + f'Nature Remo Code: {error["code"]}, Message: {error["message"]}'
+        f"HTTP Status Code: {status_code}, "
+        + f"Nature Remo Code: {code}, Message: {message}"
     )
+
+
+def build_error_message(resp: requests.models.Response) -> str:
+    return format_error_message(resp.status_code, resp.reason, resp.json)
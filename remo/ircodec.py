@@ -0,0 +1,353 @@
+"""Compact binary archives of IR signals.
+
+IRSignal.as_json_string() spells out every timing in decimal. This codec
+stores signals losslessly in a fraction of the space instead:
+
+1. The timings are divided by their greatest common divisor, which is
+   stored once. Captures recorded at a coarse resolution shrink by the
+   resolution.
+2. Marks and spaces, i.e. the timings at even and odd positions, are
+   encoded separately, as each timing is most alike the previous one of
+   its kind.
+3. Each timing is stored as its difference from the previous one of its
+   kind, and runs of equal timings collapse into one run length. Switching
+   back to the timing before the previous one, as spaces encoding bits
+   keep doing, takes a token of its own.
+4. Differences and run lengths are packed into LEB128 varints, one byte
+   for runs of up to 31 timings and differences of up to 15.
+
+An archive starts with a 4 byte magic and a version byte, followed by one
+record per signal:
+
+    record length   4 bytes, little endian
+    freq            zigzag varint
+    format          varint length, then UTF-8
+    unit            varint, the divisor of the timings
+    count           varint, the number of timings
+    marks, spaces   varint tokens, see _encode_channel
+
+dump() and load() stream any number of signals to and from a file, one
+record at a time. dumps() and loads() handle a single signal.
+"""
+import functools
+import math
+import operator
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from itertools import groupby
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from .errors import NatureRemoError
+from .models import IRData
+from .models import IRSignal
+
+MAGIC = b"RIRC"
+VERSION = 1
+
+_HEADER = MAGIC + bytes([VERSION])
+_LENGTH = struct.Struct("<I")
+
+# Encodings of a channel: tokens, or packed differences of the type codes
+# in _DENSE.
+_TOKENS = 0
+_DENSE = "bhiq"
+
+# Kinds of the tokens of a channel, see _encode_tokens.
+_DELTA = 0
+_RUN = 1
+_SWAP = 2
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return -(value >> 1) - 1 if value & 1 else value >> 1
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _encode_tokens(out: bytearray, runs: Iterable[Tuple[int, int]]):
+    # Each token holds its kind in the low 2 bits and an argument above:
+    # _DELTA adds the argument, zigzagged, to the current value, which is
+    # emitted once. _RUN repeats the current value argument times.
+    # _SWAP switches back to the value before the current one and emits it
+    # argument times, so the two levels of a channel, e.g. the short and
+    # long spaces of a pulse distance code, cost one byte per switch.
+    current = other = 0
+    for value, count in runs:
+        if value == other and value != current:
+            _write_varint(out, count << 2 | _SWAP)
+            current, other = other, current
+            continue
+        if value != current:
+            _write_varint(out, _zigzag(value - current) << 2 | _DELTA)
+            current, other = value, current
+            count -= 1
+        if count:
+            _write_varint(out, count << 2 | _RUN)
+
+
+def _decode_tokens(
+    buf: bytes, pos: int, count: int, unit: int
+) -> Tuple[List[int], int]:
+    # Values are kept multiplied by unit, so that they need no second pass.
+    values: List[int] = []
+    current = other = 0
+    filled = 0
+    while filled < count:
+        token = buf[pos]
+        pos += 1
+        if token > 0x7F:
+            token &= 0x7F
+            shift = 7
+            while True:
+                byte = buf[pos]
+                pos += 1
+                token |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+        kind = token & 3
+        token >>= 2
+        if kind == _DELTA:
+            delta = -(token >> 1) - 1 if token & 1 else token >> 1
+            current, other = current + delta * unit, current
+            values.append(current)
+            filled += 1
+        elif kind == _RUN:
+            values += [current] * token
+            filled += token
+        elif kind == _SWAP:
+            current, other = other, current
+            values += [current] * token
+            filled += token
+        else:
+            raise NatureRemoError("Corrupt IR signal record")
+    if filled != count:
+        raise NatureRemoError("Corrupt IR signal record")
+    return values, pos
+
+
+def _encode_dense(out: bytearray, values: List[int]):
+    # The first value, then the differences between consecutive values as
+    # little endian signed ints of the narrowest width fitting them all.
+    deltas = [b - a for a, b in zip(values, values[1:])]
+    low, high = min(deltas), max(deltas)
+    for mode, typecode in enumerate(_DENSE, _TOKENS + 1):
+        packed = array(typecode)
+        limit = 1 << packed.itemsize * 8 - 1
+        if -limit <= low and high < limit:
+            break
+    packed.extend(deltas)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    _write_varint(out, mode)
+    _write_varint(out, values[0])
+    out += packed.tobytes()
+
+
+def _decode_dense(
+    buf: bytes, pos: int, count: int, unit: int, mode: int
+) -> Tuple[List[int], int]:
+    if count < 1:
+        raise IndexError
+    first, pos = _read_varint(buf, pos)
+    packed = array(_DENSE[mode - _TOKENS - 1])
+    end = pos + (count - 1) * packed.itemsize
+    if end > len(buf):
+        raise IndexError
+    packed.frombytes(buf[pos:end])
+    if sys.byteorder == "big":
+        packed.byteswap()
+    values = list(accumulate(packed, operator.add, initial=first))
+    if unit != 1:
+        values = [value * unit for value in values]
+    return values, end
+
+
+def _encode_channel(out: bytearray, values: List[int]):
+    # Tokens suit clean captures, where most timings repeat one of the two
+    # before. Jittery ones leave little to collapse, and their differences
+    # decode several times faster from a packed array, so tokens are only
+    # used when they take at most a third of the space.
+    runs = [(value, len(list(group))) for value, group in groupby(values)]
+    if len(values) > 1:
+        dense = bytearray()
+        _encode_dense(dense, values)
+        # Every run takes at least one token of at least one byte.
+        if len(dense) < 3 * len(runs):
+            out += dense
+            return
+    tokens = bytearray([_TOKENS])
+    _encode_tokens(tokens, runs)
+    if len(values) > 1 and len(dense) < 3 * len(tokens):
+        out += dense
+    else:
+        out += tokens
+
+
+def _decode_channel(
+    buf: bytes, pos: int, count: int, unit: int
+) -> Tuple[List[int], int]:
+    mode, pos = _read_varint(buf, pos)
+    if mode == _TOKENS:
+        return _decode_tokens(buf, pos, count, unit)
+    if mode <= len(_DENSE):
+        return _decode_dense(buf, pos, count, unit, mode)
+    raise NatureRemoError("Corrupt IR signal record")
+
+
+def _encode_record(signal: IRSignal) -> bytes:
+    data = signal.data
+    unit = functools.reduce(math.gcd, set(data), 0) or 1
+    timings = data if unit == 1 else [timing // unit for timing in data]
+    format = signal.format.encode()
+
+    out = bytearray(_LENGTH.size)
+    _write_varint(out, _zigzag(signal.freq))
+    _write_varint(out, len(format))
+    out += format
+    _write_varint(out, unit)
+    _write_varint(out, len(timings))
+    _encode_channel(out, list(timings[0::2]))
+    _encode_channel(out, list(timings[1::2]))
+    _LENGTH.pack_into(out, 0, len(out) - _LENGTH.size)
+    return bytes(out)
+
+
+def _decode_record(buf: bytes) -> IRSignal:
+    try:
+        freq, pos = _read_varint(buf, 0)
+        length, pos = _read_varint(buf, pos)
+        end = pos + length
+        format = buf[pos:end].decode()
+        pos = end
+        unit, pos = _read_varint(buf, pos)
+        count, pos = _read_varint(buf, pos)
+        marks, pos = _decode_channel(buf, pos, (count + 1) // 2, unit)
+        spaces, pos = _decode_channel(buf, pos, count // 2, unit)
+    except (IndexError, UnicodeDecodeError):
+        raise NatureRemoError("Corrupt IR signal record")
+    if pos != len(buf):
+        raise NatureRemoError("Corrupt IR signal record")
+
+    timings = [0] * count
+    timings[0::2] = marks
+    timings[1::2] = spaces
+    try:
+        data = IRData(timings)
+    except OverflowError:
+        raise NatureRemoError("Corrupt IR signal record")
+    return IRSignal(freq=_unzigzag(freq), data=data, format=format)
+
+
+def _check_header(header: bytes):
+    if len(header) < len(_HEADER) or not header.startswith(MAGIC):
+        raise NatureRemoError("Not an IR signal archive")
+    version = header[len(MAGIC)]
+    if version != VERSION:
+        raise NatureRemoError(
+            f"Unsupported IR signal archive version: {version}"
+        )
+
+
+def dumps(signal: IRSignal) -> bytes:
+    """Encode one signal as an archive of its own."""
+    return _HEADER + _encode_record(signal)
+
+
+def loads(data: bytes) -> IRSignal:
+    """Decode an archive holding exactly one signal."""
+    signals = list(_iter_records(memoryview(data)))
+    if len(signals) != 1:
+        raise NatureRemoError(f"Expected one IR signal, found {len(signals)}")
+    return signals[0]
+
+
+def _iter_records(view: memoryview) -> Iterator[IRSignal]:
+    pos = len(_HEADER)
+    _check_header(bytes(view[:pos]))
+    while pos < len(view):
+        if pos + _LENGTH.size > len(view):
+            raise NatureRemoError("Truncated IR signal archive")
+        (length,) = _LENGTH.unpack_from(view, pos)
+        pos += _LENGTH.size
+        if pos + length > len(view):
+            raise NatureRemoError("Truncated IR signal archive")
+        end = pos + length
+        yield _decode_record(bytes(view[pos:end]))
+        pos = end
+
+
+def dump(signals: Iterable[IRSignal], fp: BinaryIO) -> int:
+    """Write signals to a binary file as one archive.
+
+    Signals are encoded and written one at a time, so signals can be a
+    generator of any length.
+
+    Args:
+        signals: Signals to write.
+        fp: File opened for writing in binary mode.
+
+    Returns:
+        The number of signals written.
+    """
+    fp.write(_HEADER)
+    count = 0
+    for signal in signals:
+        fp.write(_encode_record(signal))
+        count += 1
+    return count
+
+
+def load(fp: BinaryIO) -> Iterator[IRSignal]:
+    """Read the signals of an archive written by dump().
+
+    Signals are read and decoded one at a time as the iterator advances.
+
+    Args:
+        fp: File opened for reading in binary mode.
+
+    Returns:
+        An iterator of IRSignal objects.
+    """
+    _check_header(fp.read(len(_HEADER)))
+    return _load(fp)
+
+
+def _load(fp: BinaryIO) -> Iterator[IRSignal]:
+    while True:
+        prefix = fp.read(_LENGTH.size)
+        if not prefix:
+            return
+        if len(prefix) < _LENGTH.size:
+            raise NatureRemoError("Truncated IR signal archive")
+        (length,) = _LENGTH.unpack(prefix)
+        record = fp.read(length)
+        if len(record) < length:
+            raise NatureRemoError("Truncated IR signal archive")
+        yield _decode_record(record)
@@ -0,0 +1,327 @@
+"""Matching captured IR signals against a library of known ones.
+
+Two captures of the same button never have the same timings: remotes and
+receivers are off by up to a fifth, and a Remo rounds what it measures.
+Comparing a capture with every stored signal in turn is slow for large
+libraries, so SignalLibrary indexes signals by the shape of their
+timings instead:
+
+1. normalize() sorts the distinct timings of a signal and groups those
+   within tolerance of the next shorter one into levels, e.g. the 560 us
+   marks and zero spaces, the 1690 us one spaces and the leader of NEC.
+   Each timing is then replaced by the rank of its level, its symbol.
+   Jitter moves timings within their level, so the symbols of two
+   captures of one button are the same.
+2. Signals are stored under their whole sequence of symbols, and under
+   each band of BAND_SIZE consecutive symbols. A capture whose symbols
+   were all recovered finds its signals with one lookup. One that went
+   wrong somewhere still shares the bands elsewhere with them.
+3. The signals sharing the most bands with the capture, visiting the
+   most selective bands first, are compared with it timing by timing.
+
+A query thus looks at a bounded number of candidates however many signals
+are stored. fingerprint() hashes the decoded frames or the symbols of a
+signal into a key that is the same for captures of the same button, and
+compare() tells how far two signals are apart.
+"""
+import hashlib
+import itertools
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict
+from typing import Hashable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import Tuple
+
+from .models import IRSignal
+from .protocols import decode
+
+# How far, relative to the shorter one, two timings may be apart and still
+# be the same level, and how far in us on top of that.
+TOLERANCE = 0.25
+QUANTUM = 10
+
+# Symbols per band of the index.
+BAND_SIZE = 16
+
+# Number of signals compared timing by timing per query.
+CANDIDATES = 32
+
+# Buckets of more than this many times candidates signals are skipped.
+_BUCKET_LIMIT = 8
+
+
+@dataclass(frozen=True)
+class NormalizedSignal:
+    """The timings of a signal reduced to levels, see normalize().
+
+    Attributes:
+        symbols: Rank of the level of each timing, 0 for the shortest.
+        levels: Mean of the timings of each level, shortest first.
+    """
+
+    symbols: Tuple[int, ...]
+    levels: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class SignalMatch:
+    """A stored signal found by SignalLibrary.query().
+
+    Attributes:
+        key: Key the signal was added under.
+        signal: The stored signal.
+        distance: Share of the timings of the longer of the two signals
+          that are not within tolerance of the other signal's, from 0 for
+          captures of the same button to 1.
+        error: Mean relative difference of the timings within tolerance,
+          which ranks matches of equal distance.
+    """
+
+    key: Hashable
+    signal: IRSignal
+    distance: float
+    error: float
+
+
+def normalize(
+    signal: IRSignal, tolerance: float = TOLERANCE, quantum: int = QUANTUM
+) -> NormalizedSignal:
+    """Reduce the timings of a signal to levels.
+
+    Distinct timings are visited from the shortest, and one starts a new
+    level if it exceeds the previous one by more than tolerance times it
+    plus quantum.
+
+    Args:
+        signal: Signal to normalize.
+        tolerance: Relative jitter of timings of the same level.
+        quantum: Absolute jitter in us, e.g. from rounding.
+    """
+    counts = Counter(signal.data)
+    ranks: Dict[int, int] = {}
+    sums: List[int] = []
+    sizes: List[int] = []
+    previous = None
+    for timing in sorted(counts):
+        if previous is None or timing > previous * (1 + tolerance) + quantum:
+            sums.append(0)
+            sizes.append(0)
+        previous = timing
+        ranks[timing] = len(sums) - 1
+        sums[-1] += timing * counts[timing]
+        sizes[-1] += counts[timing]
+    return NormalizedSignal(
+        symbols=tuple(map(ranks.__getitem__, signal.data)),
+        levels=tuple(round(s / n) for s, n in zip(sums, sizes)),
+    )
+
+
+def fingerprint(
+    signal: IRSignal, tolerance: float = TOLERANCE, quantum: int = QUANTUM
+) -> str:
+    """Return a key that captures of the same button share.
+
+    Signals made of NEC, AEHA or Sony frames are keyed by the frames
+    remo.protocols decodes, which are the same whatever the jitter. Other
+    signals are keyed by their symbols, see normalize(), so captures
+    differing in any bit still have different keys, but timings close
+    enough to merge with the next level, e.g. the 3T and 4T spaces of
+    AEHA, may split them. Either key also covers the frequency and format
+    of the signal.
+
+    Levels are left out, as the leader and gaps occur too seldom to average
+    out their jitter: signals of the same shape at another scale share a
+    key, and compare() tells them apart.
+
+    Args:
+        signal: Signal to fingerprint.
+        tolerance: Relative jitter of timings of the same level.
+        quantum: Absolute jitter in us, e.g. from rounding.
+
+    Returns:
+        A string of 32 hexadecimal digits.
+    """
+    frames = decode(signal) if signal.format == "us" else []
+    if frames:
+        content: Tuple = tuple((f.protocol, f.bits, f.data) for f in frames)
+    else:
+        content = normalize(signal, tolerance, quantum).symbols
+    key = repr((signal.freq, signal.format, content))
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def _compare(
+    a: Sequence[int], b: Sequence[int], tolerance: float, quantum: int
+) -> Tuple[float, float]:
+    # Each of the two timings may be off by tolerance.
+    limit = (1 + tolerance) ** 2
+    mismatches = abs(len(a) - len(b))
+    error = 0.0
+    for x, y in zip(a, b):
+        low, high = (x, y) if x < y else (y, x)
+        if high > (low + quantum) * limit:
+            mismatches += 1
+        elif high:
+            error += (high - low) / high
+    length = max(len(a), len(b)) or 1
+    return mismatches / length, error / length
+
+
+def compare(
+    a: IRSignal,
+    b: IRSignal,
+    tolerance: float = TOLERANCE,
+    quantum: int = QUANTUM,
+) -> Tuple[float, float]:
+    """Tell how far two signals are apart, timing by timing.
+
+    Args:
+        a, b: Signals to compare.
+        tolerance: Relative jitter of each timing.
+        quantum: Absolute jitter in us, e.g. from rounding.
+
+    Returns:
+        The distance and error of the two signals, see SignalMatch.
+    """
+    return _compare(a.data, b.data, tolerance, quantum)
+
+
+def _bands(symbols: Tuple[int, ...]) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+    for start in range(0, len(symbols), BAND_SIZE):
+        end = start + BAND_SIZE
+        yield start, symbols[start:end]
+
+
+class SignalLibrary:
+    """Index of IR signals answering which one a capture is.
+
+    Signals are added under a key of the caller's choosing, e.g. the name
+    of the button. query() and match() then find the stored signals
+    closest to a capture, looking at no more than candidates of them, see
+    the module documentation.
+
+    Args:
+        tolerance: Relative jitter of timings of the same level.
+        quantum: Absolute jitter in us, e.g. from rounding.
+        candidates: Number of signals compared timing by timing per query.
+    """
+
+    def __init__(
+        self,
+        tolerance: float = TOLERANCE,
+        quantum: int = QUANTUM,
+        candidates: int = CANDIDATES,
+    ):
+        self.tolerance = tolerance
+        self.quantum = quantum
+        self.candidates = candidates
+        self._signals: Dict[Hashable, IRSignal] = {}
+        self._symbols: Dict[Hashable, Tuple[int, ...]] = {}
+        self._exact: Dict[Tuple[int, ...], Set[Hashable]] = {}
+        self._bands: Dict[Tuple[int, Tuple[int, ...]], Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signals)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signals
+
+    def __getitem__(self, key: Hashable) -> IRSignal:
+        return self._signals[key]
+
+    def add(self, key: Hashable, signal: IRSignal):
+        """Store a signal under key, replacing any signal stored under it."""
+        if key in self._signals:
+            self.remove(key)
+        symbols = normalize(signal, self.tolerance, self.quantum).symbols
+        self._signals[key] = signal
+        self._symbols[key] = symbols
+        self._exact.setdefault(symbols, set()).add(key)
+        for band in _bands(symbols):
+            self._bands.setdefault(band, set()).add(key)
+
+    def remove(self, key: Hashable):
+        """Remove the signal stored under key.
+
+        Raises:
+            KeyError: No signal is stored under key.
+        """
+        del self._signals[key]
+        symbols = self._symbols.pop(key)
+        _discard(self._exact, symbols, key)
+        for band in _bands(symbols):
+            _discard(self._bands, band, key)
+
+    def query(self, signal: IRSignal, k: int = 1) -> List[SignalMatch]:
+        """Find the stored signals closest to a capture.
+
+        Args:
+            signal: Captured signal.
+            k: Maximum number of matches.
+
+        Returns:
+            Up to k matches, closest first.
+        """
+        matches = [
+            SignalMatch(key, self._signals[key], *self._compare(signal, key))
+            for key in self._candidates(signal)
+        ]
+        matches.sort(key=lambda match: (match.distance, match.error))
+        return matches[:k]
+
+    def match(
+        self, signal: IRSignal, max_distance: float = 0.0
+    ) -> Optional[SignalMatch]:
+        """Return the stored signal a capture is of, or None.
+
+        Args:
+            signal: Captured signal.
+            max_distance: Largest distance of a match, see SignalMatch. By
+              default all timings have to be within tolerance.
+        """
+        matches = self.query(signal)
+        if matches and matches[0].distance <= max_distance:
+            return matches[0]
+        return None
+
+    def _compare(self, signal: IRSignal, key: Hashable) -> Tuple[float, float]:
+        return _compare(
+            signal.data, self._signals[key].data, self.tolerance, self.quantum
+        )
+
+    def _candidates(self, signal: IRSignal) -> List[Hashable]:
+        symbols = normalize(signal, self.tolerance, self.quantum).symbols
+        votes: Counter = Counter()
+        exact = self._exact.get(symbols, ())
+        # Signals with the same symbols go first, ahead of any band count.
+        for key in itertools.islice(exact, self.candidates):
+            votes[key] = len(symbols)
+        # Small buckets are shared by few signals, so they say the most
+        # about which ones the capture is like. Big ones, e.g. the leader
+        # and address every signal of a remote starts with, would make the
+        # query visit most of the library, so they are only sampled, and
+        # only if nothing smaller turned up.
+        limit = _BUCKET_LIMIT * self.candidates
+        buckets = [self._bands.get(band, ()) for band in _bands(symbols)]
+        buckets.sort(key=len)
+        for bucket in buckets:
+            if len(bucket) > limit:
+                if votes:
+                    break
+                sample = itertools.islice(bucket, limit)
+                votes.update(sample)
+            else:
+                votes.update(bucket)
+        return [key for key, _ in votes.most_common(self.candidates)]
+
+
+def _discard(index: Dict, bucket: Hashable, key: Hashable):
+    keys = index[bucket]
+    keys.discard(key)
+    if not keys:
+        del index[bucket]
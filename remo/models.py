@@ -1,5 +1,15 @@
+import json
+import threading
+from array import array
 from datetime import datetime
+from typing import Any
+from typing import Dict
+from typing import Iterable
 from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
+from typing import TypeVar
 
 from marshmallow import EXCLUDE
 from marshmallow import fields
@@ -7,11 +17,46 @@ from marshmallow import post_load
 from marshmallow import Schema
 
 
+S = TypeVar("S", bound=Schema)
+
+_schemas: Dict[Tuple[type, bool], Schema] = {}
+_schemas_lock = threading.Lock()
+
+
+def get_schema(schema: Type[S], many: bool = False) -> S:
+    """Return the shared instance of a schema class.
+
+    Building a schema is costly, so one instance per class and value of
+    many is created on first use and reused afterwards. Loading and dumping
+    keep no state on the instance, so it can be used from any thread.
+
+    Args:
+        schema: Schema class.
+        many: Whether the instance loads and dumps lists.
+    """
+    key = (schema, many)
+    try:
+        return _schemas[key]  # type: ignore
+    except KeyError:
+        pass
+    with _schemas_lock:
+        if key not in _schemas:
+            _schemas[key] = schema(many=many)
+        return _schemas[key]  # type: ignore
+
+
 class NatureRemoModel:
-    """Base class for Nature Remo models."""
+    """Base class for Nature Remo models.
+
+    Models declare their attributes in __slots__ and the schema serializing
+    them as a class attribute, so instances carry no per-instance dict.
+    """
+
+    __slots__ = ()
+    schema: Type[Schema]
 
     def as_json_string(self) -> str:
-        return self.schema().dumps(  # type: ignore
+        return get_schema(self.schema).dumps(
             self, ensure_ascii=True, sort_keys=True
         )
 
@@ -29,10 +74,12 @@ class UserSchema(Schema):
 
 
 class User(NatureRemoModel):
+    __slots__ = ("id", "nickname")
+    schema = UserSchema
+
     def __init__(self, id: str, nickname: str):
         self.id = id
         self.nickname = nickname
-        self.schema = UserSchema
 
     def __repr__(self):
         return f"User(id='{self.id}', nickname='{self.nickname}')"
@@ -51,10 +98,12 @@ class SensorValueSchema(Schema):
 
 
 class SensorValue(NatureRemoModel):
+    __slots__ = ("val", "created_at")
+    schema = SensorValueSchema
+
     def __init__(self, val: float, created_at: datetime):
         self.val = val
         self.created_at = created_at
-        self.schema = SensorValueSchema
 
     def __repr__(self):
         return (
@@ -82,6 +131,19 @@ class DeviceCoreSchema(Schema):
 
 
 class DeviceCore(NatureRemoModel):
+    __slots__ = (
+        "id",
+        "name",
+        "temperature_offset",
+        "humidity_offset",
+        "created_at",
+        "updated_at",
+        "firmware_version",
+        "mac_address",
+        "serial_number",
+    )
+    schema = DeviceCoreSchema
+
     def __init__(
         self,
         id: str,
@@ -103,7 +165,6 @@ class DeviceCore(NatureRemoModel):
         self.firmware_version = firmware_version
         self.mac_address = mac_address
         self.serial_number = serial_number
-        self.schema = DeviceCoreSchema
 
     def __repr__(self):
         return (
@@ -139,6 +200,9 @@ class DeviceSchema(Schema):
 
 
 class Device(DeviceCore):
+    __slots__ = ("newest_events",)
+    schema = DeviceSchema  # type: ignore
+
     def __init__(
         self,
         id: str,
@@ -164,7 +228,6 @@ class Device(DeviceCore):
             serial_number,
         )
         self.newest_events = newest_events
-        self.schema = DeviceSchema  # type: ignore
 
     def __repr__(self):
         return (
@@ -196,6 +259,9 @@ class ApplianceModelSchema(Schema):
 
 
 class ApplianceModel(NatureRemoModel):
+    __slots__ = ("id", "manufacturer", "remote_name", "name", "image")
+    schema = ApplianceModelSchema
+
     def __init__(
         self,
         id: str,
@@ -209,7 +275,6 @@ class ApplianceModel(NatureRemoModel):
         self.remote_name = remote_name
         self.name = name
         self.image = image
-        self.schema = ApplianceModelSchema
 
     def __repr__(self):
         return (
@@ -236,13 +301,15 @@ class AirConParamsSchema(Schema):
 
 
 class AirConParams(NatureRemoModel):
+    __slots__ = ("temp", "mode", "vol", "dir", "button")
+    schema = AirConParamsSchema
+
     def __init__(self, temp: str, mode: str, vol: str, dir: str, button: str):
         self.temp = temp
         self.mode = mode
         self.vol = vol
         self.dir = dir
         self.button = button
-        self.schema = AirConParamsSchema
 
     def __repr__(self):
         return (
@@ -264,10 +331,12 @@ class ApplianceModelAndParamsSchema(Schema):
 
 
 class ApplianceModelAndParams(NatureRemoModel):
+    __slots__ = ("model", "params")
+    schema = ApplianceModelAndParamsSchema
+
     def __init__(self, model: ApplianceModel, params: AirConParams):
         self.model = model
         self.params = params
-        self.schema = ApplianceModelAndParamsSchema
 
     def __repr__(self):
         return (
@@ -290,11 +359,13 @@ class AirConRangeModeSchema(Schema):
 
 
 class AirConRangeMode(NatureRemoModel):
+    __slots__ = ("temp", "vol", "dir")
+    schema = AirConRangeModeSchema
+
     def __init__(self, temp: List[str], vol: List[str], dir: List[str]):
         self.temp = temp
         self.vol = vol
         self.dir = dir
-        self.schema = AirConRangeModeSchema
 
     def __repr__(self):
         return (
@@ -316,10 +387,14 @@ class AirConRangeSchema(Schema):
 
 
 class AirConRange(NatureRemoModel):
-    def __init__(self, modes: dict, fixedButtons: List[str]):
+    __slots__ = ("modes", "fixedButtons")
+    schema = AirConRangeSchema
+
+    def __init__(
+        self, modes: Dict[str, AirConRangeMode], fixedButtons: List[str]
+    ):
         self.modes = modes
         self.fixedButtons = fixedButtons
-        self.schema = AirConRangeSchema
 
     def __repr__(self):
         return (
@@ -341,10 +416,12 @@ class AirConSchema(Schema):
 
 
 class AirCon(NatureRemoModel):
-    def __init__(self, range: dict, tempUnit: str):
+    __slots__ = ("range", "tempUnit")
+    schema = AirConSchema
+
+    def __init__(self, range: AirConRange, tempUnit: str):
         self.range = range
         self.tempUnit = tempUnit
-        self.schema = AirConSchema
 
     def __repr__(self):
         return f'AirCon(range={self.range}, tempUnit="{self.tempUnit}")'
@@ -364,11 +441,13 @@ class SignalSchema(Schema):
 
 
 class Signal(NatureRemoModel):
+    __slots__ = ("id", "name", "image")
+    schema = SignalSchema
+
     def __init__(self, id: str, name: str, image: str):
         self.id = id
         self.name = name
         self.image = image
-        self.schema = SignalSchema
 
     def __repr__(self):
         return (
@@ -390,11 +469,13 @@ class ButtonSchema(Schema):
 
 
 class Button(NatureRemoModel):
+    __slots__ = ("name", "image", "label")
+    schema = ButtonSchema
+
     def __init__(self, name: str, image: str, label: str):
         self.name = name
         self.image = image
         self.label = label
-        self.schema = ButtonSchema
 
     def __repr__(self):
         return (
@@ -416,9 +497,11 @@ class TVStateSchema(Schema):
 
 
 class TVState(NatureRemoModel):
+    __slots__ = ("input",)
+    schema = TVStateSchema
+
     def __init__(self, input: str):
         self.input = input
-        self.schema = TVStateSchema
 
     def __repr__(self):
         return f"TVState(input='{self.input}')"
@@ -437,10 +520,12 @@ class TVSchema(Schema):
 
 
 class TV(NatureRemoModel):
+    __slots__ = ("state", "buttons")
+    schema = TVSchema
+
     def __init__(self, state: TVState, buttons: List[Button]):
         self.state = state
         self.buttons = buttons
-        self.schema = TVSchema
 
     def __repr__(self):
         return f"TV(state={self.state}, buttons={self.buttons})"
@@ -460,11 +545,13 @@ class LightStateSchema(Schema):
 
 
 class LightState(NatureRemoModel):
+    __slots__ = ("brightness", "power", "last_button")
+    schema = LightStateSchema
+
     def __init__(self, brightness: str, power: str, last_button: str):
         self.brightness = brightness
         self.power = power
         self.last_button = last_button
-        self.schema = LightStateSchema
 
     def __repr__(self):
         return (
@@ -486,10 +573,12 @@ class LightSchema(Schema):
 
 
 class Light(NatureRemoModel):
+    __slots__ = ("state", "buttons")
+    schema = LightSchema
+
     def __init__(self, state: LightState, buttons: List[Button]):
         self.state = state
         self.buttons = buttons
-        self.schema = LightSchema
 
     def __repr__(self):
         return f"Light(state={self.state}, buttons={self.buttons})"
@@ -523,19 +612,34 @@ class ApplianceSchema(Schema):
 
 
 class Appliance(NatureRemoModel):
+    __slots__ = (
+        "id",
+        "device",
+        "model",
+        "nickname",
+        "image",
+        "type",
+        "settings",
+        "aircon",
+        "signals",
+        "tv",
+        "light",
+    )
+    schema = ApplianceSchema
+
     def __init__(
         self,
         id: str,
         device: DeviceCore,
-        model: ApplianceModel,
+        model: Optional[ApplianceModel],
         nickname: str,
         image: str,
         type: str,
-        settings: AirConParams,
-        aircon: AirCon,
+        settings: Optional[AirConParams],
+        aircon: Optional[AirCon],
         signals: List[Signal],
-        tv: TV = None,
-        light: Light = None,
+        tv: Optional[TV] = None,
+        light: Optional[Light] = None,
     ):
         self.id = id
         self.device = device
@@ -548,7 +652,6 @@ class Appliance(NatureRemoModel):
         self.signals = signals
         self.tv = tv
         self.light = light
-        self.schema = ApplianceSchema
 
     def __repr__(self):
         return (
@@ -560,9 +663,81 @@ class Appliance(NatureRemoModel):
         )
 
 
+class IRData(array):
+    """Timings of an IR signal, kept in an array of unsigned ints.
+
+    A capture of thousands of timings takes 4 bytes per timing instead of a
+    list of int objects. IRData compares equal to a list of the same
+    timings and exposes them through the buffer protocol, e.g. to
+    memoryview() or numpy.frombuffer(data, dtype="uint32").
+
+    Args:
+        timings: Durations of the pulses and spaces of the signal.
+    """
+
+    __slots__ = ()
+    __hash__ = None  # type: ignore
+
+    def __new__(cls, timings: Iterable[int] = ()):
+        return super().__new__(cls, "I", timings)  # type: ignore
+
+    def __reduce_ex__(self, protocol):
+        return type(self), (self.tolist(),)
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            return self.tolist() == other
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        if isinstance(other, list):
+            return self.tolist() != other
+        return super().__ne__(other)
+
+    def __repr__(self):
+        return f"IRData({self.tolist()})"
+
+
+def _ir_data(timings: List[Any]) -> IRData:
+    # The array checks the type of every timing in C. Only bools, which
+    # fields.Int rejects, slip through.
+    data = IRData(timings)
+    if bool in set(map(type, timings)):
+        raise TypeError("bool is not a timing")
+    return data
+
+
+class _IRDataField(fields.List):
+    """Loads a list of timings into IRData and dumps it back."""
+
+    default_error_messages = {
+        "range": "Timings must be between 0 and 4294967295."
+    }
+
+    def __init__(self, **kwargs):
+        super().__init__(fields.Int(), **kwargs)
+
+    def _serialize(self, value, attr, obj, **kwargs):
+        if isinstance(value, array):
+            return value.tolist()
+        return super()._serialize(value, attr, obj, **kwargs)
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if type(value) is list:
+            try:
+                return _ir_data(value)
+            except (TypeError, OverflowError):
+                pass
+        timings = super()._deserialize(value, attr, data, **kwargs)
+        try:
+            return IRData(timings)
+        except OverflowError:
+            raise self.make_error("range")
+
+
 class IRSignalSchema(Schema):
     freq = fields.Int()
-    data = fields.List(fields.Int())
+    data = _IRDataField()
     format = fields.Str()
 
     @post_load
@@ -571,14 +746,25 @@ class IRSignalSchema(Schema):
 
 
 class IRSignal(NatureRemoModel):
-    def __init__(self, freq: int, data: List[int], format: str):
+    __slots__ = ("freq", "data", "format")
+    schema = IRSignalSchema
+
+    def __init__(self, freq: int, data: Iterable[int], format: str):
         self.freq = freq
-        self.data = data
+        self.data = data if isinstance(data, IRData) else IRData(data)
         self.format = format
-        self.schema = IRSignalSchema
 
     def __repr__(self):
         return (
-            f"IRSignal(freq={self.freq}, data={self.data}, "
+            f"IRSignal(freq={self.freq}, data={list(self.data)}, "
             f"format='{self.format}')"
         )
+
+    def as_message(self) -> str:
+        """Return the signal as the body of POST /messages."""
+        message: Dict[str, Any] = {
+            "format": self.format,
+            "freq": self.freq,
+            "data": list(self.data),
+        }
+        return json.dumps(message, separators=(",", ":"))
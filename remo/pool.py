@@ -0,0 +1,218 @@
+import threading
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import Mapping
+from typing import Optional
+
+import requests
+
+from .api import NatureRemoAPI
+from .ratelimit import RateLimit
+from .ratelimit import RateLimitScheduler
+from .retry import RetryPolicy
+from .transport import create_session
+from .transport import DEFAULT_POOL_CONNECTIONS
+from .transport import HTTPTransport
+from .transport import Transport
+
+DEFAULT_POOL_MAXSIZE = 100
+
+
+@dataclass
+class PoolStats:
+    """Requests sent through a NatureRemoAPIPool since its stats were reset.
+
+    Attributes:
+        elapsed: Seconds since the stats were reset.
+        requests: Number of responses received.
+        errors: Number of responses with an error status.
+        requests_by_key: Number of responses received per key.
+    """
+
+    elapsed: float = 0.0
+    requests: int = 0
+    errors: int = 0
+    requests_by_key: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class _PoolTransport(HTTPTransport):
+    """Sends the requests of one client of a pool, reporting each response."""
+
+    def __init__(
+        self,
+        session: requests.Session,
+        count: Callable[["_PoolTransport", requests.models.Response], None],
+    ):
+        super().__init__(session)
+        self._count = count
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        data: Any = None,
+        stream: bool = False,
+    ) -> requests.models.Response:
+        resp = super().send(method, url, headers, data, stream)
+        self._count(self, resp)
+        return resp
+
+
+class NatureRemoAPIPool:
+    """Clients for many access tokens sharing one connection pool.
+
+    Each access token is registered under a key, such as a household ID, and
+    gets its own NatureRemoAPI, so its rate limit is tracked (and optionally
+    paced) separately. All clients send requests through the same pooled
+    session.
+
+    Args:
+        tokens: Access tokens by key.
+        session: Session shared by the clients. If omitted, the pool creates
+          its own, which is closed by close().
+        pool_maxsize: Maximum number of connections kept open when the pool
+          creates its own session.
+        pace: Give each client a RateLimitScheduler.
+        retry: Policy for retrying failed requests, shared by the clients.
+    """
+
+    def __init__(
+        self,
+        tokens: Mapping[str, str] = None,
+        session: Optional[requests.Session] = None,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pace: bool = False,
+        retry: Optional[RetryPolicy] = None,
+    ):
+        self._owns_session = session is None
+        if session is None:
+            session = create_session(
+                pool_connections=DEFAULT_POOL_CONNECTIONS,
+                pool_maxsize=pool_maxsize,
+            )
+        self.session = session
+        self.pace = pace
+        self.retry = retry
+        self._lock = threading.Lock()
+        self._clients: Dict[str, NatureRemoAPI] = {}
+        self._keys_by_transport: Dict[Transport, str] = {}
+        self._closed = False
+        self.reset_stats()
+        for key, access_token in (tokens or {}).items():
+            self.add(key, access_token)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getitem__(self, key: str) -> NatureRemoAPI:
+        return self._clients[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._clients
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._clients))
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def add(self, key: str, access_token: str) -> NatureRemoAPI:
+        """Register an access token under key.
+
+        Returns:
+            The client for the access token.
+        """
+        # Each client gets a transport of its own, so its requests are
+        # counted however it is called, and only while it is registered.
+        transport = _PoolTransport(self.session, self.__count)
+        client = NatureRemoAPI(
+            access_token,
+            transport=transport,
+            scheduler=RateLimitScheduler() if self.pace else None,
+            retry=self.retry,
+        )
+        with self._lock:
+            previous = self._clients.get(key)
+            if previous is not None:
+                del self._keys_by_transport[previous.transport]
+            self._clients[key] = client
+            self._keys_by_transport[transport] = key
+        return client
+
+    def remove(self, key: str):
+        """Unregister the access token registered under key."""
+        with self._lock:
+            client = self._clients.pop(key)
+            del self._keys_by_transport[client.transport]
+
+    def call(self, key: str, method: str, *args, **kwargs) -> Any:
+        """Call a NatureRemoAPI method with the access token of key.
+
+        Args:
+            key: Key the access token is registered under.
+            method: Name of the NatureRemoAPI method, e.g. "get_devices".
+            *args: Positional arguments of the method.
+            **kwargs: Keyword arguments of the method.
+
+        Returns:
+            The value returned by the method.
+        """
+        return getattr(self._clients[key], method)(*args, **kwargs)
+
+    def rate_limits(self) -> Dict[str, RateLimit]:
+        """Return the last reported rate limit of every access token."""
+        return {key: api.rate_limit for key, api in self._clients.items()}
+
+    def __count(
+        self, transport: _PoolTransport, resp: requests.models.Response
+    ):
+        with self._lock:
+            key = self._keys_by_transport.get(transport)
+            if key is None:
+                return
+            self._requests += 1
+            if not resp.ok:
+                self._errors += 1
+            self._requests_by_key[key] = self._requests_by_key.get(key, 0) + 1
+
+    def stats(self) -> PoolStats:
+        """Return the throughput of the pool since the stats were reset."""
+        with self._lock:
+            return PoolStats(
+                elapsed=time.monotonic() - self._started_at,
+                requests=self._requests,
+                errors=self._errors,
+                requests_by_key=dict(self._requests_by_key),
+            )
+
+    def reset_stats(self):
+        """Restart counting requests from zero."""
+        with self._lock:
+            self._started_at = time.monotonic()
+            self._requests = 0
+            self._errors = 0
+            self._requests_by_key = {}
+
+    def close(self):
+        """Close the shared session if it was created by the pool.
+
+        Closing a closed pool does nothing.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._owns_session:
+            self.session.close()
@@ -0,0 +1,437 @@
+"""Local decoding and encoding of NEC, AEHA and Sony IR frames.
+
+A Remo reports what it receives as raw mark and space timings. decode()
+recognizes the three protocols most remotes use and extracts the bits of
+every frame in a capture, without a round trip to detect_appliance:
+
+    NEC   Leader of 9000 us mark and 4500 us space, 32 bits of 560 us mark
+          and 560 or 1690 us space: address, inverted address, command,
+          inverted command.
+    AEHA  The Japanese home appliance format. Leader of 8T mark and 4T
+          space with T between 350 and 500 us, any number of bytes of T
+          mark and T or 3T space, the first two being the customer code.
+    Sony  SIRC. Leader of 2400 us mark and 600 us space, 12, 15 or 20 bits
+          of 600 or 1200 us mark and 600 us space: a 7 bit command, then
+          the address.
+
+Bits are sent least significant first. Marks and spaces may each be off
+by a fifth, as timings of remotes and receivers are.
+
+decode_many() decodes a batch of captures at once. If NumPy is installed,
+which the ``numpy`` extra does, the timings of the whole batch are
+classified with vectorized array operations; otherwise each capture is
+decoded in pure Python. Both give the same frames.
+
+encode() goes the other way, turning a frame built with nec_frame(),
+aeha_frame() or sony_frame() into an IRSignal a Remo can emit:
+
+    local_api.send_ir_signal(encode(nec_frame(0x10, 0x20)))
+
+The timings of recently encoded frames are cached, so sending the same
+command again costs no encoding.
+"""
+import functools
+from dataclasses import dataclass
+from typing import cast
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from .errors import NatureRemoError
+from .models import IRData
+from .models import IRSignal
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+NEC = "NEC"
+AEHA = "AEHA"
+SONY = "SONY"
+
+# Ranges of the mark and space of the leader of each protocol, in us.
+_LEADERS = [
+    (NEC, (6750, 11250), (3375, 5625)),
+    (AEHA, (2400, 4800), (1200, 2400)),
+    (SONY, (1800, 3000), (400, 900)),
+]
+
+# NEC and AEHA encode bits in the length of the space after a mark of one
+# unit: one unit for 0 and three for 1. Spaces are compared with the mark
+# they follow, so that the unit of AEHA need not be known.
+_PD_MARK = (250, 850)
+_PD_ZERO = (0.5, 1.75)
+_PD_ONE = (1.75, 4.5)
+
+# Sony encodes bits in the length of the mark, 600 us for 0 and 1200 us
+# for 1, each followed by a space of 600 us.
+_PW_MARK = (350, 1600)
+_PW_ONE = 900
+_PW_SPACE = (350, 900)
+
+_SONY_BITS = (12, 15, 20)
+
+# Timings encode() emits, in us. For NEC and AEHA, the leader mark and
+# space, then the mark and the spaces for 0 and 1. Frames start every
+# period for NEC and Sony, and follow each other after a gap for AEHA.
+_NEC_TIMINGS = (9000, 4500, 560, 560, 1690)
+_NEC_PERIOD = 108000
+_NEC_REPEAT = [9000, 2250, 560]
+_AEHA_TIMINGS = (3400, 1700, 425, 425, 1275)
+_AEHA_GAP = 13000
+_SONY_UNIT = 600
+_SONY_PERIOD = 45000
+
+# Carrier frequencies in kHz, as in IRSignal.freq.
+_FREQS = {NEC: 38, AEHA: 38, SONY: 40}
+
+# Number of distinct frames whose timings encode() keeps.
+ENCODE_CACHE_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class IRFrame:
+    """One frame of a decoded IR signal.
+
+    Attributes:
+        protocol: NEC, AEHA or SONY.
+        address: For NEC, the address, 16 bits wide for extended NEC whose
+          second byte is not the inverted first one. For AEHA, the 16 bit
+          customer code. For Sony, the bits following the command.
+        command: For NEC, the command, 16 bits wide if its second byte is
+          not the inverted first one. For AEHA, the bytes following the
+          customer code, least significant first. For Sony, the 7 bit
+          command.
+        bits: Number of bits of the frame.
+        data: The bits of the frame, packed least significant first.
+    """
+
+    protocol: str
+    address: int
+    command: int
+    bits: int
+    data: bytes
+
+
+def _frame(protocol: str, data: bytes, bits: int) -> Optional[IRFrame]:
+    if protocol == NEC:
+        if bits != 32:
+            return None
+        address, command = data[0], data[2]
+        if data[1] != address ^ 0xFF:
+            address |= data[1] << 8
+        if data[3] != command ^ 0xFF:
+            command |= data[3] << 8
+        return IRFrame(NEC, address, command, bits, data)
+    if protocol == AEHA:
+        if bits < 24 or bits % 8:
+            return None
+        address = data[0] | data[1] << 8
+        command = int.from_bytes(data[2:], "little")
+        return IRFrame(AEHA, address, command, bits, data)
+    if bits not in _SONY_BITS:
+        return None
+    value = int.from_bytes(data, "little")
+    return IRFrame(SONY, value >> 7, value & 0x7F, bits, data)
+
+
+def _pack(bits: Sequence[bool]) -> bytes:
+    data = bytearray((len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        if bit:
+            data[i >> 3] |= 1 << (i & 7)
+    return bytes(data)
+
+
+def _leader(mark: int, space: int) -> Optional[str]:
+    for protocol, (mark_min, mark_max), (space_min, space_max) in _LEADERS:
+        if mark_min <= mark <= mark_max and space_min <= space <= space_max:
+            return protocol
+    return None
+
+
+def _pd_bit(mark: int, space: int) -> Optional[bool]:
+    if not _PD_MARK[0] <= mark <= _PD_MARK[1]:
+        return None
+    if _PD_ZERO[0] * mark <= space < _PD_ZERO[1] * mark:
+        return False
+    if _PD_ONE[0] * mark <= space <= _PD_ONE[1] * mark:
+        return True
+    return None
+
+
+def _pw_mark(mark: int) -> bool:
+    return _PW_MARK[0] <= mark <= _PW_MARK[1]
+
+
+def _pairs(signal: IRSignal) -> Tuple[List[int], List[int]]:
+    if signal.format != "us":
+        raise NatureRemoError(f"Unsupported IR signal format: {signal.format}")
+    data = list(signal.data)
+    if len(data) % 2:
+        data.append(0)
+    return data[0::2], data[1::2]
+
+
+def _decode_python(signal: IRSignal) -> List[IRFrame]:
+    marks, spaces = _pairs(signal)
+    frames = []
+    count = len(marks)
+    pair = 0
+    while pair < count:
+        protocol = _leader(marks[pair], spaces[pair])
+        pair += 1
+        if protocol is None:
+            continue
+        bits: List[bool] = []
+        if protocol == SONY:
+            while (
+                pair < count
+                and _pw_mark(marks[pair])
+                and _PW_SPACE[0] <= spaces[pair] <= _PW_SPACE[1]
+            ):
+                bits.append(marks[pair] > _PW_ONE)
+                pair += 1
+            # The space after the last bit runs into the gap.
+            if pair < count and _pw_mark(marks[pair]):
+                bits.append(marks[pair] > _PW_ONE)
+                pair += 1
+        else:
+            while pair < count:
+                bit = _pd_bit(marks[pair], spaces[pair])
+                if bit is None:
+                    break
+                bits.append(bit)
+                pair += 1
+        frame = _frame(protocol, _pack(bits), len(bits))
+        if frame:
+            frames.append(frame)
+    return frames
+
+
+def _between(values, low, high):
+    return (values >= low) & (values <= high)
+
+
+def _decode_numpy(signals: Sequence[IRSignal]) -> List[List[IRFrame]]:
+    # The timings of all signals are laid out as one array of pairs, each
+    # signal padded to an even length. Every pair is classified at once,
+    # and the bits of a frame are the run of valid data pairs after its
+    # leader.
+    lengths = np.zeros(len(signals), dtype=np.int64)
+    for i, signal in enumerate(signals):
+        if signal.format != "us":
+            raise NatureRemoError(
+                f"Unsupported IR signal format: {signal.format}"
+            )
+        lengths[i] = (len(signal.data) + 1) // 2
+    starts = np.zeros(len(signals) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=starts[1:])
+    timings = np.zeros(2 * int(starts[-1]), dtype=np.int64)
+    for i, signal in enumerate(signals):
+        start = 2 * int(starts[i])
+        end = start + len(signal.data)
+        timings[start:end] = np.asarray(signal.data)
+    marks = timings[0::2]
+    spaces = timings[1::2]
+
+    leaders = np.full(len(marks), -1, dtype=np.int64)
+    for code, (_, mark_range, space_range) in enumerate(_LEADERS):
+        found = _between(marks, *mark_range) & _between(spaces, *space_range)
+        leaders[found & (leaders < 0)] = code
+
+    pd_one = _between(spaces, _PD_ONE[0] * marks, _PD_ONE[1] * marks)
+    pd_valid = _between(marks, *_PD_MARK) & _between(
+        spaces, _PD_ZERO[0] * marks, _PD_ONE[1] * marks
+    )
+    pw_mark = _between(marks, *_PW_MARK)
+    pw_valid = pw_mark & _between(spaces, *_PW_SPACE)
+    pw_one = marks > _PW_ONE
+    # Runs of data pairs never continue into the next signal.
+    firsts = starts[:-1][lengths > 0]
+    pd_valid[firsts] = False
+    pw_valid[firsts] = False
+
+    pair_signal = np.repeat(np.arange(len(signals)), lengths)
+    pd_stops = np.append(np.flatnonzero(~pd_valid), len(marks))
+    pw_stops = np.append(np.flatnonzero(~pw_valid), len(marks))
+
+    frames: List[List[IRFrame]] = [[] for _ in signals]
+    for pair in np.flatnonzero(leaders >= 0).tolist():
+        protocol = _LEADERS[int(leaders[pair])][0]
+        first = pair + 1
+        if protocol == SONY:
+            stop = int(pw_stops[np.searchsorted(pw_stops, first)])
+            # The space after the last bit runs into the gap.
+            if stop < starts[pair_signal[pair] + 1] and pw_mark[stop]:
+                stop += 1
+            bits = pw_one[first:stop]
+        else:
+            stop = int(pd_stops[np.searchsorted(pd_stops, first)])
+            bits = pd_one[first:stop]
+        data = np.packbits(bits, bitorder="little").tobytes()
+        frame = _frame(protocol, data, len(bits))
+        if frame:
+            frames[pair_signal[pair]].append(frame)
+    return frames
+
+
+def decode(signal: IRSignal) -> List[IRFrame]:
+    """Decode the NEC, AEHA and Sony frames of an IR signal.
+
+    Repeat codes and anything else that is not one of the protocols are
+    skipped.
+
+    Args:
+        signal: Signal received by a Remo, in the "us" format.
+
+    Returns:
+        The frames of the signal in the order they were received, empty if
+        none was recognized.
+    """
+    return _decode_python(signal)
+
+
+def decode_many(
+    signals: Iterable[IRSignal], use_numpy: Optional[bool] = None
+) -> List[List[IRFrame]]:
+    """Decode the frames of many IR signals, see decode().
+
+    Args:
+        signals: Signals received by a Remo, in the "us" format.
+        use_numpy: Whether to decode with NumPy. Defaults to whether NumPy
+          is installed.
+
+    Returns:
+        A list holding the frames of each signal.
+    """
+    signals = list(signals)
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy and signals:
+        if np is None:
+            raise NatureRemoError("NumPy is not installed")
+        return _decode_numpy(signals)
+    return [_decode_python(signal) for signal in signals]
+
+
+def nec_frame(address: int, command: int) -> IRFrame:
+    """Build an NEC frame.
+
+    Args:
+        address: 8 bit address, sent with its inverse, or 16 bit address of
+          extended NEC.
+        command: 8 bit command, sent with its inverse, or 16 bit command.
+    """
+    data = bytearray()
+    for value in (address, command):
+        if not 0 <= value <= 0xFFFF:
+            raise NatureRemoError(f"Invalid NEC address or command: {value}")
+        if value <= 0xFF:
+            data += bytes([value, value ^ 0xFF])
+        else:
+            data += value.to_bytes(2, "little")
+    # Parsed back, so an extended address or command that happens to be
+    # followed by its inverse comes out as it is decoded.
+    return cast(IRFrame, _frame(NEC, bytes(data), 32))
+
+
+def aeha_frame(data: bytes) -> IRFrame:
+    """Build an AEHA frame.
+
+    Args:
+        data: The bytes of the frame, starting with the 16 bit customer code,
+          least significant byte first. At least 3 bytes.
+    """
+    if len(data) < 3:
+        raise NatureRemoError("AEHA frames hold at least 3 bytes")
+    return cast(IRFrame, _frame(AEHA, bytes(data), len(data) * 8))
+
+
+def sony_frame(command: int, address: int, bits: int = 12) -> IRFrame:
+    """Build a Sony frame.
+
+    Args:
+        command: 7 bit command.
+        address: 5, 8 or 13 bit address, for 12, 15 and 20 bit frames.
+        bits: Number of bits of the frame, 12, 15 or 20.
+    """
+    if bits not in _SONY_BITS:
+        raise NatureRemoError(f"Invalid number of Sony bits: {bits}")
+    if not 0 <= command <= 0x7F or not 0 <= address < 1 << bits - 7:
+        raise NatureRemoError(
+            f"Invalid Sony command or address: {command}, {address}"
+        )
+    value = address << 7 | command
+    data = value.to_bytes((bits + 7) // 8, "little")
+    return cast(IRFrame, _frame(SONY, data, bits))
+
+
+def _bits(frame: IRFrame) -> List[bool]:
+    return [bool(frame.data[i >> 3] >> (i & 7) & 1) for i in range(frame.bits)]
+
+
+def _pulse_distance(
+    timings: Tuple[int, int, int, int, int], frame: IRFrame
+) -> List[int]:
+    leader_mark, leader_space, mark, zero, one = timings
+    result = [leader_mark, leader_space]
+    for bit in _bits(frame):
+        result += [mark, one if bit else zero]
+    result.append(mark)
+    return result
+
+
+@functools.lru_cache(maxsize=ENCODE_CACHE_SIZE)
+def _encode(frame: IRFrame, repeat: int) -> IRData:
+    if frame.protocol == NEC:
+        timings = _pulse_distance(_NEC_TIMINGS, frame)
+        # Further presses are sent as repeat codes, one per period.
+        for _ in range(repeat - 1):
+            timings.append(_NEC_PERIOD - sum(timings) % _NEC_PERIOD)
+            timings += _NEC_REPEAT
+    elif frame.protocol == AEHA:
+        single = _pulse_distance(_AEHA_TIMINGS, frame)
+        timings = single
+        for _ in range(repeat - 1):
+            timings = timings + [_AEHA_GAP] + single
+    elif frame.protocol == SONY:
+        single = [4 * _SONY_UNIT, _SONY_UNIT]
+        for bit in _bits(frame):
+            single += [2 * _SONY_UNIT if bit else _SONY_UNIT, _SONY_UNIT]
+        # The space after the last bit is part of the gap.
+        gap = _SONY_PERIOD - sum(single) + _SONY_UNIT
+        single[-1] = gap
+        timings = single * repeat
+        timings.pop()
+    else:
+        raise NatureRemoError(f"Unknown IR protocol: {frame.protocol}")
+    return IRData(timings)
+
+
+def encode(frame: IRFrame, repeat: Optional[int] = None) -> IRSignal:
+    """Build the IR signal of a frame, see nec_frame(), aeha_frame() and
+    sony_frame().
+
+    Args:
+        frame: Frame to send, built or decoded.
+        repeat: How many times the frame is sent, as when the button of a
+          remote is held. NEC sends the frame once followed by repeat
+          codes. Defaults to 3 for Sony, whose receivers expect that many,
+          and 1 for the others.
+
+    Returns:
+        A new IRSignal in the "us" format.
+    """
+    if repeat is None:
+        repeat = 3 if frame.protocol == SONY else 1
+    if repeat < 1:
+        raise NatureRemoError(f"Invalid number of repeats: {repeat}")
+    data = _encode(frame, repeat)
+    # Copied, so that changes to the signal do not reach the cache.
+    return IRSignal(
+        freq=_FREQS[frame.protocol], data=IRData(data), format="us"
+    )
@@ -0,0 +1,165 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timezone
+from typing import Callable
+from typing import Mapping
+from typing import Optional
+
+from .errors import NatureRemoError
+
+DEFAULT_WINDOW = 300.0
+
+
+@dataclass
+class RateLimit:
+    checked_at: Optional[datetime] = None
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset: Optional[datetime] = None
+
+
+def update_rate_limit(rate_limit: RateLimit, headers: Mapping[str, str]):
+    """Record the rate limit status reported in response headers."""
+    if "Date" in headers:
+        rate_limit.checked_at = datetime.strptime(
+            headers["Date"], "%a, %d %b %Y %H:%M:%S GMT"
+        )
+    if "X-Rate-Limit-Limit" in headers:
+        rate_limit.limit = int(headers["X-Rate-Limit-Limit"])
+    if "X-Rate-Limit-Remaining" in headers:
+        rate_limit.remaining = int(headers["X-Rate-Limit-Remaining"])
+    if "X-Rate-Limit-Reset" in headers:
+        rate_limit.reset = datetime.utcfromtimestamp(
+            int(headers["X-Rate-Limit-Reset"])
+        )
+
+
+def _timestamp(dt: datetime) -> float:
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+def seconds_until_reset(rate_limit: RateLimit) -> Optional[float]:
+    """Return the seconds until the rate limit resets.
+
+    The wait is measured against the server time at which the rate limit was
+    checked when known, so that it does not depend on the local clock.
+    """
+    if rate_limit.reset is None:
+        return None
+    if rate_limit.checked_at is not None:
+        now = _timestamp(rate_limit.checked_at)
+    else:
+        now = time.time()
+    return max(_timestamp(rate_limit.reset) - now, 0.0)
+
+
+class RateLimitScheduler:
+    """Paces requests so that the rate limit budget lasts until its reset.
+
+    Requests are spaced evenly over the time left until the reported reset,
+    and once the budget is used up they wait for the reset instead of being
+    sent. Reset times are converted to the local clock using the server's
+    Date header, so a skewed local clock does not cause early requests.
+
+    The scheduler is thread-safe and may be shared by several clients using
+    the same access token.
+
+    Args:
+        window: Length in seconds of a rate limit window, used to pace
+          requests after a reset until the server reports the new budget.
+        reserve: Number of requests to leave unused in every window.
+        max_wait: Maximum number of seconds a request may wait. If the wait
+          would be longer, NatureRemoError is raised instead.
+        clock: Function returning the current time as a POSIX timestamp.
+        sleep: Function used to wait.
+    """
+
+    def __init__(
+        self,
+        window: float = DEFAULT_WINDOW,
+        reserve: int = 0,
+        max_wait: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.window = window
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.clock = clock
+        self.sleep = sleep
+        self.skew = 0.0
+        self._lock = threading.Lock()
+        self._limit: Optional[int] = None
+        self._remaining: Optional[int] = None
+        self._reset: Optional[datetime] = None
+        self._reset_at: Optional[float] = None
+        self._next_at = 0.0
+
+    def update(self, rate_limit: RateLimit, received_at: float = None):
+        """Adjust the schedule to the rate limit status of a response.
+
+        Args:
+            rate_limit: Status parsed from the response headers.
+            received_at: Local time at which the response was received.
+              Defaults to now.
+        """
+        if received_at is None:
+            received_at = self.clock()
+        with self._lock:
+            if rate_limit.checked_at is not None:
+                self.skew = _timestamp(rate_limit.checked_at) - received_at
+            if rate_limit.limit is not None:
+                self._limit = rate_limit.limit
+            if rate_limit.reset is None or rate_limit.remaining is None:
+                return
+            if self._reset == rate_limit.reset and self._remaining is not None:
+                # Requests sent after this response are already counted.
+                self._remaining = min(self._remaining, rate_limit.remaining)
+            else:
+                self._remaining = rate_limit.remaining
+            self._reset = rate_limit.reset
+            self._reset_at = _timestamp(rate_limit.reset) - self.skew
+
+    def __reserve(self, now: float) -> float:
+        if self._remaining is None or self._reset_at is None:
+            return now
+        if now >= self._reset_at:
+            self.__next_window(now)
+        send_at = max(now, self._next_at)
+        if self._remaining is not None and self._remaining <= self.reserve:
+            send_at = max(send_at, self._reset_at)
+            self.__next_window(send_at)
+        if self._remaining is None:
+            return send_at
+        budget = max(self._remaining - self.reserve, 1)
+        self._next_at = send_at + (self._reset_at - send_at) / budget
+        self._remaining -= 1
+        return send_at
+
+    def __next_window(self, now: float):
+        reset_at = self._reset_at
+        if reset_at is None:
+            return
+        while reset_at <= now:
+            reset_at += self.window
+        self._reset_at = reset_at
+        # Assume a full budget until a response reports the actual one.
+        self._remaining = self._limit
+        self._next_at = 0.0
+
+    def acquire(self):
+        """Block until the next request may be sent."""
+        with self._lock:
+            state = (self._remaining, self._reset_at, self._next_at)
+            now = self.clock()
+            send_at = self.__reserve(now)
+            wait = send_at - now
+            if self.max_wait is not None and wait > self.max_wait:
+                self._remaining, self._reset_at, self._next_at = state
+                raise NatureRemoError(
+                    f"Rate limit exceeded, next request allowed in {wait:.1f}s"
+                )
+        if wait > 0:
+            self.sleep(wait)
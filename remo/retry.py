@@ -0,0 +1,90 @@
+import random
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import FrozenSet
+from typing import Optional
+from typing import Protocol
+
+import requests
+
+from .ratelimit import RateLimit
+from .ratelimit import seconds_until_reset
+from .ratelimit import update_rate_limit
+
+TOO_MANY_REQUESTS = 429
+
+
+class _Sleep(Protocol):
+    # Callable[[float], None], which mypy would take for a method.
+    def __call__(self, __seconds: float) -> None:
+        ...
+
+
+@dataclass
+class RetryPolicy:
+    """Policy for retrying failed requests.
+
+    Connection errors and responses with a status in retry_statuses are
+    retried after a jittered exponential backoff. A 429 response is retried
+    once the rate limit resets, as reported by X-Rate-Limit-Reset.
+
+    Only GET requests are retried by default, since a POST such as
+    send_signal may have taken effect even if its response was lost.
+
+    Attributes:
+        max_retries: Maximum number of retries per request.
+        backoff_factor: Backoff in seconds before the first retry. It doubles
+          with every further retry.
+        max_backoff: Upper bound of the backoff in seconds.
+        max_reset_wait: Upper bound in seconds of the wait for a rate limit
+          reset. A 429 response is not retried if the reset is further away.
+        retry_statuses: Response statuses retried with backoff.
+        retry_posts: Whether POST requests are retried as well.
+        sleep: Function used to wait.
+    """
+
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    max_backoff: float = 30.0
+    max_reset_wait: float = 300.0
+    retry_statuses: FrozenSet[int] = frozenset({500, 502, 503, 504})
+    retry_posts: bool = False
+    sleep: _Sleep = field(default=time.sleep, repr=False, compare=False)
+
+    def backoff(self, attempt: int) -> float:
+        """Return a random backoff in seconds before the given retry."""
+        cap = min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+        return random.uniform(0, cap)
+
+    def get_delay(
+        self,
+        attempt: int,
+        idempotent: bool,
+        resp: Optional[requests.models.Response] = None,
+    ) -> Optional[float]:
+        """Decide whether and when to retry a request.
+
+        Args:
+            attempt: Number of retries made so far.
+            idempotent: Whether the request can safely be sent twice.
+            resp: Response received, or None if the request failed with a
+              connection error.
+
+        Returns:
+            Seconds to wait before retrying, or None if the request must not
+            be retried.
+        """
+        if attempt >= self.max_retries or not (idempotent or self.retry_posts):
+            return None
+        if resp is None or resp.status_code in self.retry_statuses:
+            return self.backoff(attempt)
+        if resp.status_code == TOO_MANY_REQUESTS:
+            rate_limit = RateLimit()
+            update_rate_limit(rate_limit, resp.headers)
+            wait = seconds_until_reset(rate_limit)
+            if wait is None:
+                return self.backoff(attempt)
+            if wait <= self.max_reset_wait:
+                return wait
+        return None
@@ -0,0 +1,669 @@
+"""Local stand-in for the Nature Remo cloud API.
+
+FakeCloudServer serves the endpoints used by NatureRemoAPI over plain HTTP
+on localhost, keeping an in-memory account that writes actually modify. It
+reports X-Rate-Limit-* headers like the real service and can inject
+latency, server errors and rate limiting, so throughput, retries and
+pacing can be measured without touching the cloud.
+
+To run it from the command line:
+
+    python -m remo.server --port 8080 --appliances 1000 --latency 0.05
+"""
+import abc
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from urllib.parse import parse_qsl
+from urllib.parse import urlsplit
+
+import click
+
+DEFAULT_RATE_LIMIT = 30
+DEFAULT_WINDOW = 300
+
+_TIMESTAMP = "2020-01-01T01:23:45Z"
+# How often serve_forever() checks for stop(), in seconds.
+_POLL_INTERVAL = 0.05
+
+
+@dataclass
+class Account:
+    """State of the account served by FakeCloudServer, as decoded JSON.
+
+    Signals are held in the "signals" list of their appliance, as in the
+    responses of /1/appliances.
+    """
+
+    user: Dict[str, Any]
+    devices: List[Dict[str, Any]] = field(default_factory=list)
+    appliances: List[Dict[str, Any]] = field(default_factory=list)
+    detected: List[Dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_fixtures(cls, path: str = "testdata") -> "Account":
+        """Create an account holding the JSON fixtures in path.
+
+        The minimal appliance fixture shares its ID with the full one, so it
+        is renamed to "appliance-minimal-id" to keep IDs unique.
+        """
+
+        def load(name):
+            with open(os.path.join(path, f"{name}.json")) as f:
+                return json.load(f)
+
+        minimal = load("appliance_minimal")
+        minimal["id"] = "appliance-minimal-id"
+        return cls(
+            user=load("user"),
+            devices=[load("device")],
+            appliances=[load("appliance"), minimal],
+            detected=[load("appliance_model_and_params")],
+        )
+
+    @classmethod
+    def synthetic(
+        cls,
+        appliances: int = 100,
+        devices: int = 1,
+        signals: int = 5,
+        seed: Optional[int] = None,
+    ) -> "Account":
+        """Generate an account of arbitrary size.
+
+        Appliances are spread over the devices and cycle through the AC,
+        TV, LIGHT and IR types, each with its type-specific fields filled
+        in. The same seed always generates the same account.
+
+        Args:
+            appliances: Number of appliances.
+            devices: Number of devices.
+            signals: Number of signals per appliance.
+            seed: Seed of the random generator.
+        """
+        rng = random.Random(seed)
+
+        def new_id():
+            return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+        device_list = [
+            _device(new_id(), f"Remo {i + 1}") for i in range(devices)
+        ]
+        appliance_list = []
+        for i in range(appliances):
+            core = dict(device_list[i % devices])
+            core.pop("newest_events")
+            type = ("AC", "TV", "LIGHT", "IR")[i % 4]
+            appliance = {
+                "id": new_id(),
+                "device": core,
+                "model": None,
+                "nickname": f"{type.lower()} {i + 1}",
+                "image": f"ico_{type.lower()}",
+                "type": type,
+                "settings": None,
+                "aircon": None,
+                "signals": [
+                    {"id": new_id(), "name": f"signal {j + 1}", "image": "ico"}
+                    for j in range(signals)
+                ],
+            }
+            if type == "AC":
+                appliance["settings"] = {
+                    "temp": str(rng.randint(18, 30)),
+                    "mode": rng.choice(["cool", "warm", "dry", "auto"]),
+                    "vol": "auto",
+                    "dir": "swing",
+                    "button": rng.choice(["", "power-off"]),
+                }
+                appliance["aircon"] = _aircon()
+            elif type == "TV":
+                appliance["tv"] = {
+                    "state": {"input": "t"},
+                    "buttons": _buttons(["power", "ch-up", "ch-down"]),
+                }
+            elif type == "LIGHT":
+                appliance["light"] = {
+                    "state": {
+                        "brightness": str(rng.randint(0, 100)),
+                        "power": rng.choice(["on", "off"]),
+                        "last_button": "",
+                    },
+                    "buttons": _buttons(["on", "off", "night"]),
+                }
+            appliance_list.append(appliance)
+        return cls(
+            user={"id": new_id(), "nickname": "synthetic"},
+            devices=device_list,
+            appliances=appliance_list,
+        )
+
+
+def _device(id: str, name: str) -> Dict[str, Any]:
+    return {
+        "id": id,
+        "name": name,
+        "temperature_offset": 0,
+        "humidity_offset": 0,
+        "created_at": _TIMESTAMP,
+        "updated_at": _TIMESTAMP,
+        "firmware_version": "Remo/1.0.23",
+        "mac_address": "ab:cd:ef:01:23:45",
+        "serial_number": "1W111111111111",
+        "newest_events": {
+            "te": {"val": 25.0, "created_at": _TIMESTAMP},
+            "hu": {"val": 50, "created_at": _TIMESTAMP},
+        },
+    }
+
+
+def _aircon() -> Dict[str, Any]:
+    temps = [str(t) for t in range(18, 31)]
+    mode = {"temp": temps, "vol": ["1", "2", "3", "auto"], "dir": ["swing"]}
+    return {
+        "range": {
+            "modes": {m: mode for m in ("cool", "warm", "dry", "auto")},
+            "fixedButtons": ["power-off"],
+        },
+        "tempUnit": "c",
+    }
+
+
+def _buttons(names: List[str]) -> List[Dict[str, str]]:
+    return [{"name": n, "image": f"ico_{n}", "label": n} for n in names]
+
+
+_AIRCON_SETTINGS = {
+    "operation_mode": "mode",
+    "temperature": "temp",
+    "air_volume": "vol",
+    "air_direction": "dir",
+    "button": "button",
+}
+
+
+class _NotFound(Exception):
+    pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.app._handle(self, "GET")
+
+    def do_POST(self):
+        self.server.app._handle(self, "POST")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalServer(abc.ABC):
+    """HTTP server on a local port passing every request to _handle().
+
+    The base of FakeCloudServer and RemoEmulator. Subclasses implement
+    _handle() and answer with _respond().
+
+    Args:
+        host: Address to listen on.
+        port: Port to listen on. 0 picks a free port.
+    """
+
+    def __init__(self, host: str, port: int):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.app = self  # type: ignore
+        self._thread: Optional[threading.Thread] = None
+        self._serving = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests from a background thread."""
+        self._serving = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            args=(_POLL_INTERVAL,),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def serve_forever(self):
+        """Serve requests from the calling thread until stop() is called."""
+        self._serving = True
+        self._server.serve_forever(_POLL_INTERVAL)
+
+    def stop(self):
+        """Stop serving and release the port."""
+        if self._serving:
+            self._server.shutdown()
+            self._serving = False
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @abc.abstractmethod
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str):
+        """Answer a request with _respond()."""
+
+    def _respond(
+        self,
+        handler: BaseHTTPRequestHandler,
+        status: int,
+        body: bytes,
+        headers: Dict[str, str],
+    ):
+        handler.send_response(status, HTTPStatus(status).phrase)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+class FakeCloudServer(LocalServer):
+    """Serves the Nature Remo cloud API from memory on a local port.
+
+    Every access token is accepted and gets its own rate limit budget of
+    rate_limit requests per window, reset at multiples of window seconds
+    as reported in X-Rate-Limit-Reset. Once the budget is used up,
+    requests are answered with 429 until the reset.
+
+    Point a client at the server by setting its base_url:
+
+        with FakeCloudServer(Account.synthetic(1000)) as server:
+            api = NatureRemoAPI("token")
+            api.base_url = server.base_url
+
+    Args:
+        account: Account served, e.g. Account.synthetic() or
+          Account.from_fixtures().
+        host: Address to listen on.
+        port: Port to listen on. 0 picks a free port.
+        latency: Seconds each response is delayed.
+        jitter: Maximum number of seconds added at random to latency.
+        error_rate: Probability of answering a request with error_status.
+        error_status: Status code of injected errors.
+        rate_limit: Number of requests allowed per window and token.
+        window: Length in seconds of a rate limit window.
+        seed: Seed of the generator drawing latencies and errors.
+        clock: Function returning the current time as a POSIX timestamp.
+    """
+
+    def __init__(
+        self,
+        account: Account,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        rate_limit: int = DEFAULT_RATE_LIMIT,
+        window: int = DEFAULT_WINDOW,
+        seed: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.account = account
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.window = window
+        self.clock = clock
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._budgets: Dict[str, Tuple[int, int]] = {}
+        self._bodies: Dict[str, bytes] = {}
+        self._routes = self.__routes()
+        super().__init__(host, port)
+
+    def reset_rate_limits(self):
+        """Restore the full budget of every access token."""
+        with self._lock:
+            self._budgets.clear()
+
+    def __routes(self):
+        routes = [
+            ("GET", r"/1/users/me", self.__get_user),
+            ("POST", r"/1/users/me", self.__update_user),
+            ("GET", r"/1/devices", self.__get_devices),
+            ("POST", r"/1/devices/([^/]+)", self.__update_device),
+            ("POST", r"/1/devices/([^/]+)/delete", self.__delete_device),
+            (
+                "POST",
+                r"/1/devices/([^/]+)/(temperature_offset|humidity_offset)",
+                self.__update_offset,
+            ),
+            ("POST", r"/1/detectappliance", self.__detect_appliance),
+            ("GET", r"/1/appliances", self.__get_appliances),
+            ("POST", r"/1/appliances", self.__create_appliance),
+            ("POST", r"/1/appliance_orders", self.__update_appliance_orders),
+            ("POST", r"/1/appliances/([^/]+)", self.__update_appliance),
+            ("POST", r"/1/appliances/([^/]+)/delete", self.__delete_appliance),
+            (
+                "POST",
+                r"/1/appliances/([^/]+)/aircon_settings",
+                self.__update_aircon_settings,
+            ),
+            ("POST", r"/1/appliances/([^/]+)/(tv|light)", self.__send_button),
+            ("GET", r"/1/appliances/([^/]+)/signals", self.__get_signals),
+            ("POST", r"/1/appliances/([^/]+)/signals", self.__create_signal),
+            (
+                "POST",
+                r"/1/appliances/([^/]+)/signal_orders",
+                self.__update_signal_orders,
+            ),
+            ("POST", r"/1/signals/([^/]+)", self.__update_signal),
+            ("POST", r"/1/signals/([^/]+)/delete", self.__delete_signal),
+            ("POST", r"/1/signals/([^/]+)/send", self.__send_signal),
+        ]
+        return [(m, re.compile(p + "$"), f) for m, p, f in routes]
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str):
+        length = int(handler.headers.get("Content-Length") or 0)
+        form = dict(parse_qsl(handler.rfile.read(length).decode()))
+        token = handler.headers.get("Authorization", "")
+        path = urlsplit(handler.path).path
+
+        if not token.startswith("Bearer "):
+            self._respond(handler, 401, _error(401), {})
+            return
+        headers, allowed = self.__consume(token)
+        if not allowed:
+            self._respond(handler, 429, _error(429), headers)
+            return
+
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            failed = self._rng.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            body = _error(self.error_status)
+            self._respond(handler, self.error_status, body, headers)
+            return
+
+        status, body = 404, _error(404)
+        for m, pattern, f in self._routes:
+            match = pattern.match(path)
+            if m == method and match:
+                try:
+                    body = self.__call(method, path, f, match, form)
+                    status = 200
+                except _NotFound:
+                    pass
+                break
+        self._respond(handler, status, body, headers)
+
+    def __call(self, method, path, f, match, form) -> bytes:
+        with self._lock:
+            if method == "GET":
+                body = self._bodies.get(path)
+                if body is None:
+                    body = self._bodies[path] = _dumps(f(*match.groups()))
+                return body
+            body = _dumps(f(*match.groups(), form))
+            # Every write may change any read, so drop the encoded reads.
+            self._bodies.clear()
+            return body
+
+    def __consume(self, token: str) -> Tuple[Dict[str, str], bool]:
+        now = self.clock()
+        reset = (int(now) // self.window + 1) * self.window
+        with self._lock:
+            budget_reset, remaining = self._budgets.get(
+                token, (reset, self.rate_limit)
+            )
+            if budget_reset <= now:
+                budget_reset, remaining = reset, self.rate_limit
+            allowed = remaining > 0
+            if allowed:
+                remaining -= 1
+            self._budgets[token] = (budget_reset, remaining)
+        headers = {
+            "X-Rate-Limit-Limit": str(self.rate_limit),
+            "X-Rate-Limit-Remaining": str(remaining),
+            "X-Rate-Limit-Reset": str(budget_reset),
+        }
+        return headers, allowed
+
+    def __device(self, id: str) -> Dict[str, Any]:
+        for device in self.account.devices:
+            if device["id"] == id:
+                return device
+        raise _NotFound
+
+    def __appliance(self, id: str) -> Dict[str, Any]:
+        for appliance in self.account.appliances:
+            if appliance["id"] == id:
+                return appliance
+        raise _NotFound
+
+    def __signal(self, id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        for appliance in self.account.appliances:
+            for signal in appliance["signals"]:
+                if signal["id"] == id:
+                    return appliance, signal
+        raise _NotFound
+
+    def __get_user(self):
+        return self.account.user
+
+    def __update_user(self, form):
+        self.account.user["nickname"] = form.get("nickname", "")
+        return self.account.user
+
+    def __get_devices(self):
+        return self.account.devices
+
+    def __update_device(self, id, form):
+        device = self.__device(id)
+        device["name"] = form.get("name", device["name"])
+        device["updated_at"] = _now()
+        return device
+
+    def __delete_device(self, id, form):
+        self.account.devices.remove(self.__device(id))
+        return {}
+
+    def __update_offset(self, id, name, form):
+        device = self.__device(id)
+        device[name] = int(form.get("offset", 0))
+        device["updated_at"] = _now()
+        return device
+
+    def __detect_appliance(self, form):
+        return self.account.detected
+
+    def __get_appliances(self):
+        return self.account.appliances
+
+    def __create_appliance(self, form):
+        core = dict(self.__device(form.get("device", "")))
+        core.pop("newest_events", None)
+        appliance = {
+            "id": str(uuid.uuid4()),
+            "device": core,
+            "model": None,
+            "nickname": form.get("nickname", ""),
+            "image": form.get("image", ""),
+            "type": "IR",
+            "settings": None,
+            "aircon": None,
+            "signals": [],
+        }
+        self.account.appliances.append(appliance)
+        return appliance
+
+    def __update_appliance_orders(self, form):
+        order = form.get("appliances", "").split(",")
+        self.account.appliances.sort(
+            key=lambda a: order.index(a["id"]) if a["id"] in order else -1
+        )
+        return {}
+
+    def __update_appliance(self, id, form):
+        appliance = self.__appliance(id)
+        for key in ("nickname", "image"):
+            if key in form:
+                appliance[key] = form[key]
+        return appliance
+
+    def __delete_appliance(self, id, form):
+        self.account.appliances.remove(self.__appliance(id))
+        return {}
+
+    def __update_aircon_settings(self, id, form):
+        appliance = self.__appliance(id)
+        settings = appliance.get("settings") or {}
+        for key, value in form.items():
+            if key in _AIRCON_SETTINGS:
+                settings[_AIRCON_SETTINGS[key]] = value
+        appliance["settings"] = settings
+        return settings
+
+    def __send_button(self, id, type, form):
+        appliance = self.__appliance(id)
+        state = appliance.setdefault(type, {"buttons": []}).setdefault(
+            "state", {}
+        )
+        if type == "light":
+            state["last_button"] = form.get("button", "")
+        return state
+
+    def __get_signals(self, id):
+        return self.__appliance(id)["signals"]
+
+    def __create_signal(self, id, form):
+        signal = {
+            "id": str(uuid.uuid4()),
+            "name": form.get("name", ""),
+            "image": form.get("image", ""),
+        }
+        self.__appliance(id)["signals"].append(signal)
+        return signal
+
+    def __update_signal_orders(self, id, form):
+        order = form.get("signals", "").split(",")
+        self.__appliance(id)["signals"].sort(
+            key=lambda s: order.index(s["id"]) if s["id"] in order else -1
+        )
+        return {}
+
+    def __update_signal(self, id, form):
+        _, signal = self.__signal(id)
+        for key in ("name", "image"):
+            if key in form:
+                signal[key] = form[key]
+        return signal
+
+    def __delete_signal(self, id, form):
+        appliance, signal = self.__signal(id)
+        appliance["signals"].remove(signal)
+        return {}
+
+    def __send_signal(self, id, form):
+        self.__signal(id)
+        return {}
+
+
+def _error(status: int) -> bytes:
+    message = HTTPStatus(status).phrase
+    return _dumps({"code": status * 1000 + 1, "message": message})
+
+
+def _dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", default=8080)
+@click.option("--testdata", default=None, help="Serve the fixtures in PATH.")
+@click.option("--appliances", default=100, help="Synthetic appliances.")
+@click.option("--devices", default=1, help="Synthetic devices.")
+@click.option("--signals", default=5, help="Signals per appliance.")
+@click.option("--latency", default=0.0, help="Seconds added per request.")
+@click.option("--jitter", default=0.0, help="Maximum random extra latency.")
+@click.option("--error-rate", default=0.0, help="Share of failed requests.")
+@click.option("--rate-limit", default=DEFAULT_RATE_LIMIT)
+@click.option("--window", default=DEFAULT_WINDOW)
+@click.option("--seed", default=None, type=int)
+def main(
+    host: str,
+    port: int,
+    testdata: Optional[str],
+    appliances: int,
+    devices: int,
+    signals: int,
+    latency: float,
+    jitter: float,
+    error_rate: float,
+    rate_limit: int,
+    window: int,
+    seed: Optional[int],
+):
+    """Serve a stand-in Nature Remo cloud API."""
+    if testdata:
+        account = Account.from_fixtures(testdata)
+    else:
+        account = Account.synthetic(appliances, devices, signals, seed)
+    server = FakeCloudServer(
+        account,
+        host=host,
+        port=port,
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+        rate_limit=rate_limit,
+        window=window,
+        seed=seed,
+    )
+    click.echo(f"Serving on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
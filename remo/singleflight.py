@@ -0,0 +1,62 @@
+import threading
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one.
+
+    While a call for a key is in flight, other threads calling do() with the
+    same key wait for it and receive its result (or exception) instead of
+    making their own call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Call fn, or wait for the in-flight call made for key.
+
+        Args:
+            key: Identifies calls that are interchangeable.
+            fn: Function making the call.
+
+        Returns:
+            The value returned by fn.
+        """
+        with self._lock:
+            existing = self._calls.get(key)
+            leader = existing is None
+            if existing is None:
+                call = self._calls[key] = _Call()
+            else:
+                call = existing
+                call.waiters += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -0,0 +1,105 @@
+import json
+import re
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+from typing import List
+
+from .errors import NatureRemoError
+
+_STRUCTURAL = re.compile(rb'[\[\]{}",]')
+_STRING = re.compile(rb'["\\]')
+
+
+class JSONArrayDecoder:
+    """Incrementally decodes the elements of a JSON array.
+
+    Bytes are fed as they arrive and every element is decoded as soon as it
+    is complete. Only the element being received is buffered, so memory use
+    is bounded by the largest element rather than by the whole array.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0  # Next byte to scan.
+        self._start = 0  # First byte of the current element.
+        self._depth = 0
+        self._in_string = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add the next piece of the document.
+
+        Args:
+            chunk: Bytes following those fed so far.
+
+        Returns:
+            The elements completed by chunk, decoded.
+        """
+        buf = self._buf
+        buf += chunk
+        elements = []
+        while not self.done:
+            if self._in_string:
+                m = _STRING.search(buf, self._pos)
+                if m is None:
+                    self._pos = len(buf)
+                    break
+                if m.group() == b"\\":
+                    if m.end() == len(buf):
+                        # Wait for the escaped character.
+                        self._pos = m.start()
+                        break
+                    self._pos = m.end() + 1
+                    continue
+                self._in_string = False
+                self._pos = m.end()
+                continue
+
+            m = _STRUCTURAL.search(buf, self._pos)
+            if m is None:
+                self._pos = len(buf)
+                break
+            c, end, self._pos = m.group(), m.start(), m.end()
+            if c == b'"':
+                self._in_string = True
+            elif c in b"[{":
+                self._depth += 1
+                if self._depth == 1:
+                    if c != b"[" or buf[:end].strip():
+                        raise NatureRemoError("Expected a JSON array")
+                    self._start = self._pos
+            elif self._depth == 1 and c in b",]":
+                start = self._start
+                element = buf[start:end]
+                if c == b"," or element.strip():
+                    elements.append(json.loads(element))
+                if c == b"]":
+                    self.done = True
+                    self._depth = 0
+                del buf[: self._pos]
+                self._pos = self._start = 0
+            elif c in b"]}":
+                self._depth -= 1
+        return elements
+
+    def close(self):
+        """Check that the whole array has been fed."""
+        if not self.done:
+            raise NatureRemoError("Incomplete JSON array")
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Decode the elements of a JSON array as its bytes arrive.
+
+    Args:
+        chunks: Successive pieces of a JSON document whose top-level value is
+          an array.
+
+    Yields:
+        Each element of the array, decoded.
+    """
+    decoder = JSONArrayDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    decoder.close()
@@ -0,0 +1,271 @@
+import abc
+import json
+import os
+import re
+import threading
+from http import HTTPStatus
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Pattern
+from typing import Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+def create_session(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    keep_alive: bool = True,
+) -> requests.Session:
+    """Create an HTTP session backed by a keep-alive connection pool.
+
+    The returned session can be passed to several clients so that they share
+    the same pooled connections.
+
+    Args:
+        pool_connections: Number of per-host connection pools to cache.
+        pool_maxsize: Maximum number of connections kept open per host.
+        keep_alive: If False, every connection is closed after its response
+          is read.
+
+    Returns:
+        A requests.Session object.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+class Transport(abc.ABC):
+    """Sends the HTTP requests of the API clients.
+
+    Subclasses implement send(), raising requests.RequestException for
+    failures that did not produce a response.
+    """
+
+    @abc.abstractmethod
+    def send(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        data: Any = None,
+        stream: bool = False,
+    ) -> requests.models.Response:
+        """Send a request.
+
+        Args:
+            method: HTTP method, "GET" or "POST".
+            url: URL of the request.
+            headers: Request headers.
+            data: Form fields as a dict, or the request body as a str.
+            stream: Whether the body may be read incrementally.
+
+        Returns:
+            A requests.models.Response object.
+        """
+
+    def close(self):
+        """Release the resources held by the transport."""
+        pass
+
+
+class HTTPTransport(Transport):
+    """Transport sending requests over the network with requests.
+
+    Args:
+        session: Session to send requests through. If omitted, the transport
+          creates its own pooled session, which is closed by close().
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None):
+        self._owns_session = session is None
+        self.session = create_session() if session is None else session
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        data: Any = None,
+        stream: bool = False,
+    ) -> requests.models.Response:
+        return self.session.request(
+            method, url, headers=dict(headers), data=data, stream=stream
+        )
+
+    def close(self):
+        if self._owns_session:
+            self.session.close()
+
+
+class FakeRequest(NamedTuple):
+    method: str
+    url: str
+    headers: Mapping[str, str]
+    data: Any
+
+
+class _Route(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    error: Optional[requests.RequestException]
+
+
+def _compile(path: str) -> Pattern:
+    # "*" matches one path segment, e.g. "/1/appliances/*/signals".
+    return re.compile(
+        "^" + "[^/]+".join(re.escape(p) for p in path.split("*")) + "$"
+    )
+
+
+class FakeTransport(Transport):
+    """Transport serving canned responses from memory.
+
+    Responses are registered per method and path and encoded once, so
+    sending a request costs little more than building the Response object.
+    This makes it suitable for tests and for benchmarking the client stack
+    without the network or a mocking library.
+
+    Every request is recorded in the requests attribute.
+    """
+
+    def __init__(self):
+        self.requests: List[FakeRequest] = []
+        self._lock = threading.Lock()
+        self._exact: Dict[Tuple[str, str], _Route] = {}
+        self._patterns: List[Tuple[str, Pattern, _Route]] = []
+
+    def add(
+        self,
+        method: str,
+        path: str,
+        status: int = 200,
+        json: Any = None,
+        body: bytes = b"",
+        headers: Mapping[str, str] = None,
+        error: requests.RequestException = None,
+    ):
+        """Register the response to a request.
+
+        Args:
+            method: HTTP method, "GET" or "POST".
+            path: Path of the URL. "*" matches any single path segment.
+            status: Status code of the response.
+            json: Object sent JSON encoded as the body.
+            body: Body of the response, if json is not given.
+            headers: Headers of the response.
+            error: Exception raised instead of returning a response.
+        """
+        headers = dict(headers or {})
+        if json is not None:
+            body = _json_dumps(json)
+            headers.setdefault("Content-Type", "application/json")
+        route = _Route(status, headers, body, error)
+        if "*" in path:
+            self._patterns.append((method, _compile(path), route))
+        else:
+            self._exact[(method, path)] = route
+
+    def __route(self, method: str, path: str) -> Optional[_Route]:
+        route = self._exact.get((method, path))
+        if route is None:
+            for m, pattern, r in self._patterns:
+                if m == method and pattern.match(path):
+                    return r
+        return route
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        data: Any = None,
+        stream: bool = False,
+    ) -> requests.models.Response:
+        with self._lock:
+            self.requests.append(FakeRequest(method, url, headers, data))
+        route = self.__route(method, urlsplit(url).path)
+        if route is None:
+            route = _Route(404, {}, b"", None)
+        if route.error is not None:
+            raise route.error
+
+        resp = requests.models.Response()
+        resp.status_code = route.status
+        resp.reason = HTTPStatus(route.status).phrase
+        resp.headers = CaseInsensitiveDict(route.headers)
+        resp.url = url
+        resp.encoding = "utf-8"
+        # The body is already in memory, so set it as requests does once it
+        # has read a body.
+        resp._content = route.body  # type: ignore
+        resp._content_consumed = True  # type: ignore
+        return resp
+
+    @classmethod
+    def from_fixtures(cls, path: str = "testdata") -> "FakeTransport":
+        """Create a transport serving every endpoint from JSON fixtures.
+
+        Args:
+            path: Directory holding the fixtures, such as the testdata
+              directory of this repository.
+
+        Returns:
+            A FakeTransport object.
+        """
+
+        def load(name):
+            with open(os.path.join(path, f"{name}.json")) as f:
+                return json.load(f)
+
+        user = load("user")
+        appliance = load("appliance")
+        signal = load("signal")
+        detected = [load("appliance_model_and_params")]
+        transport = cls()
+        for method, route, response in [
+            ("GET", "/1/users/me", user),
+            ("POST", "/1/users/me", user),
+            ("GET", "/1/devices", [load("device")]),
+            ("POST", "/1/detectappliance", detected),
+            ("GET", "/1/appliances", [appliance, load("appliance_minimal")]),
+            ("POST", "/1/appliances", appliance),
+            ("POST", "/1/appliances/*", appliance),
+            ("GET", "/1/appliances/*/signals", [signal]),
+            ("POST", "/1/appliances/*/signals", signal),
+            ("GET", "/messages", load("ir_signal")),
+        ]:
+            transport.add(method, route, json=response)
+        for route in [
+            "/1/devices/*",
+            "/1/devices/*/*",
+            "/1/appliance_orders",
+            "/1/appliances/*/*",
+            "/1/signals/*",
+            "/1/signals/*/*",
+            "/messages",
+        ]:
+            transport.add("POST", route)
+        return transport
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode()
@@ -39,5 +39,6 @@ setuptools.setup(
         "requests==2.24.0",
         "click==7.1.2",
     ],
+    extras_require={"async": ["httpx==0.28.1"], "numpy": ["numpy==1.24.4"]},
     entry_points={"console_scripts": ["remo = remo.cli:main"]},
 )
@@ -0,0 +1,355 @@
+import asyncio
+import inspect
+import urllib.parse
+
+import pytest
+
+from .utils import load_json
+from remo import Appliance
+from remo import ApplianceModelAndParams
+from remo import Device
+from remo import IRSignal
+from remo import NatureRemoError
+from remo import Signal
+from remo import User
+from remo.api import BASE_URL
+
+httpx = pytest.importorskip("httpx")
+from remo.aio import AsyncNatureRemoAPI  # noqa: E402
+from remo.aio import AsyncNatureRemoLocalAPI  # noqa: E402
+from remo.aio import create_async_client  # noqa: E402
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class MockServer:
+    """Serves canned responses keyed by method and path."""
+
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+
+    def add(self, method, path, status=200, json=None, headers=None):
+        self.routes[(method, path)] = (status, json, headers or {})
+
+    def handler(self, request):
+        self.calls.append(request)
+        status, json, headers = self.routes[(request.method, request.url.path)]
+        return httpx.Response(status, json=json, headers=headers)
+
+    def api(self, access_token="access_token"):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return AsyncNatureRemoAPI(access_token, client=client)
+
+
+@pytest.fixture
+def server():
+    return MockServer()
+
+
+class TestAsyncAPI:
+    def test_rate_limit_after_request(self, server):
+        server.add(
+            "GET",
+            "/1/users/me",
+            json=load_json("testdata/user.json"),
+            headers={
+                "X-Rate-Limit-Limit": "30",
+                "X-Rate-Limit-Remaining": "29",
+                "X-Rate-Limit-Reset": "1595920800",
+            },
+        )
+        api = server.api()
+
+        run(api.get_user())
+
+        assert api.rate_limit.limit == 30
+        assert api.rate_limit.remaining == 29
+
+    def test_unauthorized(self, server):
+        server.add(
+            "GET",
+            "/1/users/me",
+            status=401,
+            json={"code": 401001, "message": "Unauthorized"},
+        )
+
+        with pytest.raises(NatureRemoError) as excinfo:
+            run(server.api().get_user())
+        assert (
+            str(excinfo.value)
+            == "HTTP Status Code: 401, "
+            + "Nature Remo Code: 401001, Message: Unauthorized"
+        )
+
+    def test_get_user(self, server):
+        data = load_json("testdata/user.json")
+        server.add("GET", "/1/users/me", json=data)
+
+        user = run(server.api().get_user())
+
+        assert type(user) is User
+        assert user.id == data["id"]
+        assert str(server.calls[0].url) == f"{BASE_URL}/1/users/me"
+        assert server.calls[0].headers["Authorization"] == (
+            "Bearer access_token"
+        )
+
+    def test_get_devices(self, server):
+        server.add(
+            "GET", "/1/devices", json=[load_json("testdata/device.json")]
+        )
+
+        devices = run(server.api().get_devices())
+
+        assert len(devices) == 1
+        assert all(type(d) is Device for d in devices)
+
+    def test_get_appliances(self, server):
+        server.add(
+            "GET",
+            "/1/appliances",
+            json=[
+                load_json("testdata/appliance.json"),
+                load_json("testdata/appliance_minimal.json"),
+            ],
+        )
+
+        appliances = run(server.api().get_appliances())
+
+        assert len(appliances) == 2
+        assert all(type(a) is Appliance for a in appliances)
+
+    def test_iter_appliances(self, server):
+        data = [
+            load_json("testdata/appliance.json"),
+            load_json("testdata/appliance_minimal.json"),
+        ]
+        server.add("GET", "/1/appliances", json=data)
+
+        async def main():
+            api = server.api()
+            return [a async for a in api.iter_appliances(chunk_size=16)]
+
+        appliances = run(main())
+
+        assert [a.id for a in appliances] == [d["id"] for d in data]
+        assert all(type(a) is Appliance for a in appliances)
+
+    def test_detect_appliance(self, server):
+        server.add(
+            "POST",
+            "/1/detectappliance",
+            json=[load_json("testdata/appliance_model_and_params.json")],
+        )
+        message = '{"format": "us", "freq": 38, "data": [0]}'
+
+        result = run(server.api().detect_appliance(message))
+
+        assert type(result[0]) is ApplianceModelAndParams
+        assert (
+            server.calls[0].content
+            == urllib.parse.urlencode({"message": message}).encode()
+        )
+
+    def test_create_signal(self, server):
+        data = load_json("testdata/signal.json")
+        server.add("POST", "/1/appliances/appliance-id/signals", json=data)
+
+        signal = run(
+            server.api().create_signal(
+                "appliance-id", data["name"], "{}", data["image"]
+            )
+        )
+
+        assert type(signal) is Signal
+        assert signal.id == data["id"]
+
+    def test_update_aircon_settings(self, server):
+        server.add("POST", "/1/appliances/appliance-id/aircon_settings")
+
+        run(
+            server.api().update_aircon_settings(
+                "appliance-id", operation_mode="cool", temperature="27"
+            )
+        )
+
+        assert server.calls[0].content == b"operation_mode=cool&temperature=27"
+
+    def test_update_temperature_offset(self, server):
+        server.add("POST", "/1/devices/device-id/temperature_offset")
+
+        run(server.api().update_temperature_offset("device-id", 10))
+
+        assert server.calls[0].content == b"offset=10"
+
+    def test_send_signal_raises(self, server):
+        server.add(
+            "POST",
+            "/1/signals/signal-id/send",
+            status=400,
+            json={"code": 123456, "message": "Bad Request"},
+        )
+
+        with pytest.raises(NatureRemoError) as excinfo:
+            run(server.api().send_signal("signal-id"))
+        assert (
+            str(excinfo.value)
+            == "HTTP Status Code: 400, "
+            + "Nature Remo Code: 123456, Message: Bad Request"
+        )
+
+    def test_concurrent_requests(self, server):
+        server.add("GET", "/1/users/me", json=load_json("testdata/user.json"))
+
+        async def main():
+            async with server.api() as api:
+                return await asyncio.gather(
+                    *(api.get_user() for _ in range(200))
+                )
+
+        users = run(main())
+
+        assert len(users) == 200
+        assert len(server.calls) == 200
+
+    def test_method_parity(self):
+        from remo import NatureRemoAPI
+
+        public = {m for m in dir(NatureRemoAPI) if not m.startswith("_")}
+        public -= {"close", "session"}
+
+        assert public <= set(dir(AsyncNatureRemoAPI))
+        for name in public:
+            method = getattr(AsyncNatureRemoAPI, name)
+            assert inspect.iscoroutinefunction(method) or (
+                inspect.isasyncgenfunction(method)
+            )
+
+    def test_shared_client_left_open(self, server):
+        client = create_async_client(max_connections=10)
+
+        async def main():
+            async with AsyncNatureRemoAPI("token", client=client):
+                pass
+
+        run(main())
+
+        assert not client.is_closed
+        run(client.aclose())
+
+
+class MockRemos:
+    """Emulates the /messages endpoint of several Remos."""
+
+    def __init__(self, delay=0.0, failing=(), bodies=None):
+        self.delay = delay
+        self.failing = set(failing)
+        self.bodies = bodies or {}
+        self.calls = []
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self.max_in_flight_total = 0
+
+    async def handler(self, request):
+        host = request.url.host
+        self.calls.append(request)
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        self.max_in_flight[host] = max(
+            self.max_in_flight.get(host, 0), self.in_flight[host]
+        )
+        self.max_in_flight_total = max(
+            self.max_in_flight_total, sum(self.in_flight.values())
+        )
+        await asyncio.sleep(self.delay)
+        self.in_flight[host] -= 1
+        if host in self.failing:
+            return httpx.Response(500)
+        if host in self.bodies:
+            return httpx.Response(200, content=self.bodies[host])
+        if request.method == "GET":
+            return httpx.Response(
+                200, json=load_json("testdata/ir_signal.json")
+            )
+        return httpx.Response(200)
+
+    def api(self, addrs, **kwargs):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return AsyncNatureRemoLocalAPI(addrs, client=client, **kwargs)
+
+
+class TestAsyncLocalAPI:
+    def test_get_ir_signal(self):
+        remos = MockRemos()
+        data = load_json("testdata/ir_signal.json")
+
+        ir_signal = run(remos.api(["10.0.0.1"]).get_ir_signal("10.0.0.1"))
+
+        assert type(ir_signal) is IRSignal
+        assert ir_signal.data == data["data"]
+        assert str(remos.calls[0].url) == "http://10.0.0.1/messages"
+
+    def test_send_ir_signals_fan_out(self):
+        remos = MockRemos(delay=0.05)
+        addrs = [f"10.0.0.{i}" for i in range(1, 21)]
+        message = '{"format": "us", "freq": 38, "data": [0]}'
+
+        results = run(remos.api(addrs).send_ir_signals(message))
+
+        assert set(results) == set(addrs)
+        assert all(r.ok for r in results.values())
+        assert all(c.content == message.encode() for c in remos.calls)
+        # Every Remo was sent to before any of them answered.
+        assert remos.max_in_flight_total == len(addrs)
+
+    def test_per_device_results_and_errors(self):
+        remos = MockRemos(failing={"10.0.0.2"})
+        api = remos.api(["10.0.0.1", "10.0.0.2"])
+
+        results = run(api.get_ir_signals())
+
+        assert results["10.0.0.1"].ok
+        assert type(results["10.0.0.1"].value) is IRSignal
+        assert not results["10.0.0.2"].ok
+        assert str(results["10.0.0.2"].error) == "500 Internal Server Error"
+
+    @pytest.mark.parametrize(
+        "body", [b"<html></html>", b'{"format": "us"}', b"[]"]
+    )
+    def test_per_device_invalid_body(self, body):
+        remos = MockRemos(bodies={"10.0.0.2": body})
+        api = remos.api(["10.0.0.1", "10.0.0.2"])
+
+        results = run(api.get_ir_signals())
+
+        assert results["10.0.0.1"].ok
+        assert type(results["10.0.0.1"].value) is IRSignal
+        assert not results["10.0.0.2"].ok
+        assert type(results["10.0.0.2"].error) is NatureRemoError
+        assert str(results["10.0.0.2"].error).startswith(
+            "Invalid IR signal from 10.0.0.2: "
+        )
+
+    def test_per_device_messages(self):
+        remos = MockRemos()
+        api = remos.api([])
+
+        run(api.send_ir_signals({"10.0.0.1": "a", "10.0.0.2": "b"}))
+
+        assert {(c.url.host, c.content) for c in remos.calls} == {
+            ("10.0.0.1", b"a"),
+            ("10.0.0.2", b"b"),
+        }
+
+    def test_per_device_concurrency_limit(self):
+        remos = MockRemos(delay=0.01)
+        api = remos.api(["10.0.0.1", "10.0.0.2"], max_concurrency_per_device=2)
+
+        async def main():
+            await asyncio.gather(*(api.get_ir_signals() for _ in range(5)))
+
+        run(main())
+
+        assert remos.max_in_flight == {"10.0.0.1": 2, "10.0.0.2": 2}
@@ -2,11 +2,13 @@ import urllib.parse
 from datetime import datetime
 
 import pytest
+import requests
 import responses
 
 from .utils import load_json
 from remo import Appliance
 from remo import ApplianceModelAndParams
+from remo import create_session
 from remo import Device
 from remo import IRSignal
 from remo import NatureRemoAPI
@@ -288,6 +290,36 @@ class TestAPI:
         assert len(appliances) == 1
         assert all(type(a) is Appliance for a in appliances)
 
+    @responses.activate
+    def test_iter_appliances(self, api):
+        data = [
+            load_json("testdata/appliance.json"),
+            load_json("testdata/appliance_minimal.json"),
+        ]
+        url = f"{BASE_URL}/1/appliances"
+        responses.add(
+            responses.GET, url, json=data, status=200,
+        )
+
+        appliances = api.iter_appliances(chunk_size=16)
+        first = next(appliances)
+
+        assert type(first) is Appliance
+        assert first.id == data[0]["id"]
+        assert [a.id for a in appliances] == [data[1]["id"]]
+
+    @responses.activate
+    def test_iter_appliances_raises(self, api):
+        responses.add(
+            responses.GET,
+            f"{BASE_URL}/1/appliances",
+            json={"code": 401001, "message": "Unauthorized"},
+            status=401,
+        )
+
+        with pytest.raises(NatureRemoError):
+            api.iter_appliances()
+
     @responses.activate
     def test_create_appliance(self, api):
         data = load_json("testdata/appliance_minimal.json")
@@ -826,3 +858,65 @@ class TestLocalAPI:
         assert len(responses.calls) == 1
         assert responses.calls[0].request.url == url
         assert responses.calls[0].request.body == message
+
+
+class TestSession:
+    def test_creates_own_session(self):
+        api = NatureRemoAPI("access_token")
+
+        assert isinstance(api.session, requests.Session)
+        assert api.session.get_adapter(BASE_URL)._pool_maxsize == 10
+
+    def test_create_session_options(self):
+        session = create_session(
+            pool_connections=2, pool_maxsize=4, keep_alive=False
+        )
+        adapter = session.get_adapter(BASE_URL)
+
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 4
+        assert session.headers["Connection"] == "close"
+
+    @responses.activate
+    def test_shared_session(self):
+        responses.add(
+            responses.GET,
+            f"{BASE_URL}/1/users/me",
+            json=load_json("testdata/user.json"),
+            status=200,
+        )
+        session = create_session()
+        api1 = NatureRemoAPI("token1", session=session)
+        api2 = NatureRemoAPI("token2", session=session)
+
+        api1.get_user()
+        api2.get_user()
+
+        assert api1.session is api2.session
+        assert len(responses.calls) == 2
+        assert responses.calls[0].request.headers["Authorization"] == (
+            "Bearer token1"
+        )
+        assert responses.calls[1].request.headers["Authorization"] == (
+            "Bearer token2"
+        )
+
+    def test_close_owned_session(self, monkeypatch):
+        api = NatureRemoAPI("access_token")
+        closed = []
+        monkeypatch.setattr(api.session, "close", lambda: closed.append(1))
+
+        with api as entered:
+            assert entered is api
+
+        assert closed == [1]
+
+    def test_close_leaves_shared_session_open(self, monkeypatch):
+        session = create_session()
+        closed = []
+        monkeypatch.setattr(session, "close", lambda: closed.append(1))
+
+        with NatureRemoLocalAPI("192.168.1.1", session=session):
+            pass
+
+        assert closed == []
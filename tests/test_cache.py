@@ -0,0 +1,356 @@
+import random
+import threading
+from urllib.parse import quote_plus
+
+import pytest
+import responses
+
+from .utils import load_json
+from remo import DetectionCache
+from remo import IRSignal
+from remo import NatureRemoAPI
+from remo import NatureRemoError
+from remo import ResponseCache
+from remo.api import BASE_URL
+from remo.protocols import aeha_frame
+from remo.protocols import encode
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    return ResponseCache(ttl={"appliances": 10}, clock=clock)
+
+
+@pytest.fixture
+def api(cache):
+    return NatureRemoAPI("access_token", cache=cache)
+
+
+def add_appliances():
+    responses.add(
+        responses.GET,
+        f"{BASE_URL}/1/appliances",
+        json=[load_json("testdata/appliance.json")],
+        status=200,
+    )
+
+
+def aircon(temp, seed=0, jitter=0.1):
+    """A capture of an air conditioner remote set to temp."""
+    rng = random.Random(seed)
+    signal = encode(aeha_frame(bytes([0x23, 0xCB, 0x26, 0x01, temp])), 2)
+    data = [
+        round(t * rng.uniform(1 - jitter, 1 + jitter)) for t in signal.data
+    ]
+    return IRSignal(signal.freq, data, signal.format)
+
+
+def add_devices():
+    responses.add(
+        responses.GET,
+        f"{BASE_URL}/1/devices",
+        json=[load_json("testdata/device.json")],
+        status=200,
+    )
+
+
+class TestResponseCache:
+    def test_ttl(self, cache, clock):
+        cache.set("appliances", "/1/appliances", [], 0)
+
+        clock.now = 9.9
+        assert cache.get("appliances", "/1/appliances") == []
+        clock.now = 10
+        assert cache.get("appliances", "/1/appliances") is None
+
+    def test_lru_eviction(self, clock):
+        cache = ResponseCache(maxsize=2, clock=clock)
+        cache.set("signals", "a", 1, 0)
+        cache.set("signals", "b", 2, 0)
+        cache.get("signals", "a")
+        cache.set("signals", "c", 3, 0)
+
+        assert len(cache) == 2
+        assert cache.get("signals", "a") == 1
+        assert cache.get("signals", "b") is None
+
+    def test_stale_fill_is_dropped(self, cache):
+        generation = cache.generation("devices")
+        cache.invalidate("devices")
+        cache.set("devices", "/1/devices", [], generation)
+
+        assert cache.get("devices", "/1/devices") is None
+
+
+class TestAPIWithCache:
+    @responses.activate
+    def test_get_appliances_cached(self, api, clock):
+        add_appliances()
+
+        first = api.get_appliances()
+        second = api.get_appliances()
+        clock.now = 10
+        api.get_appliances()
+
+        assert len(responses.calls) == 2
+        assert first[0].id == second[0].id
+        assert first[0] is not second[0]
+
+    @responses.activate
+    def test_cached_per_token(self, cache):
+        for name in ("alice", "bob"):
+            responses.add(
+                responses.GET,
+                f"{BASE_URL}/1/users/me",
+                json={"id": name, "nickname": name},
+                status=200,
+            )
+        alice = NatureRemoAPI("token-alice", cache=cache)
+        bob = NatureRemoAPI("token-bob", cache=cache)
+
+        assert alice.get_user().nickname == "alice"
+        assert bob.get_user().nickname == "bob"
+        assert alice.get_user().nickname == "alice"
+        assert bob.get_user().nickname == "bob"
+        assert [
+            call.request.headers["Authorization"] for call in responses.calls
+        ] == ["Bearer token-alice", "Bearer token-bob"]
+
+    @responses.activate
+    def test_signals_cached_per_appliance(self, api):
+        for appliance in ("a1", "a2"):
+            responses.add(
+                responses.GET,
+                f"{BASE_URL}/1/appliances/{appliance}/signals",
+                json=[load_json("testdata/signal.json")],
+                status=200,
+            )
+
+        api.get_signals("a1")
+        api.get_signals("a2")
+        api.get_signals("a1")
+
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_errors_not_cached(self, api):
+        responses.add(
+            responses.GET,
+            f"{BASE_URL}/1/users/me",
+            json={"code": 401001, "message": "Unauthorized"},
+            status=401,
+        )
+
+        for _ in range(2):
+            with pytest.raises(NatureRemoError):
+                api.get_user()
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_offset_update_invalidates_devices(self, api):
+        add_devices()
+        responses.add(
+            responses.POST,
+            f"{BASE_URL}/1/devices/device-id/temperature_offset",
+            status=200,
+        )
+
+        api.get_devices()
+        api.update_temperature_offset("device-id", 1)
+        api.get_devices()
+
+        assert len(responses.calls) == 3
+
+    @responses.activate
+    def test_delete_signal_invalidates_appliances(self, api):
+        add_appliances()
+        responses.add(
+            responses.POST,
+            f"{BASE_URL}/1/signals/signal-id/delete",
+            status=200,
+        )
+
+        api.get_appliances()
+        api.delete_signal("signal-id")
+        api.get_appliances()
+
+        assert len(responses.calls) == 3
+
+    @responses.activate
+    def test_failed_write_invalidates(self, api):
+        add_appliances()
+        responses.add(
+            responses.POST,
+            f"{BASE_URL}/1/appliance_orders",
+            json={"code": 123456, "message": "Bad Request"},
+            status=400,
+        )
+
+        api.get_appliances()
+        with pytest.raises(NatureRemoError):
+            api.update_appliance_orders("a1,a2")
+        api.get_appliances()
+
+        assert len(responses.calls) == 3
+
+    @responses.activate
+    def test_send_signal_keeps_cache(self, api):
+        add_appliances()
+        responses.add(
+            responses.POST, f"{BASE_URL}/1/signals/signal-id/send", status=200
+        )
+
+        api.get_appliances()
+        api.send_signal("signal-id")
+        api.get_appliances()
+
+        assert len(responses.calls) == 2
+
+
+class TestDetectionCache:
+    @pytest.fixture
+    def cache(self):
+        with DetectionCache(":memory:") as cache:
+            yield cache
+
+    def test_jitter(self, cache):
+        cache.set(aircon(24), ["24"])
+
+        for seed in range(1, 10):
+            assert cache.get(aircon(24, seed=seed)) == ["24"]
+        assert cache.get(aircon(25)) is None
+        assert len(cache) == 1
+
+    def test_message(self, cache):
+        cache.set(aircon(24).as_message(), ["24"])
+
+        assert cache.get(aircon(24, seed=1).as_message()) == ["24"]
+        assert cache.get(aircon(24, seed=2)) == ["24"]
+
+    @pytest.mark.parametrize("message", ["", "{}", "[1]", '{"data": 1}'])
+    def test_invalid_message(self, cache, message):
+        cache.set(message, ["24"])
+
+        assert cache.get(message) is None
+        assert len(cache) == 0
+
+    def test_scale(self, cache):
+        # Same fingerprint, but timings twice as long.
+        signal = aircon(24, jitter=0)
+        slow = IRSignal(38, [2 * t for t in signal.data], "us")
+        cache.set(signal, ["fast"])
+        cache.set(slow, ["slow"])
+
+        assert len(cache) == 2
+        assert cache.get(aircon(24, seed=1)) == ["fast"]
+        assert cache.get(slow) == ["slow"]
+
+    def test_replace(self, cache):
+        cache.set(aircon(24), ["old"])
+        cache.set(aircon(24, seed=1), ["new"])
+
+        assert len(cache) == 1
+        assert cache.get(aircon(24)) == ["new"]
+
+    def test_lru_eviction(self):
+        cache = DetectionCache(":memory:", maxsize=2)
+        cache.set(aircon(20), [20])
+        cache.set(aircon(21), [21])
+        cache.get(aircon(20))
+        cache.set(aircon(22), [22])
+
+        assert len(cache) == 2
+        assert cache.get(aircon(20)) == [20]
+        assert cache.get(aircon(21)) is None
+        assert cache.get(aircon(22)) == [22]
+
+    def test_persistent(self, tmp_path):
+        path = tmp_path / "detections.db"
+        with DetectionCache(path) as cache:
+            cache.set(aircon(24), ["24"])
+
+        with DetectionCache(path) as cache:
+            assert cache.get(aircon(24, seed=1)) == ["24"]
+            cache.clear()
+
+        with DetectionCache(path) as cache:
+            assert len(cache) == 0
+
+    def test_threads(self, cache):
+        def fill(temp):
+            for seed in range(10):
+                cache.set(aircon(temp, seed=seed), [temp])
+                assert cache.get(aircon(temp, seed=seed + 1)) == [temp]
+
+        threads = [threading.Thread(target=fill, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(cache) == 8
+
+
+class TestAPIWithDetectionCache:
+    @pytest.fixture
+    def api(self):
+        with DetectionCache(":memory:") as cache:
+            yield NatureRemoAPI("access_token", detection_cache=cache)
+
+    def add_detect_appliance(self):
+        responses.add(
+            responses.POST,
+            f"{BASE_URL}/1/detectappliance",
+            json=[load_json("testdata/appliance_model_and_params.json")],
+            status=200,
+        )
+
+    @responses.activate
+    def test_detect_appliance_cached(self, api):
+        self.add_detect_appliance()
+
+        first = api.detect_appliance(aircon(24).as_message())
+        second = api.detect_appliance(aircon(24, seed=1))
+        api.detect_appliance(aircon(25))
+
+        assert len(responses.calls) == 2
+        assert first[0].model.id == second[0].model.id
+        assert first[0] is not second[0]
+
+    @responses.activate
+    def test_detect_appliance_signal(self, api):
+        self.add_detect_appliance()
+        signal = aircon(24)
+
+        api.detect_appliance(signal)
+
+        body = responses.calls[0].request.body
+        assert body == "message=" + quote_plus(signal.as_message())
+
+    @responses.activate
+    def test_errors_not_cached(self, api):
+        responses.add(
+            responses.POST,
+            f"{BASE_URL}/1/detectappliance",
+            json={"code": 401001, "message": "Unauthorized"},
+            status=401,
+        )
+
+        for _ in range(2):
+            with pytest.raises(NatureRemoError):
+                api.detect_appliance(aircon(24))
+        assert len(responses.calls) == 2
+        assert len(api.detection_cache) == 0
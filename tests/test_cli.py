@@ -170,6 +170,23 @@ class TestCLI:
             == f"message={urllib.parse.quote_plus(message)}"
         )
 
+    @responses.activate
+    def test_detect_appliance_cache(self, runner, set_token, tmp_path):
+        data = [load_json("testdata/appliance_model_and_params.json")]
+        url = f"{BASE_URL}/1/detectappliance"
+        responses.add(responses.POST, url, json=data, status=200)
+        cache = str(tmp_path / "detections.db")
+
+        for timing in (560, 570):
+            message = f'{{"format": "us", "freq": 38, "data": [{timing}]}}'
+            result = runner.invoke(
+                detect_appliance, ["--cache", cache, message]
+            )
+
+            assert result.exit_code == 0
+            assert result.output.strip() == dumps(data)
+        assert len(responses.calls) == 1
+
     @responses.activate
     def test_get_appliances(self, runner, set_token):
         data = [load_json("testdata/appliance.json")]
@@ -0,0 +1,127 @@
+import threading
+import time
+import urllib.parse
+
+import pytest
+import responses
+
+from remo import AirConSettingsQueue
+from remo import NatureRemoAPI
+from remo import NatureRemoError
+from remo.api import BASE_URL
+
+
+class RecordingAPI:
+    def __init__(self, delay=0.0, error=None, release=None):
+        self.delay = delay
+        self.error = error
+        self.release = release
+        self.entered = threading.Event()
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def update_aircon_settings(self, appliance, **settings):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.entered.set()
+        if self.release is not None:
+            self.release.wait(timeout=5)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+            self.calls.append((appliance, settings))
+        if self.error:
+            raise self.error
+
+
+class TestAirConSettingsQueue:
+    def test_merges_burst(self):
+        api = RecordingAPI()
+        with AirConSettingsQueue(api, window=0.05) as queue:
+            queue.submit("ac", operation_mode="cool")
+            queue.submit("ac", temperature="26")
+            queue.submit("ac", temperature="27", air_volume="auto")
+            future = queue.submit("ac", air_direction="swing")
+            future.result(timeout=1)
+
+        assert api.calls == [
+            (
+                "ac",
+                {
+                    "operation_mode": "cool",
+                    "temperature": "27",
+                    "air_volume": "auto",
+                    "air_direction": "swing",
+                },
+            )
+        ]
+
+    def test_appliances_sent_separately(self):
+        api = RecordingAPI()
+        with AirConSettingsQueue(api, window=0.05) as queue:
+            queue.submit("ac1", temperature="26")
+            queue.submit("ac2", temperature="20")
+
+        assert sorted(api.calls) == [
+            ("ac1", {"temperature": "26"}),
+            ("ac2", {"temperature": "20"}),
+        ]
+
+    def test_updates_during_send_follow_it(self):
+        release = threading.Event()
+        api = RecordingAPI(release=release)
+        queue = AirConSettingsQueue(api, window=0.01)
+
+        first = queue.submit("ac", temperature="26")
+        assert api.entered.wait(timeout=1)  # The first request is in flight.
+        queue.submit("ac", temperature="27")
+        last = queue.submit("ac", temperature="28")
+        release.set()
+        last.result(timeout=1)
+
+        assert first.done()
+        assert api.calls == [
+            ("ac", {"temperature": "26"}),
+            ("ac", {"temperature": "28"}),
+        ]
+        assert api.max_in_flight == 1
+
+    def test_errors_reach_every_merged_future(self):
+        api = RecordingAPI(error=NatureRemoError("boom"))
+        queue = AirConSettingsQueue(api, window=0.01)
+
+        futures = [queue.submit("ac", temperature=t) for t in ("26", "27")]
+        queue.flush()
+
+        for future in futures:
+            with pytest.raises(NatureRemoError):
+                future.result()
+
+    def test_flush_sends_immediately(self):
+        api = RecordingAPI()
+        queue = AirConSettingsQueue(api, window=60)
+
+        future = queue.submit("ac", temperature="26")
+        queue.flush()
+
+        assert future.done()
+        assert len(api.calls) == 1
+
+    @responses.activate
+    def test_with_api(self):
+        url = f"{BASE_URL}/1/appliances/appliance-id/aircon_settings"
+        responses.add(responses.POST, url, status=200)
+        api = NatureRemoAPI("access_token")
+
+        with AirConSettingsQueue(api, window=0.01) as queue:
+            queue.submit("appliance-id", operation_mode="warm")
+            queue.submit("appliance-id", temperature="22")
+
+        assert len(responses.calls) == 1
+        assert urllib.parse.parse_qs(responses.calls[0].request.body) == {
+            "operation_mode": ["warm"],
+            "temperature": ["22"],
+        }
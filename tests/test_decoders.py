@@ -0,0 +1,256 @@
+import copy
+
+import pytest
+from marshmallow import ValidationError
+
+from .utils import load_json
+from remo import Appliance
+from remo import ApplianceSchema
+from remo import DeviceSchema
+from remo import FakeTransport
+from remo import IRSignalSchema
+from remo import NatureRemoAPI
+from remo.decoders import LazyAppliance
+from remo.decoders import load_appliance
+from remo.decoders import load_appliances
+from remo.decoders import load_devices
+from remo.decoders import load_ir_signal
+from remo.server import Account
+
+
+def assert_same(fast, slow):
+    assert type(fast) is type(slow)
+    assert repr(fast) == repr(slow)
+    assert fast.as_json_string() == slow.as_json_string()
+
+
+def appliances():
+    account = Account.synthetic(appliances=8, seed=0)
+    return [
+        load_json("testdata/appliance.json"),
+        load_json("testdata/appliance_minimal.json"),
+    ] + account.appliances
+
+
+def devices():
+    return [load_json("testdata/device.json")] + Account.synthetic(
+        devices=2, seed=0
+    ).devices
+
+
+def break_(obj, path, value):
+    obj = copy.deepcopy(obj)
+    target = obj
+    for key in path[:-1]:
+        target = target[key]
+    if value is KeyError:
+        del target[path[-1]]
+    else:
+        target[path[-1]] = value
+    return obj
+
+
+def test_devices():
+    json = devices()
+    slow = DeviceSchema(many=True).load(json)
+    for fast, slow in zip(load_devices(json), slow):
+        assert_same(fast, slow)
+
+
+def test_appliances():
+    json = appliances()
+    slow = ApplianceSchema(many=True).load(json)
+    for fast, slow in zip(load_appliances(json), slow):
+        assert_same(fast, slow)
+    for obj in json:
+        assert_same(load_appliance(obj), ApplianceSchema().load(obj))
+
+
+def test_lazy_appliances():
+    json = appliances()
+    slow = ApplianceSchema(many=True).load(json)
+    lazy = load_appliances(json, lazy=True)
+    for lazy_, slow in zip(lazy, slow):
+        assert type(lazy_) is LazyAppliance
+        assert isinstance(lazy_, Appliance)
+        assert repr(lazy_) == repr(slow)
+        assert lazy_.as_json_string() == slow.as_json_string()
+    assert type(load_appliance(json[0], lazy=True)) is LazyAppliance
+
+
+def test_lazy_appliance_memoizes():
+    appliance = load_appliance(load_json("testdata/appliance.json"), lazy=True)
+
+    assert appliance.signals is appliance.signals
+    assert appliance.aircon is appliance.aircon
+    appliance.signals = []
+    assert appliance.signals == []
+
+
+@pytest.mark.parametrize(
+    "path, value",
+    [
+        (["aircon", "range", "modes", "mode1", "temp"], [1, 2]),
+        (["device", "humidity_offset"], True),
+        (["model", "image"], None),
+        (["settings"], "cool"),
+        (["signals", 0, "name"], 1),
+        (["tv", "buttons"], {}),
+        (["tv"], None),
+    ],
+)
+def test_lazy_appliance_errors_on_access(path, value):
+    json = break_(load_json("testdata/appliance.json"), path, value)
+
+    appliance = load_appliance(json, lazy=True)
+    assert appliance.nickname == json["nickname"]
+    with pytest.raises(ValidationError) as lazy:
+        getattr(appliance, path[0])
+    with pytest.raises(ValidationError) as slow:
+        ApplianceSchema().load(json)
+    assert lazy.value.messages == slow.value.messages
+
+
+@pytest.mark.parametrize("path, value", [(["nickname"], 1), (["type"], None)])
+def test_lazy_appliance_top_level_error(path, value):
+    json = [break_(load_json("testdata/appliance.json"), path, value)]
+
+    with pytest.raises(ValidationError) as lazy:
+        load_appliances(json, lazy=True)
+    with pytest.raises(ValidationError) as slow:
+        ApplianceSchema(many=True).load(json)
+    assert lazy.value.messages == slow.value.messages
+
+
+@pytest.mark.parametrize(
+    "path, value",
+    [
+        (["temperature_offset"], "1"),
+        (["temperature_offset"], 1.0),
+        (["created_at"], "2020-01-01T01:23:45.678+09:00"),
+        (["newest_events", "te", "val"], "25.5"),
+        (["unknown"], "ignored"),
+    ],
+)
+def test_devices_fallback_success(path, value):
+    json = [break_(load_json("testdata/device.json"), path, value)]
+
+    slow = DeviceSchema(many=True).load(json)
+    for fast, slow in zip(load_devices(json), slow):
+        assert_same(fast, slow)
+
+
+@pytest.mark.parametrize(
+    "path, value",
+    [
+        (["aircon", "range", "modes", "mode1", "temp"], [1, 2]),
+        (["device", "humidity_offset"], True),
+        (["model", "image"], None),
+        (["settings"], "cool"),
+        (["signals", 0, "name"], 1),
+        (["tv", "buttons"], {}),
+        (["nickname"], 1),
+        (["device", "created_at"], "yesterday"),
+    ],
+)
+def test_appliances_fallback_error(path, value):
+    json = [break_(load_json("testdata/appliance.json"), path, value)]
+
+    with pytest.raises(ValidationError) as fast:
+        load_appliances(json)
+    with pytest.raises(ValidationError) as slow:
+        ApplianceSchema(many=True).load(json)
+    assert fast.value.messages == slow.value.messages
+
+
+@pytest.mark.parametrize(
+    "path, value", [(["tv"], None), (["settings", "button"], KeyError)]
+)
+def test_appliance_fallback_same_error(path, value):
+    json = break_(load_json("testdata/appliance.json"), path, value)
+
+    with pytest.raises(Exception) as fast:
+        load_appliance(json)
+    with pytest.raises(Exception) as slow:
+        ApplianceSchema().load(json)
+    assert fast.type == slow.type
+    assert str(fast.value) == str(slow.value)
+
+
+def test_device_fallback_same_error():
+    json = [break_(load_json("testdata/device.json"), ["id"], KeyError)]
+
+    with pytest.raises(TypeError) as fast:
+        load_devices(json)
+    with pytest.raises(TypeError) as slow:
+        DeviceSchema(many=True).load(json)
+    assert fast.type == slow.type
+    assert str(fast.value) == str(slow.value)
+
+
+def test_not_a_list():
+    with pytest.raises(ValidationError):
+        load_devices({})
+
+
+def test_api_fast_decode(monkeypatch):
+    transport = FakeTransport.from_fixtures("testdata")
+    calls = []
+    original = ApplianceSchema.load
+
+    def load(self, *args, **kwargs):
+        calls.append(1)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(ApplianceSchema, "load", load)
+
+    api = NatureRemoAPI("access_token", transport=transport)
+    fast = api.get_appliances()
+    assert calls == []
+
+    api.fast_decode = False
+    slow = api.get_appliances()
+    assert calls == [1]
+    for f, s in zip(fast, slow):
+        assert_same(f, s)
+
+
+def test_api_lazy():
+    transport = FakeTransport.from_fixtures("testdata")
+    api = NatureRemoAPI("access_token", transport=transport)
+
+    lazy = api.get_appliances(lazy=True)
+    assert all(type(a) is LazyAppliance for a in lazy)
+    for f, s in zip(lazy, api.get_appliances()):
+        assert repr(f) == repr(s)
+        assert f.as_json_string() == s.as_json_string()
+
+
+@pytest.mark.parametrize(
+    "json",
+    [
+        {"freq": 38, "data": [9000, 4500, 560], "format": "us"},
+        {"freq": 38, "data": ["1", 2.0], "format": "us"},
+        {"freq": 38, "data": [], "format": "us"},
+    ],
+)
+def test_ir_signal(json):
+    assert_same(load_ir_signal(json), IRSignalSchema().load(json))
+
+
+@pytest.mark.parametrize(
+    "json",
+    [
+        {"freq": 38, "data": [True], "format": "us"},
+        {"freq": 38, "data": [-1], "format": "us"},
+        {"freq": "38", "data": None, "format": "us"},
+        {"freq": 38, "data": [560], "format": "us", "extra": 1},
+        {"freq": 38, "data": [560], "extra": 1},
+    ],
+)
+def test_ir_signal_fallback_error(json):
+    with pytest.raises(ValidationError) as fast:
+        load_ir_signal(json)
+    with pytest.raises(ValidationError) as slow:
+        IRSignalSchema().load(json)
+    assert fast.value.messages == slow.value.messages
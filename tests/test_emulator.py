@@ -0,0 +1,143 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from remo import IRSignal
+from remo import NatureRemoError
+from remo import NatureRemoLocalAPI
+from remo.emulator import burst_duration
+from remo.emulator import DEFAULT_SIGNAL
+from remo.emulator import RemoEmulator
+from remo.emulator import RemoEmulatorFleet
+
+SIGNAL = {"format": "us", "freq": 38, "data": [30000, 20000]}
+
+
+@pytest.fixture
+def remo():
+    with RemoEmulator() as remo:
+        yield remo
+
+
+@pytest.fixture
+def local_api(remo):
+    with NatureRemoLocalAPI(remo.addr) as local_api:
+        yield local_api
+
+
+class TestRemoEmulator:
+    def test_get_ir_signal(self, remo, local_api):
+        ir_signal = local_api.get_ir_signal()
+        assert type(ir_signal) is IRSignal
+        assert ir_signal.data == DEFAULT_SIGNAL["data"]
+
+        remo.receive(SIGNAL)
+
+        assert local_api.get_ir_signal().data == SIGNAL["data"]
+
+    def test_send_ir_signal(self, remo, local_api):
+        sleeps = []
+        remo.sleep = sleeps.append
+        local_api.send_ir_signal(json.dumps(SIGNAL))
+
+        assert sleeps == [burst_duration(SIGNAL)]
+        assert remo.sent == [SIGNAL]
+
+    def test_replay_ir_signal(self, remo, local_api):
+        remo.time_scale = 0
+        local_api.send_ir_signal(local_api.get_ir_signal())
+
+        assert remo.sent == [DEFAULT_SIGNAL]
+
+    def test_emissions_are_serialized(self, remo):
+        emitting = []
+        overlaps = []
+
+        def sleep(seconds):
+            emitting.append(seconds)
+            overlaps.append(len(emitting))
+            time.sleep(0.01)
+            emitting.pop()
+
+        def send():
+            with NatureRemoLocalAPI(remo.addr) as local_api:
+                local_api.send_ir_signal(json.dumps(SIGNAL))
+
+        remo.sleep = sleep
+        threads = [threading.Thread(target=send) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert overlaps == [1, 1, 1]
+        assert len(remo.sent) == 3
+
+    def test_time_scale(self, local_api):
+        sleeps = []
+        with RemoEmulator(time_scale=0, sleep=sleeps.append) as remo:
+            local_api.addr = remo.addr
+            local_api.send_ir_signal(json.dumps(SIGNAL))
+
+            assert sleeps == []
+            assert remo.sent == [SIGNAL]
+
+    def test_bad_requests(self, remo, local_api):
+        url = f"http://{remo.addr}/messages"
+
+        assert requests.post(url, data=json.dumps(SIGNAL)).status_code == 400
+        with pytest.raises(NatureRemoError) as excinfo:
+            local_api.send_ir_signal("{}")
+        assert str(excinfo.value) == "400 Bad Request"
+        assert remo.sent == []
+
+    def test_dropped_connection(self, local_api):
+        with RemoEmulator(drop_rate=1.0) as remo:
+            local_api.addr = remo.addr
+
+            with pytest.raises(NatureRemoError):
+                local_api.get_ir_signal()
+            assert remo.requests == 1
+
+    def test_nec_default_signal(self):
+        data = DEFAULT_SIGNAL["data"]
+
+        assert data[:2] == [9000, 4500]
+        assert len(data) == 2 + 32 * 2 + 1
+        assert 0.05 < burst_duration(DEFAULT_SIGNAL) < 0.08
+
+
+class TestRemoEmulatorFleet:
+    def test_fleet(self):
+        with RemoEmulatorFleet(3, time_scale=0) as fleet:
+            assert len(set(fleet.addrs)) == 3
+            for addr in fleet.addrs:
+                with NatureRemoLocalAPI(addr) as local_api:
+                    local_api.send_ir_signal(json.dumps(SIGNAL))
+
+            assert [len(remo.sent) for remo in fleet] == [1, 1, 1]
+
+    def test_async_fleet(self):
+        pytest.importorskip("httpx")
+        from remo.aio import AsyncNatureRemoLocalAPI
+
+        async def send(addrs):
+            async with AsyncNatureRemoLocalAPI(addrs) as local_api:
+                return await local_api.send_ir_signals(json.dumps(SIGNAL))
+
+        # No Remo finishes emitting before all of them have started, so
+        # emitting one after another would break the barrier.
+        barrier = threading.Barrier(4, timeout=5)
+
+        def sleep(seconds):
+            barrier.wait()
+
+        with RemoEmulatorFleet(4, sleep=sleep) as fleet:
+            results = asyncio.run(send(fleet.addrs))
+
+        assert all(result.ok for result in results.values())
+        assert [len(remo.sent) for remo in fleet] == [1, 1, 1, 1]
@@ -0,0 +1,99 @@
+import io
+import random
+
+import pytest
+
+from remo import IRSignal
+from remo import NatureRemoError
+from remo.emulator import _nec_frame
+from remo.ircodec import dump
+from remo.ircodec import dumps
+from remo.ircodec import load
+from remo.ircodec import loads
+
+
+def assert_same(decoded, signal):
+    assert type(decoded) is IRSignal
+    assert decoded.freq == signal.freq
+    assert decoded.data == signal.data
+    assert decoded.format == signal.format
+
+
+def nec(repeat=1, jitter=0, seed=0):
+    rng = random.Random(seed)
+    data = (_nec_frame(0x10, 0x20) + [40000]) * repeat
+    return IRSignal(38, [t + rng.randint(-jitter, jitter) for t in data], "us")
+
+
+@pytest.mark.parametrize(
+    "signal",
+    [
+        nec(),
+        nec(repeat=3, jitter=30),
+        IRSignal(38, [0], "us"),
+        IRSignal(0, [], ""),
+        IRSignal(-1, [0, 0, 5, 0, 5, 7, 5], "µs"),
+        IRSignal(38, [2 ** 32 - 1, 1, 2 ** 32 - 1], "raw"),
+    ],
+)
+def test_round_trip(signal):
+    assert_same(loads(dumps(signal)), signal)
+
+
+def test_round_trip_random():
+    rng = random.Random(0)
+    for _ in range(200):
+        data = [
+            rng.choice([0, 1, 2, 560, 1690, 2 ** 31])
+            for _ in range(rng.randint(0, 50))
+        ]
+        signal = IRSignal(38, data, "us")
+        assert_same(loads(dumps(signal)), signal)
+
+
+def test_smaller_than_json():
+    signal = nec(repeat=3)
+    assert len(dumps(signal)) * 10 < len(signal.as_json_string())
+
+
+def test_stream():
+    signals = [nec(jitter=i) for i in range(100)]
+    fp = io.BytesIO()
+
+    assert dump(iter(signals), fp) == 100
+
+    fp.seek(0)
+    decoded = load(fp)
+    assert_same(next(decoded), signals[0])
+    for d, s in zip(decoded, signals[1:]):
+        assert_same(d, s)
+
+
+def test_empty_stream():
+    fp = io.BytesIO()
+    assert dump([], fp) == 0
+    fp.seek(0)
+    assert list(load(fp)) == []
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        (b"", "Not an IR signal archive"),
+        (b"{}", "Not an IR signal archive"),
+        (b"RIRC\x02", "Unsupported IR signal archive version: 2"),
+        (dumps(nec())[:-1], "Truncated IR signal archive"),
+        (dumps(nec())[:7], "Truncated IR signal archive"),
+        (dumps(nec()) + dumps(nec())[5:], "Expected one IR signal, found 2"),
+    ],
+)
+def test_invalid(data, message):
+    with pytest.raises(NatureRemoError, match=message):
+        loads(data)
+
+
+def test_corrupt_record():
+    data = bytearray(dumps(IRSignal(38, [5], "us")))
+    data[-1] = 0x03  # The only token, now of an unknown kind.
+    with pytest.raises(NatureRemoError, match="Corrupt IR signal record"):
+        loads(bytes(data))
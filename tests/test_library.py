@@ -0,0 +1,193 @@
+import random
+
+import pytest
+
+import remo.library
+from remo import IRSignal
+from remo.emulator import _nec_frame
+from remo.library import compare
+from remo.library import fingerprint
+from remo.library import normalize
+from remo.library import SignalLibrary
+from remo.protocols import aeha_frame
+from remo.protocols import encode
+from remo.protocols import nec_frame
+from remo.protocols import sony_frame
+
+
+def capture(data, jitter=0.1, seed=0):
+    rng = random.Random(seed)
+    data = [round(t * rng.uniform(1 - jitter, 1 + jitter)) for t in data]
+    return IRSignal(38, data, "us")
+
+
+@pytest.fixture
+def library():
+    library = SignalLibrary()
+    for address in range(4):
+        for command in range(64):
+            signal = capture(_nec_frame(address, command), jitter=0)
+            library.add((address, command), signal)
+    return library
+
+
+def test_normalize():
+    normalized = normalize(capture(_nec_frame(0x10, 0x20) + [40000]))
+
+    assert len(normalized.levels) == 5
+    for level, expected in zip(normalized.levels, [560, 1690, 4500, 9000]):
+        assert abs(level - expected) < expected * 0.1
+    assert normalized.symbols[:4] == (3, 2, 0, 0)
+    assert normalized.symbols[-1] == 4
+
+
+def test_normalize_quantum():
+    normalized = normalize(IRSignal(38, [10, 15, 20, 100], "us"))
+    assert normalized.symbols == (0, 0, 0, 1)
+    assert normalized.levels == (15, 100)
+
+
+def test_normalize_empty():
+    normalized = normalize(IRSignal(38, [], "us"))
+    assert normalized.symbols == ()
+    assert normalized.levels == ()
+
+
+def test_fingerprint():
+    key = fingerprint(capture(_nec_frame(0x10, 0x20), seed=0))
+
+    assert len(key) == 32
+    for seed in range(1, 20):
+        assert fingerprint(capture(_nec_frame(0x10, 0x20), seed=seed)) == key
+    assert fingerprint(capture(_nec_frame(0x10, 0x21))) != key
+    assert fingerprint(IRSignal(40, _nec_frame(0x10, 0x20), "us")) != key
+
+
+def test_fingerprint_frames():
+    # The 3T spaces of AEHA bits and the 4T space of its leader are too
+    # close to tell apart by their levels alone.
+    frame = aeha_frame(bytes([0x23, 0xCB, 0x26, 0x01, 0x00, 0x20]))
+    key = fingerprint(capture(encode(frame).data))
+
+    for seed in range(1, 20):
+        assert fingerprint(capture(encode(frame).data, seed=seed)) == key
+    assert fingerprint(IRSignal(38, encode(frame).data, "raw")) != key
+
+
+def test_fingerprint_unknown():
+    # Pulse position codes like RC-6 are none of the decoded protocols.
+    data = [2666, 889, 444, 444, 444, 889, 444, 444, 889, 889, 444, 2666]
+    key = fingerprint(capture(data))
+
+    for seed in range(1, 20):
+        assert fingerprint(capture(data, seed=seed)) == key
+    assert fingerprint(capture(data[:-1] + [444])) != key
+
+
+def test_compare():
+    signal = capture(_nec_frame(0x10, 0x20), jitter=0)
+
+    assert compare(signal, signal) == (0, 0)
+    distance, error = compare(signal, capture(_nec_frame(0x10, 0x20)))
+    assert distance == 0
+    assert 0 < error < 0.1
+    # A bit of the command and of its inverse, i.e. two spaces.
+    distance, _ = compare(signal, capture(_nec_frame(0x10, 0x21)))
+    assert distance == pytest.approx(2 / len(signal.data))
+    distance, _ = compare(signal, capture(_nec_frame(0x10, 0x20)[:-4]))
+    assert distance == pytest.approx(4 / len(signal.data))
+
+
+def test_query(library):
+    for seed, (address, command) in enumerate([(0, 0), (3, 63), (2, 17)]):
+        signal = capture(_nec_frame(address, command), seed=seed)
+
+        (match,) = library.query(signal)
+
+        assert match.key == (address, command)
+        assert match.signal is library[(address, command)]
+        assert match.distance == 0
+        assert 0 < match.error < 0.1
+
+
+def test_query_k(library):
+    matches = library.query(capture(_nec_frame(1, 5)), k=3)
+
+    assert [m.key for m in matches][0] == (1, 5)
+    assert len(matches) == 3
+    assert matches[0].distance < matches[1].distance <= matches[2].distance
+
+
+def test_query_corrupt(library):
+    # A timing no other signal has changes the symbols of the capture, so
+    # it is only found through the bands it shares with its signal.
+    data = capture(_nec_frame(2, 40)).data
+    data[20] = 3000
+
+    (match,) = library.query(IRSignal(38, data, "us"))
+
+    assert match.key == (2, 40)
+    assert match.distance == pytest.approx(1 / len(data))
+
+
+def test_query_candidates(library, monkeypatch):
+    compared = []
+    compare = remo.library._compare
+
+    def spy(a, b, tolerance, quantum):
+        compared.append(b)
+        return compare(a, b, tolerance, quantum)
+
+    monkeypatch.setattr(remo.library, "_compare", spy)
+    library.candidates = 4
+
+    (match,) = library.query(capture(_nec_frame(3, 3)))
+
+    assert match.key == (3, 3)
+    assert 0 < len(compared) <= 4
+
+
+def test_match(library):
+    assert library.match(capture(_nec_frame(1, 1))).key == (1, 1)
+    assert library.match(capture(_nec_frame(9, 1))) is None
+    assert library.match(capture(_nec_frame(9, 1)), max_distance=0.1)
+
+
+def test_match_empty():
+    library = SignalLibrary()
+    assert library.match(capture(_nec_frame(1, 1))) is None
+    assert library.query(capture(_nec_frame(1, 1))) == []
+
+
+def test_protocols():
+    frames = [
+        nec_frame(0x10, 0x20),
+        aeha_frame(bytes([0x23, 0xCB, 0x26, 0x01, 0x00, 0x20])),
+        aeha_frame(bytes([0x23, 0xCB, 0x26, 0x01, 0x00, 0x24])),
+        sony_frame(0x15, 0x01),
+        sony_frame(0x16, 0x01),
+    ]
+    library = SignalLibrary()
+    for i, frame in enumerate(frames):
+        library.add(i, encode(frame))
+
+    for i, frame in enumerate(frames):
+        assert library.match(capture(encode(frame).data, seed=i)).key == i
+
+
+def test_add_remove(library):
+    signal = capture(_nec_frame(1, 1))
+    assert len(library) == 256
+    assert (1, 1) in library
+
+    library.add((1, 1), capture(_nec_frame(9, 9), jitter=0))
+    assert len(library) == 256
+    assert library.match(signal) is None
+    assert library.match(capture(_nec_frame(9, 9))).key == (1, 1)
+
+    library.remove((1, 1))
+    assert len(library) == 255
+    assert (1, 1) not in library
+    assert library.match(capture(_nec_frame(9, 9))) is None
+    with pytest.raises(KeyError):
+        library.remove((1, 1))
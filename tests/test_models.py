@@ -1,7 +1,12 @@
 import json
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from datetime import timezone
 
+import pytest
+from marshmallow import ValidationError
+
 from .utils import load_json
 from remo import AirConParamsSchema
 from remo import AirConRangeModeSchema
@@ -13,6 +18,9 @@ from remo import ApplianceSchema
 from remo import ButtonSchema
 from remo import DeviceCoreSchema
 from remo import DeviceSchema
+from remo import get_schema
+from remo import IRData
+from remo import IRSignal
 from remo import IRSignalSchema
 from remo import LightSchema
 from remo import LightStateSchema
@@ -421,3 +429,94 @@ def test_ir_signal():
         f"IRSignal(freq={data['freq']}, data={data['data']}, "
         f"format='{data['format']}')"
     )
+    assert json.loads(signal.as_message()) == data
+
+
+def test_ir_data():
+    data = IRData([9000, 4500, 560])
+
+    assert data == [9000, 4500, 560]
+    assert [9000, 4500, 560] == data
+    assert data != [9000, 4500]
+    assert data == IRData([9000, 4500, 560])
+    assert memoryview(data).tolist() == [9000, 4500, 560]
+    assert memoryview(data).nbytes == 3 * data.itemsize
+    assert pickle.loads(pickle.dumps(data)) == data
+    assert type(pickle.loads(pickle.dumps(data))) is IRData
+    assert repr(data) == "IRData([9000, 4500, 560])"
+
+
+def test_ir_signal_data():
+    signal = IRSignalSchema().load({"freq": 38, "data": [1, 2], "format": ""})
+    assert type(signal.data) is IRData
+    assert type(IRSignal(38, [1, 2], "us").data) is IRData
+
+    # Values fields.Int accepts are converted as before.
+    signal = IRSignalSchema().load(
+        {"freq": 38, "data": ["1", 2.0, 3.5], "format": "us"}
+    )
+    assert signal.data == [1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        ([1, True], {"data": {1: ["Not a valid integer."]}}),
+        (["a"], {"data": {0: ["Not a valid integer."]}}),
+        ([-1], {"data": ["Timings must be between 0 and 4294967295."]}),
+        ([2 ** 32], {"data": ["Timings must be between 0 and 4294967295."]}),
+    ],
+)
+def test_ir_signal_invalid_data(data, message):
+    with pytest.raises(ValidationError) as e:
+        IRSignalSchema().load({"freq": 38, "data": data, "format": "us"})
+    assert e.value.messages == message
+
+
+def test_models_are_slotted():
+    for schema, fixture in [
+        (UserSchema, "user"),
+        (SensorValueSchema, "sensor_value"),
+        (DeviceCoreSchema, "device_core"),
+        (DeviceSchema, "device"),
+        (ApplianceModelSchema, "appliance_model"),
+        (AirConParamsSchema, "aircon_params"),
+        (ApplianceModelAndParamsSchema, "appliance_model_and_params"),
+        (AirConRangeModeSchema, "aircon_range_mode"),
+        (AirConRangeSchema, "aircon_range"),
+        (AirConSchema, "aircon"),
+        (SignalSchema, "signal"),
+        (ButtonSchema, "button"),
+        (TVStateSchema, "tv_state"),
+        (TVSchema, "tv"),
+        (LightStateSchema, "light_state"),
+        (LightSchema, "light"),
+        (ApplianceSchema, "appliance"),
+        (IRSignalSchema, "ir_signal"),
+    ]:
+        model = schema().load(load_json(f"testdata/{fixture}.json"))
+
+        assert not hasattr(model, "__dict__")
+        assert type(model).schema is schema
+
+
+def test_get_schema():
+    schema = get_schema(ApplianceSchema)
+
+    assert type(schema) is ApplianceSchema
+    assert get_schema(ApplianceSchema) is schema
+    assert get_schema(ApplianceSchema, many=True).many
+    assert not schema.many
+
+
+def test_get_schema_threads():
+    data = [load_json("testdata/appliance.json")] * 10
+    appliances = ApplianceSchema(many=True).load(data)
+    expected = [a.as_json_string() for a in appliances]
+
+    def load(_):
+        appliances = get_schema(ApplianceSchema, many=True).load(data)
+        return [a.as_json_string() for a in appliances]
+
+    with ThreadPoolExecutor(8) as executor:
+        assert all(r == expected for r in executor.map(load, range(64)))
@@ -0,0 +1,138 @@
+import pytest
+import responses
+
+from .utils import load_json
+from remo import create_session
+from remo import NatureRemoAPIPool
+from remo import NatureRemoError
+from remo import User
+from remo.api import BASE_URL
+
+
+@pytest.fixture
+def pool():
+    with NatureRemoAPIPool({"home1": "token1", "home2": "token2"}) as pool:
+        yield pool
+
+
+def add_user(remaining="29"):
+    responses.add(
+        responses.GET,
+        f"{BASE_URL}/1/users/me",
+        json=load_json("testdata/user.json"),
+        headers={"X-Rate-Limit-Remaining": remaining},
+        status=200,
+    )
+
+
+class TestNatureRemoAPIPool:
+    @responses.activate
+    def test_routes_calls_to_token(self, pool):
+        add_user()
+
+        user = pool.call("home2", "get_user")
+
+        assert type(user) is User
+        assert responses.calls[0].request.headers["Authorization"] == (
+            "Bearer token2"
+        )
+
+    def test_clients_share_session(self, pool):
+        assert pool["home1"].session is pool.session
+        assert pool["home2"].session is pool.session
+        assert pool["home1"] is not pool["home2"]
+
+    @responses.activate
+    def test_rate_limits_per_token(self, pool):
+        add_user(remaining="29")
+        add_user(remaining="10")
+
+        pool.call("home1", "get_user")
+        pool["home2"].get_user()
+
+        rate_limits = pool.rate_limits()
+        assert rate_limits["home1"].remaining == 29
+        assert rate_limits["home2"].remaining == 10
+
+    @responses.activate
+    def test_stats(self, pool):
+        add_user()
+        responses.add(
+            responses.POST,
+            f"{BASE_URL}/1/signals/signal-id/send",
+            json={"code": 123456, "message": "Bad Request"},
+            status=400,
+        )
+
+        pool.call("home1", "get_user")
+        pool["home1"].get_user()
+        pool.call("home2", "get_user")
+        with pytest.raises(NatureRemoError):
+            pool.call("home2", "send_signal", "signal-id")
+        stats = pool.stats()
+
+        assert stats.requests == 4
+        assert stats.errors == 1
+        assert stats.requests_by_key == {"home1": 2, "home2": 2}
+        assert stats.requests_per_second > 0
+
+        pool.reset_stats()
+        assert pool.stats().requests == 0
+
+    def test_add_and_remove(self, pool):
+        client = pool.add("home3", "token3")
+
+        assert pool["home3"] is client
+        assert list(pool) == ["home1", "home2", "home3"]
+        pool.remove("home1")
+        assert "home1" not in pool
+        assert len(pool) == 2
+
+    def test_pace(self):
+        with NatureRemoAPIPool({"a": "t1", "b": "t2"}, pace=True) as pool:
+            assert pool["a"].scheduler is not None
+            assert pool["a"].scheduler is not pool["b"].scheduler
+
+    def test_close_leaves_shared_session_open(self, monkeypatch):
+        session = create_session()
+        closed = []
+        monkeypatch.setattr(session, "close", lambda: closed.append(1))
+
+        with NatureRemoAPIPool({"a": "t1"}, session=session):
+            pass
+
+        assert closed == []
+        assert session.hooks["response"] == []
+
+    def test_close_twice(self, monkeypatch):
+        pool = NatureRemoAPIPool({"a": "t1"})
+        closed = []
+        monkeypatch.setattr(pool.session, "close", lambda: closed.append(1))
+
+        pool.close()
+        pool.close()
+
+        assert closed == [1]
+
+    @responses.activate
+    def test_stats_follow_readded_key(self, pool):
+        add_user()
+        old = pool["home1"]
+        pool.add("home1", "token3")
+
+        old.get_user()
+        pool.call("home1", "get_user")
+
+        assert pool.stats().requests_by_key == {"home1": 1}
+
+    @responses.activate
+    def test_stats_of_keys_sharing_a_token(self, pool):
+        add_user()
+        pool.add("home3", "token1")
+
+        pool.call("home1", "get_user")
+        pool.call("home3", "get_user")
+        pool.remove("home3")
+        pool.call("home1", "get_user")
+
+        assert pool.stats().requests_by_key == {"home1": 2, "home3": 1}
@@ -0,0 +1,228 @@
+import random
+
+import pytest
+
+import remo.protocols
+from remo import IRSignal
+from remo import NatureRemoError
+from remo import NatureRemoLocalAPI
+from remo.emulator import _nec_frame
+from remo.emulator import RemoEmulator
+from remo.protocols import aeha_frame
+from remo.protocols import decode
+from remo.protocols import decode_many
+from remo.protocols import encode
+from remo.protocols import IRFrame
+from remo.protocols import nec_frame
+from remo.protocols import sony_frame
+
+
+def pulse_distance(unit, leader, data, bits=None):
+    timings = [leader[0] * unit, leader[1] * unit]
+    bits = len(data) * 8 if bits is None else bits
+    for i in range(bits):
+        bit = data[i >> 3] >> (i & 7) & 1
+        timings += [unit, 3 * unit if bit else unit]
+    return timings + [unit]
+
+
+def aeha_timings(data, unit=425):
+    return pulse_distance(unit, (8, 4), data)
+
+
+def sony_timings(value, bits):
+    timings = [2400, 600]
+    for i in range(bits):
+        timings += [1200 if value >> i & 1 else 600, 600]
+    timings[-1] = 25000
+    return timings
+
+
+def signal(*frames, jitter=0.0, seed=0):
+    rng = random.Random(seed)
+    data = []
+    for frame in frames:
+        if data and len(data) % 2:
+            data.append(20000)
+        data += frame
+    data = [round(t * (1 + rng.uniform(-jitter, jitter))) for t in data]
+    return IRSignal(38, data, "us")
+
+
+def test_nec():
+    assert decode(signal(_nec_frame(0x10, 0x20))) == [
+        IRFrame("NEC", 0x10, 0x20, 32, bytes([0x10, 0xEF, 0x20, 0xDF]))
+    ]
+
+
+def test_nec_extended():
+    data = bytes([0x34, 0x12, 0x20, 0x21])
+    (frame,) = decode(signal(pulse_distance(560, (16, 8), data)))
+    assert frame.address == 0x1234
+    assert frame.command == 0x2120
+
+
+def test_nec_repeat_code_is_skipped():
+    frames = decode(signal(_nec_frame(1, 2), [9000, 2250, 560]))
+    assert [f.command for f in frames] == [2]
+
+
+def test_aeha():
+    data = bytes([0x23, 0xCB, 0x26, 0x01, 0x00, 0x20, 0x48])
+    frames = decode(signal(aeha_timings(data), aeha_timings(data)))
+    frame = IRFrame(
+        "AEHA", 0xCB23, int.from_bytes(data[2:], "little"), 56, data
+    )
+    assert frames == [frame, frame]
+
+
+@pytest.mark.parametrize(
+    "bits, address", [(12, 0x01), (15, 0x54), (20, 0x1A5)]
+)
+def test_sony(bits, address):
+    value = address << 7 | 0x15
+    frames = decode(signal(*[sony_timings(value, bits)] * 3))
+    data = value.to_bytes((bits + 7) // 8, "little")
+    assert frames == [IRFrame("SONY", address, 0x15, bits, data)] * 3
+
+
+def test_jitter():
+    frames = decode(signal(_nec_frame(0x10, 0x20), jitter=0.2, seed=1))
+    assert [(f.address, f.command) for f in frames] == [(0x10, 0x20)]
+
+
+@pytest.mark.parametrize(
+    "data", [[], [0], [9000, 4500, 560], [560] * 100, [100, 200, 300]]
+)
+def test_unknown(data):
+    assert decode(IRSignal(38, data, "us")) == []
+
+
+def test_unsupported_format():
+    with pytest.raises(NatureRemoError):
+        decode(IRSignal(38, [0], "raw"))
+
+
+def batch(count, seed=0):
+    rng = random.Random(seed)
+    signals = []
+    for _ in range(count):
+        frames = []
+        for _ in range(rng.randint(0, 3)):
+            kind = rng.randrange(4)
+            if kind == 0:
+                frames.append(
+                    _nec_frame(rng.randrange(256), rng.randrange(256))
+                )
+            elif kind == 1:
+                data = bytes(rng.randrange(256) for _ in range(6))
+                frames.append(aeha_timings(data, unit=rng.randint(350, 500)))
+            elif kind == 2:
+                bits = rng.choice([12, 15, 20])
+                frames.append(sony_timings(rng.getrandbits(bits), bits))
+            else:
+                frames.append(
+                    [rng.randint(100, 10000) for _ in range(rng.randint(1, 9))]
+                )
+        signals.append(signal(*frames, jitter=0.15, seed=rng.random()))
+    return signals
+
+
+def test_decode_many():
+    signals = batch(200)
+    expected = [decode(s) for s in signals]
+    assert sum(map(len, expected)) > 100
+    assert decode_many(signals, use_numpy=False) == expected
+    assert decode_many(signals) == expected
+    assert decode_many([]) == []
+
+
+def test_decode_many_numpy():
+    pytest.importorskip("numpy")
+    signals = batch(200)
+
+    assert decode_many(signals, use_numpy=True) == [decode(s) for s in signals]
+
+
+def test_decode_many_without_numpy(monkeypatch):
+    signals = batch(10)
+    monkeypatch.setattr(remo.protocols, "np", None)
+
+    assert decode_many(signals) == [decode(s) for s in signals]
+    with pytest.raises(NatureRemoError):
+        decode_many(signals, use_numpy=True)
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [
+        nec_frame(0x10, 0x20),
+        nec_frame(0x1234, 0x20),
+        nec_frame(0x10, 0x2021),
+        aeha_frame(bytes([0x23, 0xCB, 0x26, 0x01, 0x00, 0x20, 0x48])),
+        sony_frame(0x15, 0x01),
+        sony_frame(0x15, 0x54, bits=15),
+        sony_frame(0x15, 0x1A5, bits=20),
+    ],
+)
+@pytest.mark.parametrize("repeat", [None, 1, 2])
+def test_encode(frame, repeat):
+    signal = encode(frame, repeat)
+
+    assert signal.format == "us"
+    if frame.protocol == "NEC":
+        count = 1  # Repeat codes are not frames.
+    elif repeat is None:
+        count = 3 if frame.protocol == "SONY" else 1
+    else:
+        count = repeat
+    assert decode(signal) == [frame] * count
+
+
+def test_encode_nec():
+    signal = encode(nec_frame(0x10, 0x20))
+    assert signal.freq == 38
+    assert signal.data == _nec_frame(0x10, 0x20)
+
+
+def test_encode_decoded_frame():
+    (frame,) = decode(signal(_nec_frame(0x10, 0x20), jitter=0.1))
+    assert encode(frame).data == _nec_frame(0x10, 0x20)
+
+
+def test_encode_cache():
+    frame = nec_frame(0x42, 0x43)
+    signal = encode(frame)
+    signal.data[0] = 0
+    hits = remo.protocols._encode.cache_info().hits
+
+    assert encode(frame).data[0] == 9000
+    assert remo.protocols._encode.cache_info().hits == hits + 1
+
+
+@pytest.mark.parametrize(
+    "build",
+    [
+        lambda: nec_frame(0x10000, 0),
+        lambda: nec_frame(0, -1),
+        lambda: aeha_frame(b"ab"),
+        lambda: sony_frame(0x80, 0),
+        lambda: sony_frame(0, 0x20),
+        lambda: sony_frame(0, 0, bits=13),
+        lambda: encode(nec_frame(0, 0), repeat=0),
+        lambda: encode(IRFrame("RC5", 0, 0, 0, b"")),
+    ],
+)
+def test_encode_invalid(build):
+    with pytest.raises(NatureRemoError):
+        build()
+
+
+def test_send_encoded():
+    with RemoEmulator(time_scale=0) as emulator:
+        with NatureRemoLocalAPI(emulator.addr) as local_api:
+            local_api.send_ir_signal(encode(nec_frame(0x10, 0x20)))
+
+    assert emulator.sent == [
+        {"format": "us", "freq": 38, "data": _nec_frame(0x10, 0x20)}
+    ]
@@ -0,0 +1,160 @@
+from datetime import datetime
+
+import pytest
+import responses
+
+from .utils import load_json
+from remo import NatureRemoAPI
+from remo import NatureRemoError
+from remo import RateLimit
+from remo import RateLimitScheduler
+from remo.api import BASE_URL
+
+NOW = 1595920000.0  # 2020-07-28 07:06:40 UTC
+
+
+class FakeClock:
+    def __init__(self, now=NOW):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def rate_limit(remaining, reset_in, limit=30, skew=0):
+    return RateLimit(
+        checked_at=datetime.utcfromtimestamp(NOW + skew),
+        limit=limit,
+        remaining=remaining,
+        reset=datetime.utcfromtimestamp(NOW + skew + reset_in),
+    )
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(clock):
+    return RateLimitScheduler(clock=clock.time, sleep=clock.sleep)
+
+
+class TestRateLimitScheduler:
+    def test_no_wait_before_first_response(self, scheduler, clock):
+        for _ in range(5):
+            scheduler.acquire()
+
+        assert clock.sleeps == []
+
+    def test_paces_requests_over_window(self, scheduler, clock):
+        scheduler.update(rate_limit(remaining=10, reset_in=100))
+
+        for _ in range(4):
+            scheduler.acquire()
+
+        assert clock.sleeps == [10.0, 10.0, 10.0]
+        assert clock.now == NOW + 30
+
+    def test_waits_for_reset_when_exhausted(self, scheduler, clock):
+        scheduler.update(rate_limit(remaining=0, reset_in=60))
+
+        scheduler.acquire()
+
+        assert clock.sleeps == [60.0]
+
+    def test_next_window_uses_limit(self, scheduler, clock):
+        scheduler.update(rate_limit(remaining=1, reset_in=60, limit=3))
+
+        for _ in range(4):
+            scheduler.acquire()
+
+        # One request left in this window, then three paced over the next.
+        assert clock.now == NOW + 60 + 200
+        assert clock.sleeps == [60.0, 100.0, 100.0]
+
+    def test_reserve(self, clock):
+        scheduler = RateLimitScheduler(
+            reserve=2, clock=clock.time, sleep=clock.sleep
+        )
+        scheduler.update(rate_limit(remaining=2, reset_in=60))
+
+        scheduler.acquire()
+
+        assert clock.sleeps == [60.0]
+
+    def test_corrects_clock_skew(self, scheduler, clock):
+        # The server clock is 50 seconds ahead of ours.
+        scheduler.update(rate_limit(remaining=0, reset_in=60, skew=50))
+
+        scheduler.acquire()
+
+        assert scheduler.skew == 50
+        assert clock.sleeps == [60.0]
+
+    def test_counts_requests_in_flight(self, scheduler, clock):
+        scheduler.update(rate_limit(remaining=2, reset_in=100))
+        scheduler.acquire()
+        scheduler.acquire()
+        # A response sent before the second request reports stale budget.
+        scheduler.update(rate_limit(remaining=1, reset_in=100), NOW)
+
+        scheduler.acquire()
+
+        assert clock.now == NOW + 100
+
+    def test_max_wait(self, clock):
+        scheduler = RateLimitScheduler(
+            max_wait=30, clock=clock.time, sleep=clock.sleep
+        )
+        scheduler.update(rate_limit(remaining=0, reset_in=60))
+
+        with pytest.raises(NatureRemoError):
+            scheduler.acquire()
+        clock.now += 60
+        scheduler.acquire()
+
+        assert clock.sleeps == []
+
+
+class TestAPIWithScheduler:
+    @responses.activate
+    def test_waits_for_reset(self, scheduler, clock):
+        responses.add(
+            responses.GET,
+            f"{BASE_URL}/1/users/me",
+            headers={
+                "Date": "Tue, 28 Jul 2020 07:06:40 GMT",
+                "X-Rate-Limit-Limit": "30",
+                "X-Rate-Limit-Remaining": "0",
+                "X-Rate-Limit-Reset": str(int(NOW) + 20),
+            },
+            json=load_json("testdata/user.json"),
+            status=200,
+        )
+        api = NatureRemoAPI("access_token", scheduler=scheduler)
+
+        api.get_user()
+        api.get_user()
+
+        assert len(responses.calls) == 2
+        assert clock.sleeps == [20.0]
+
+    @responses.activate
+    def test_rate_limit_recorded_on_post(self):
+        responses.add(
+            responses.POST,
+            f"{BASE_URL}/1/signals/signal-id/send",
+            headers={"X-Rate-Limit-Remaining": "28"},
+            status=200,
+        )
+        api = NatureRemoAPI("access_token")
+
+        api.send_signal("signal-id")
+
+        assert api.rate_limit.remaining == 28
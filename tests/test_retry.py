@@ -0,0 +1,150 @@
+import pytest
+import requests
+import responses
+
+from .utils import load_json
+from remo import NatureRemoAPI
+from remo import NatureRemoError
+from remo import RetryPolicy
+from remo import User
+from remo.api import BASE_URL
+
+URL = f"{BASE_URL}/1/users/me"
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def api(sleeps):
+    policy = RetryPolicy(max_retries=3, sleep=sleeps.append)
+    return NatureRemoAPI("access_token", retry=policy)
+
+
+def add_user(status=200):
+    responses.add(
+        responses.GET, URL, json=load_json("testdata/user.json"), status=status
+    )
+
+
+class TestRetryPolicy:
+    def test_backoff_is_jittered_and_capped(self):
+        policy = RetryPolicy(backoff_factor=1.0, max_backoff=5.0)
+
+        for attempt in range(10):
+            delay = policy.backoff(attempt)
+            assert 0 <= delay <= min(5.0, 2 ** attempt)
+
+    def test_post_not_retried_by_default(self):
+        policy = RetryPolicy()
+
+        assert policy.get_delay(0, idempotent=False) is None
+        assert RetryPolicy(retry_posts=True).get_delay(0, False) is not None
+
+    def test_max_retries(self):
+        policy = RetryPolicy(max_retries=2)
+
+        assert policy.get_delay(1, idempotent=True) is not None
+        assert policy.get_delay(2, idempotent=True) is None
+
+
+class TestAPIWithRetry:
+    @responses.activate
+    def test_retries_server_errors(self, api, sleeps):
+        add_user(status=503)
+        add_user(status=502)
+        add_user()
+
+        user = api.get_user()
+
+        assert type(user) is User
+        assert len(responses.calls) == 3
+        assert len(sleeps) == 2
+
+    @responses.activate
+    def test_retries_connection_errors(self, api, sleeps):
+        responses.add(
+            responses.GET, URL, body=requests.ConnectionError("reset")
+        )
+        add_user()
+
+        api.get_user()
+
+        assert len(responses.calls) == 2
+        assert len(sleeps) == 1
+
+    @responses.activate
+    def test_gives_up_after_max_retries(self, api, sleeps):
+        for _ in range(4):
+            responses.add(responses.GET, URL, body="<html>", status=502)
+
+        with pytest.raises(NatureRemoError) as excinfo:
+            api.get_user()
+        assert str(excinfo.value) == (
+            "HTTP Status Code: 502, Message: Bad Gateway"
+        )
+        assert len(responses.calls) == 4
+        assert len(sleeps) == 3
+
+    @responses.activate
+    def test_waits_for_rate_limit_reset(self, api, sleeps):
+        responses.add(
+            responses.GET,
+            URL,
+            headers={
+                "Date": "Tue, 28 Jul 2020 07:17:31 GMT",
+                "X-Rate-Limit-Reset": "1595920800",
+            },
+            json={"code": 429001, "message": "Too Many Requests"},
+            status=429,
+        )
+        add_user()
+
+        api.get_user()
+
+        assert sleeps == [149.0]
+
+    @responses.activate
+    def test_does_not_retry_client_errors(self, api, sleeps):
+        responses.add(
+            responses.GET,
+            URL,
+            json={"code": 401001, "message": "Unauthorized"},
+            status=401,
+        )
+
+        with pytest.raises(NatureRemoError):
+            api.get_user()
+        assert len(responses.calls) == 1
+        assert sleeps == []
+
+    @responses.activate
+    def test_does_not_retry_post(self, api, sleeps):
+        url = f"{BASE_URL}/1/signals/signal-id/send"
+        responses.add(responses.POST, url, status=503)
+
+        with pytest.raises(NatureRemoError):
+            api.send_signal("signal-id")
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_retries_post_when_enabled(self, sleeps):
+        url = f"{BASE_URL}/1/signals/signal-id/send"
+        responses.add(responses.POST, url, status=503)
+        responses.add(responses.POST, url, status=200)
+        policy = RetryPolicy(retry_posts=True, sleep=sleeps.append)
+        api = NatureRemoAPI("access_token", retry=policy)
+
+        api.send_signal("signal-id")
+
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_no_retry_without_policy(self):
+        add_user(status=503)
+
+        with pytest.raises(NatureRemoError):
+            NatureRemoAPI("access_token").get_user()
+        assert len(responses.calls) == 1
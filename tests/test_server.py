@@ -0,0 +1,153 @@
+from datetime import datetime
+
+import pytest
+import requests
+
+from remo import Appliance
+from remo import ApplianceSchema
+from remo import NatureRemoAPI
+from remo import NatureRemoError
+from remo import RetryPolicy
+from remo.server import Account
+from remo.server import FakeCloudServer
+
+NOW = 1595865123
+
+
+@pytest.fixture
+def server():
+    account = Account.from_fixtures("testdata")
+    with FakeCloudServer(account, clock=lambda: NOW) as server:
+        yield server
+
+
+@pytest.fixture
+def api(server):
+    with NatureRemoAPI("access_token") as api:
+        api.base_url = server.base_url
+        yield api
+
+
+class TestFakeCloudServer:
+    def test_reads(self, api):
+        assert api.get_user().nickname == "user foo"
+        assert [d.id for d in api.get_devices()] == ["device-id"]
+        assert [a.id for a in api.get_appliances()] == [
+            "appliance-id",
+            "appliance-minimal-id",
+        ]
+        assert [s.id for s in api.get_signals("appliance-id")] == ["signal-id"]
+        assert len(api.detect_appliance("{}")) == 1
+
+    def test_writes(self, api):
+        assert api.update_user("bar").nickname == "bar"
+        api.update_device("device-id", "living room")
+        api.update_temperature_offset("device-id", 2)
+        appliance = api.create_appliance("device-id", "new", "ico_new")
+        signal = api.create_signal(appliance.id, "power", "{}", "ico_power")
+        api.update_signal(signal.id, "power on", "ico_on")
+        api.update_aircon_settings("appliance-id", temperature="24")
+        api.update_appliance_orders(f"{appliance.id},appliance-id")
+        api.delete_appliance("appliance-minimal-id")
+
+        device = api.get_devices()[0]
+        assert (device.name, device.temperature_offset) == ("living room", 2)
+        appliances = api.get_appliances()
+        assert [a.id for a in appliances] == [appliance.id, "appliance-id"]
+        assert appliances[0].signals[0].name == "power on"
+        assert appliances[1].settings.temp == "24"
+
+        api.delete_signal(signal.id)
+        assert api.get_signals(appliance.id) == []
+
+    def test_not_found(self, api):
+        with pytest.raises(NatureRemoError) as excinfo:
+            api.send_signal("unknown")
+        assert str(excinfo.value) == (
+            "HTTP Status Code: 404, Nature Remo Code: 404001, "
+            "Message: Not Found"
+        )
+
+    def test_unauthorized(self, server):
+        resp = requests.get(f"{server.base_url}/1/users/me")
+
+        assert resp.status_code == 401
+
+    def test_rate_limit(self, server, api):
+        server.rate_limit = 2
+
+        api.get_user()
+        assert api.rate_limit.limit == 2
+        assert api.rate_limit.remaining == 1
+        assert api.rate_limit.reset == datetime(2020, 7, 27, 15, 55)
+        api.get_user()
+        with pytest.raises(NatureRemoError) as excinfo:
+            api.get_user()
+        assert "429" in str(excinfo.value)
+        assert api.rate_limit.remaining == 0
+
+    def test_rate_limit_per_token(self, server, api):
+        server.rate_limit = 1
+        api.get_user()
+
+        with NatureRemoAPI("other_token") as other:
+            other.base_url = server.base_url
+            other.get_user()
+
+        server.reset_rate_limits()
+        api.get_user()
+
+    def test_rate_limit_reset(self, api):
+        clock = [NOW]
+        with FakeCloudServer(
+            Account.synthetic(), rate_limit=1, clock=lambda: clock[0]
+        ) as server:
+            api.base_url = server.base_url
+            api.get_user()
+            clock[0] = 1595865300
+            api.get_user()
+            assert api.rate_limit.reset.minute == 0
+
+    def test_injected_errors(self, api):
+        with FakeCloudServer(
+            Account.synthetic(), error_rate=1.0, error_status=503
+        ) as server:
+            api.base_url = server.base_url
+            api.retry = RetryPolicy(max_retries=2, sleep=lambda s: None)
+
+            with pytest.raises(NatureRemoError) as excinfo:
+                api.get_user()
+            assert "503" in str(excinfo.value)
+            assert server.requests == 3
+
+    def test_latency(self, api):
+        with FakeCloudServer(Account.synthetic(), latency=0.05) as server:
+            api.base_url = server.base_url
+            resp = requests.get(
+                f"{server.base_url}/1/users/me",
+                headers={"Authorization": "Bearer token"},
+            )
+
+        assert resp.elapsed.total_seconds() >= 0.05
+
+
+class TestAccount:
+    def test_synthetic(self):
+        account = Account.synthetic(appliances=40, devices=3, signals=2)
+
+        appliances = ApplianceSchema(many=True).load(account.appliances)
+        assert all(type(a) is Appliance for a in appliances)
+        assert len(account.devices) == 3
+        assert {a.type for a in appliances} == {"AC", "TV", "LIGHT", "IR"}
+        assert sum(len(a.signals) for a in appliances) == 80
+        ids = [a.id for a in appliances] + [d["id"] for d in account.devices]
+        assert len(set(ids)) == len(ids)
+
+    def test_synthetic_seed(self):
+        assert Account.synthetic(seed=1) == Account.synthetic(seed=1)
+        assert Account.synthetic(seed=1) != Account.synthetic(seed=2)
+
+    def test_synthetic_served(self, api):
+        with FakeCloudServer(Account.synthetic(appliances=500)) as server:
+            api.base_url = server.base_url
+            assert len(list(api.iter_appliances())) == 500
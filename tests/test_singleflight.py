@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+
+import responses
+
+from .utils import load_json
+from remo import NatureRemoAPI
+from remo import NatureRemoError
+from remo import SingleFlight
+from remo.api import BASE_URL
+
+
+def run_concurrently(fn, n):
+    results = [None] * n
+
+    def target(i):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results
+
+
+def wait_for_waiters(sf, n, timeout=5):
+    # Every thread but the leader has joined the flight once it waits.
+    deadline = time.monotonic() + timeout
+    while sum(call.waiters for call in sf._calls.values()) < n:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+class TestSingleFlight:
+    def test_coalesces_concurrent_calls(self):
+        sf = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            release.wait()
+            return "result"
+
+        threads, results = run_concurrently(lambda: sf.do("key", fn), 5)
+        wait_for_waiters(sf, 4)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert calls == [1]
+        assert results == ["result"] * 5
+
+    def test_shares_errors(self):
+        sf = SingleFlight()
+        release = threading.Event()
+
+        def fn():
+            release.wait()
+            raise NatureRemoError("boom")
+
+        threads, results = run_concurrently(lambda: sf.do("key", fn), 3)
+        wait_for_waiters(sf, 2)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert all(isinstance(r, NatureRemoError) for r in results)
+
+    def test_sequential_calls_not_coalesced(self):
+        sf = SingleFlight()
+        calls = []
+
+        sf.do("key", lambda: calls.append(1))
+        sf.do("key", lambda: calls.append(1))
+
+        assert calls == [1, 1]
+
+
+class TestAPIWithSingleFlight:
+    @responses.activate
+    def test_concurrent_get_appliances(self):
+        release = threading.Event()
+        data = [load_json("testdata/appliance.json")]
+
+        def callback(request):
+            release.wait()
+            return 200, {}, json.dumps(data)
+
+        responses.add_callback(
+            responses.GET, f"{BASE_URL}/1/appliances", callback=callback
+        )
+        sf = SingleFlight()
+        api = NatureRemoAPI("access_token", single_flight=sf)
+
+        threads, results = run_concurrently(api.get_appliances, 8)
+        wait_for_waiters(sf, 7)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert len(responses.calls) == 1
+        assert all(r[0].id == data[0]["id"] for r in results)
+        assert len({id(r[0]) for r in results}) == 8
+
+    @responses.activate
+    def test_not_shared_between_tokens(self):
+        # Both requests have to be in flight at once to pass the barrier.
+        barrier = threading.Barrier(2, timeout=5)
+        user = load_json("testdata/user.json")
+
+        def callback(request):
+            barrier.wait()
+            return 200, {}, json.dumps(user)
+
+        responses.add_callback(
+            responses.GET, f"{BASE_URL}/1/users/me", callback=callback
+        )
+        sf = SingleFlight()
+        apis = [
+            NatureRemoAPI("token1", single_flight=sf),
+            NatureRemoAPI("token2", single_flight=sf),
+        ]
+
+        users = []
+
+        def get_user(api):
+            users.append(api.get_user())
+
+        threads = [
+            threading.Thread(target=get_user, args=(api,)) for api in apis
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(users) == 2
+        assert len(responses.calls) == 2
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from remo import NatureRemoError
+from remo.stream import iter_json_array
+
+
+def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        end = start + size
+        yield data[start:end]
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 64, 4096])
+def test_iter_json_array(size):
+    data = [
+        {"name": "br]ack{et,s", "quote": 'a "quoted\\\\" ]', "n": [1, {}]},
+        "\\u3042\\\\",
+        12.5,
+        None,
+        [],
+        {"nested": [[["deep"]]]},
+    ]
+    doc = json.dumps(data, indent=2).encode()
+
+    assert list(iter_json_array(chunked(doc, size))) == data
+
+
+def test_empty_array():
+    assert list(iter_json_array([b" [ ] "])) == []
+
+
+def test_buffer_holds_one_element():
+    chunks = []
+
+    def source():
+        yield b"["
+        for i in range(1000):
+            chunk = json.dumps({"i": i, "pad": "x" * 100}).encode() + b","
+            chunks.append(chunk)
+            yield chunk
+        yield b"{}]"
+
+    for i, element in enumerate(iter_json_array(source())):
+        # Elements are decoded as soon as their closing comma arrives.
+        assert len(chunks) == min(i + 1, 1000)
+
+
+def test_not_an_array():
+    with pytest.raises(NatureRemoError):
+        list(iter_json_array([b'{"a": 1}']))
+
+
+def test_incomplete_array():
+    with pytest.raises(NatureRemoError):
+        list(iter_json_array([b'[{"a": 1}, {"b"']))
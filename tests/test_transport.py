@@ -0,0 +1,143 @@
+import pytest
+import requests
+import responses
+
+from .utils import load_json
+from remo import Appliance
+from remo import create_session
+from remo import Device
+from remo import FakeTransport
+from remo import HTTPTransport
+from remo import IRSignal
+from remo import NatureRemoAPI
+from remo import NatureRemoError
+from remo import NatureRemoLocalAPI
+from remo import RetryPolicy
+from remo import User
+from remo.api import BASE_URL
+
+
+@pytest.fixture
+def transport():
+    return FakeTransport.from_fixtures("testdata")
+
+
+@pytest.fixture
+def api(transport):
+    return NatureRemoAPI("access_token", transport=transport)
+
+
+class TestFakeTransport:
+    def test_fixtures(self, api, transport):
+        assert type(api.get_user()) is User
+        assert all(type(d) is Device for d in api.get_devices())
+        assert len(api.get_appliances()) == 2
+        assert all(type(a) is Appliance for a in api.iter_appliances())
+        assert api.get_signals("appliance-id")[0].id == (
+            load_json("testdata/signal.json")["id"]
+        )
+        assert len(transport.requests) == 5
+
+    def test_fixture_writes(self, api, transport):
+        api.update_temperature_offset("device-id", 1)
+        api.update_aircon_settings("appliance-id", temperature="26")
+        api.delete_appliance("appliance-id")
+        api.send_signal("signal-id")
+        api.create_signal("appliance-id", "name", "{}", "ico")
+
+        assert [r.url for r in transport.requests] == [
+            f"{BASE_URL}/1/devices/device-id/temperature_offset",
+            f"{BASE_URL}/1/appliances/appliance-id/aircon_settings",
+            f"{BASE_URL}/1/appliances/appliance-id/delete",
+            f"{BASE_URL}/1/signals/signal-id/send",
+            f"{BASE_URL}/1/appliances/appliance-id/signals",
+        ]
+        assert transport.requests[1].data == {"temperature": "26"}
+
+    def test_records_headers(self, api, transport):
+        api.get_user()
+
+        assert transport.requests[0].method == "GET"
+        assert transport.requests[0].headers["Authorization"] == (
+            "Bearer access_token"
+        )
+
+    def test_unknown_route(self):
+        api = NatureRemoAPI("access_token", transport=FakeTransport())
+
+        with pytest.raises(NatureRemoError) as excinfo:
+            api.get_user()
+        assert str(excinfo.value) == (
+            "HTTP Status Code: 404, Message: Not Found"
+        )
+
+    def test_status_and_headers(self):
+        transport = FakeTransport()
+        transport.add(
+            "GET",
+            "/1/users/me",
+            status=401,
+            json={"code": 401001, "message": "Unauthorized"},
+            headers={"X-Rate-Limit-Remaining": "3"},
+        )
+        api = NatureRemoAPI("access_token", transport=transport)
+
+        with pytest.raises(NatureRemoError):
+            api.get_user()
+        assert api.rate_limit.remaining == 3
+
+    def test_error(self):
+        transport = FakeTransport()
+        transport.add(
+            "GET", "/1/devices", error=requests.ConnectionError("reset")
+        )
+        api = NatureRemoAPI(
+            "access_token",
+            transport=transport,
+            retry=RetryPolicy(max_retries=2, sleep=lambda s: None),
+        )
+
+        with pytest.raises(NatureRemoError):
+            api.get_devices()
+        assert len(transport.requests) == 3
+
+    def test_local_api(self, transport):
+        local_api = NatureRemoLocalAPI("192.168.1.1", transport=transport)
+        message = '{"format": "us", "freq": 38, "data": [0]}'
+
+        assert type(local_api.get_ir_signal()) is IRSignal
+        local_api.send_ir_signal(message)
+        assert transport.requests[1].data == message
+
+    def test_not_closed_by_client(self, transport, monkeypatch):
+        closed = []
+        monkeypatch.setattr(transport, "close", lambda: closed.append(1))
+
+        with NatureRemoAPI("access_token", transport=transport) as api:
+            assert api.session is None
+
+        assert closed == []
+
+
+class TestHTTPTransport:
+    @responses.activate
+    def test_send(self):
+        url = f"{BASE_URL}/1/users/me"
+        responses.add(responses.POST, url, json={}, status=200)
+        transport = HTTPTransport()
+
+        resp = transport.send("POST", url, {"X-Test": "1"}, {"a": "b"})
+
+        assert resp.ok
+        assert responses.calls[0].request.headers["X-Test"] == "1"
+        assert responses.calls[0].request.body == "a=b"
+
+    def test_close_owned_session_only(self, monkeypatch):
+        session = create_session()
+        closed = []
+        monkeypatch.setattr(session, "close", lambda: closed.append(1))
+
+        HTTPTransport(session).close()
+
+        assert closed == []
+        assert HTTPTransport().session is not session